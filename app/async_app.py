@@ -0,0 +1,85 @@
+from quart import Quart, jsonify
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app import Config, engine_options
+
+DRIVERS_ASYNC = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def url_async(uri):
+    """Troca o driver síncrono da DATABASE_URL pelo equivalente assíncrono (asyncpg/aiosqlite)."""
+    url = make_url(uri)
+    backend = url.get_backend_name()
+    if backend not in DRIVERS_ASYNC:
+        raise ValueError(f"Banco '{backend}' não suportado no modo assíncrono")
+    return url.set(drivername=DRIVERS_ASYNC[backend])
+
+
+def async_engine_options(uri):
+    opcoes = dict(engine_options(uri))
+    connect_args = opcoes.pop("connect_args", None)
+    if connect_args:
+        # O asyncpg não aceita `options`/`connect_timeout` do libpq
+        timeout_ms = connect_args["options"].rsplit("=", 1)[-1]
+        opcoes["connect_args"] = {
+            "timeout": connect_args["connect_timeout"],
+            "server_settings": {"statement_timeout": timeout_ms},
+        }
+    return opcoes
+
+
+def create_async_app(config_class=Config):
+    """Cria a variante ASGI da API (Quart + AsyncSession), para rodar com uvicorn/hypercorn.
+
+    Reaproveita ClienteDB, os schemas Pydantic e os serviços da versão
+    síncrona; cada requisição em espera no banco libera o event loop em vez de
+    prender uma thread.
+    """
+    app = Quart(__name__)
+    app.config.from_object(config_class)
+
+    uri = app.config["SQLALCHEMY_DATABASE_URI"]
+    engine = create_async_engine(url_async(uri), **async_engine_options(uri))
+    app.extensions["async_engine"] = engine
+    app.extensions["async_session"] = async_sessionmaker(engine, expire_on_commit=False)
+
+    from .service.busca import registrar_funcoes_sqlite
+    registrar_funcoes_sqlite(engine.sync_engine)
+
+    # Registra a criação dos gatilhos em db.metadata.create_all()
+    from .service import gatilhos
+
+    from .service.cache import EXTENSAO as CACHE_EXTENSAO, criar_cache
+    app.extensions[CACHE_EXTENSAO] = criar_cache(app.config)
+
+    from .service.serializacao import instalar_json_provider
+    instalar_json_provider(app)
+
+    from .controller.cliente_async_controller import cliente_async_bp
+    app.register_blueprint(cliente_async_bp)
+
+    @app.after_serving
+    async def fechar_engine():
+        await engine.dispose()
+
+    @app.errorhandler(404)
+    async def not_found_error(error):
+        return jsonify({
+            "success": False,
+            "message": "Recurso não encontrado",
+            "error": "O endpoint solicitado não existe."
+        }), 404
+
+    @app.errorhandler(Exception)
+    async def handle_unexpected_error(e):
+        return jsonify({
+            "success": False,
+            "message": "Ocorreu um erro inesperado no servidor",
+            "error": "Internal Server Error"
+        }), 500
+
+    return app
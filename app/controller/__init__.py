@@ -1 +1,2 @@
-from app.controller.cliente_controller import cliente_bp
\ No newline at end of file
+from app.controller.cliente_controller import cliente_bp
+from app.controller import cliente_cli
@@ -0,0 +1,272 @@
+from pydantic import ValidationError
+from quart import Blueprint, current_app, jsonify, request
+from sqlalchemy import or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.db_models import ClienteDB
+from app.model.cliente_model import ClienteCreate, ClienteUpdate
+from app.service import listagem
+from app.service.cache import EXTENSAO as CACHE_EXTENSAO
+from app.service.respostas import resposta_412, resposta_integridade
+from app.service.serializacao import CAMPOS_CLIENTE, cliente_para_dict, ler_campos, projetar
+from app.service.versao import (
+    etag_colecao, etag_conteudo, incrementar_versao, nao_modificado, precondicao_falhou, resposta_304,
+    versao_tabela
+)
+
+# Versão assíncrona dos handlers de cliente_controller.py, servida por app/async_app.py.
+# As funções de serviço síncronas rodam dentro da AsyncSession via run_sync.
+cliente_async_bp = Blueprint("clientes", __name__, url_prefix="/clientes")
+
+
+def _sessao():
+    return current_app.extensions["async_session"]()
+
+
+def _cache():
+    return current_app.extensions[CACHE_EXTENSAO]
+
+
+@cliente_async_bp.route("/", methods=["GET"]) # GET - Listar clientes
+async def buscar_ou_listar_clientes():
+    try:
+        parametros = listagem.ler_parametros(request.args, current_app.config)
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "message": "Parâmetros inválidos",
+            "error": str(e)
+        }), 400
+
+    async with _sessao() as session:
+        etag = etag_colecao(await session.run_sync(versao_tabela), request.args)
+        if nao_modificado(request, etag):
+            return resposta_304(etag)
+
+        dialeto = session.bind.dialect.name
+        query = listagem.montar_consulta(parametros, dialeto)
+        data, next_cursor = listagem.montar_pagina((await session.execute(query)).all(), parametros)
+        limiar = current_app.config.get("CLIENTES_COUNT_EXACT_THRESHOLD", 100000)
+        total, tipo_contagem = await session.run_sync(
+            lambda sync_session: listagem.contar(sync_session, parametros, dialeto, limiar)
+        )
+    contagem = {"count": total, "count_type": tipo_contagem} if tipo_contagem else {}
+
+    if not data and parametros.nome:
+        return jsonify({
+            "success": False,
+            "message": "Nenhum cliente encontrado",
+            "error": f"Nenhum cliente encontrado contendo '{parametros.nome}'"
+        }), 404
+
+    return jsonify({
+        "success": True,
+        "message": "Clientes encontrados com sucesso" if data else "Nenhum cliente cadastrado",
+        "data": data,
+        "next_cursor": next_cursor,
+        **contagem
+    }), 200, {"ETag": f'"{etag}"'}
+
+
+@cliente_async_bp.route("/<int:id>", methods=["GET"]) # GET - Buscar cliente por ID
+async def buscar_cliente_por_id(id: int):
+    try:
+        campos = ler_campos(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "message": "Parâmetros inválidos",
+            "error": str(e)
+        }), 400
+
+    cache = _cache()
+    cliente = cache.get(id)
+    if cliente is None:
+        geracao = cache.geracao(id)
+        async with _sessao() as session:
+            cliente_db = await session.get(ClienteDB, id)
+            if not cliente_db:
+                return jsonify({
+                    "success": False,
+                    "message": "Cliente não encontrado",
+                    "error": f"Nenhum cliente encontrado com ID {id}"
+                }), 404
+            cliente = cliente_para_dict(cliente_db)
+        cache.preencher(id, cliente, geracao)
+
+    # ETag do cliente completo, como no app WSGI: vale no If-Match mesmo vinda de `fields`
+    etag = etag_conteudo(cliente)
+    if campos != CAMPOS_CLIENTE:
+        cliente = projetar(cliente, campos)
+
+    if nao_modificado(request, etag):
+        return resposta_304(etag)
+    return jsonify({
+        "success": True,
+        "message": "Cliente encontrado com sucesso",
+        "data": cliente
+    }), 200, {"ETag": f'"{etag}"'}
+
+
+@cliente_async_bp.route("/", methods=["POST"]) # POST - Criar novo cliente
+async def criar_cliente():
+    data = await request.get_json(silent=True)
+
+    if not data:
+        return jsonify({
+            "success": False,
+            "message": "Requisição inválida",
+            "error": "Requisição precisa conter dados JSON"
+        }), 400
+    try:
+        cliente_create = ClienteCreate(**data)
+    except ValidationError as e:
+        return jsonify({
+            "success": False,
+            "message": "Dados inválidos",
+            "errors": e.errors(include_url=False, include_context=False)
+        }), 400
+
+    async with _sessao() as session:
+        existente = (await session.execute(
+            select(ClienteDB.email).where(
+                or_(ClienteDB.cpf == cliente_create.cpf, ClienteDB.email == cliente_create.email)
+            ).limit(1)
+        )).first()
+        if existente:
+            if existente.email == cliente_create.email:
+                return jsonify({
+                    "success": False,
+                    "message": "Email já cadastrado",
+                    "error": "O email já está cadastrado"
+                }), 409
+            return jsonify({
+                "success": False,
+                "message": "CPF já cadastrado",
+                "error": "O CPF já está cadastrado"
+            }), 409
+
+        novo_cliente = ClienteDB(**cliente_create.model_dump())
+        session.add(novo_cliente)
+        try:
+            await session.run_sync(incrementar_versao)
+            await session.commit()
+        except IntegrityError as e:
+            await session.rollback()
+            return resposta_integridade(e)
+
+        return jsonify({
+            "success": True,
+            "message": "Cliente criado com sucesso",
+            "data": cliente_para_dict(novo_cliente)
+        }), 201
+
+
+@cliente_async_bp.route("/<int:id>", methods=["PUT"]) # PUT - Atualizar cliente por ID
+async def atualizar_cliente(id: int):
+    data = await request.get_json(silent=True)
+
+    if not data:
+        return jsonify({
+            "success": False,
+            "message": "Requisição inválida",
+            "error": "Requisição precisa conter dados JSON"
+        }), 400
+    try:
+        cliente_update = ClienteUpdate(**data)
+    except ValidationError as e:
+        return jsonify({
+            "success": False,
+            "message": "Dados inválidos. Verifique os campos enviados.",
+            "errors": e.errors(include_url=False, include_context=False)
+        }), 400
+
+    async with _sessao() as session:
+        cliente_db = await session.get(ClienteDB, id)
+        if cliente_db is None:
+            return jsonify({
+                "success": False,
+                "message": "Cliente não encontrado",
+                "error": f"Nenhum cliente encontrado com o ID {id}"
+            }), 404
+
+        etag_atual = etag_conteudo(cliente_para_dict(cliente_db))
+        if precondicao_falhou(request, etag_atual):
+            return resposta_412(etag_atual)
+
+        # Uma única consulta cobre CPF e email, e só para os valores que mudaram
+        filtros = []
+        if cliente_update.email != cliente_db.email:
+            filtros.append(ClienteDB.email == cliente_update.email)
+        if cliente_update.cpf != cliente_db.cpf:
+            filtros.append(ClienteDB.cpf == cliente_update.cpf)
+        if filtros:
+            existente = (await session.execute(
+                select(ClienteDB.email).where(or_(*filtros), ClienteDB.id != id).limit(1)
+            )).first()
+            if existente and existente.email == cliente_update.email:
+                return jsonify({
+                    "success": False,
+                    "message": "Email já cadastrado",
+                    "error": f"O email '{cliente_update.email}' já está cadastrado"
+                }), 409
+            if existente:
+                return jsonify({
+                    "success": False,
+                    "message": "CPF já cadastrado",
+                    "error": f"O CPF '{cliente_update.cpf}' já está cadastrado"
+                }), 409
+
+        for key, value in cliente_update.model_dump(exclude_unset=True).items():
+            setattr(cliente_db, key, value)
+
+        try:
+            await session.run_sync(incrementar_versao)
+            await session.commit()
+        except IntegrityError as e:
+            await session.rollback()
+            return resposta_integridade(e)
+        except StaleDataError:
+            # Outra requisição gravou depois da nossa leitura: o UPDATE ... WHERE versao = n não casou
+            await session.rollback()
+            return resposta_412()
+
+        cliente_atualizado = cliente_para_dict(cliente_db)
+
+    _cache().delete(id)
+    return jsonify({
+        "success": True,
+        "message": "Cliente atualizado com sucesso",
+        "data": cliente_atualizado
+    }), 200, {"ETag": f'"{etag_conteudo(cliente_atualizado)}"'}
+
+
+@cliente_async_bp.route("/<int:id>", methods=["DELETE"]) # DELETE - Deletar cliente por ID
+async def deletar_cliente(id: int):
+    async with _sessao() as session:
+        cliente = await session.get(ClienteDB, id)
+        if cliente is None:
+            return jsonify({
+                "success": False,
+                "message": "Cliente não encontrado",
+                "error": "Nenhum cliente encontrado com o ID informado"
+            }), 404
+
+        cliente_deletado = cliente_para_dict(cliente)
+        if precondicao_falhou(request, etag_conteudo(cliente_deletado)):
+            return resposta_412(etag_conteudo(cliente_deletado))
+        try:
+            await session.delete(cliente)
+            await session.run_sync(incrementar_versao)
+            await session.commit()
+        except StaleDataError:
+            await session.rollback()
+            return resposta_412()
+
+    _cache().delete(id)
+    return jsonify({
+        "success": True,
+        "message": "Cliente deletado com sucesso",
+        "data": cliente_deletado
+    }), 200
@@ -0,0 +1,86 @@
+import csv
+
+import click
+from flask import current_app
+
+from app import db
+from app.controller.cliente_controller import cliente_bp
+from app.service.alteracoes import compactar
+from app.service.estatisticas import reconstruir_resumo
+from app.service.importacao import FORMATOS_IMPORTACAO, LEITORES, formato_pelo_nome, importar_clientes
+
+
+@cliente_bp.cli.command("importar") # flask clientes importar clientes.csv
+@click.argument("arquivo", type=click.Path(exists=True, dir_okay=False))
+@click.option("--formato", type=click.Choice(FORMATOS_IMPORTACAO), help="Padrão: deduzido pela extensão do arquivo.")
+@click.option("--lote", "tamanho_lote", type=int, help="Linhas por bloco gravado (padrão: CLIENTES_IMPORT_CHUNK_SIZE).")
+@click.option("--rejeitados", type=click.Path(dir_okay=False, writable=True), help="CSV onde gravar as linhas rejeitadas.")
+def importar(arquivo, formato, tamanho_lote, rejeitados):
+    """Importa clientes de um arquivo CSV ou NDJSON grande, em streaming."""
+    formato = formato or formato_pelo_nome(arquivo)
+    if formato is None:
+        raise click.UsageError("Não foi possível deduzir o formato pela extensão; use --formato.")
+    tamanho_lote = tamanho_lote or current_app.config.get('CLIENTES_IMPORT_CHUNK_SIZE', 5000)
+
+    def mostrar_progresso(resultado):
+        click.echo(
+            f"{resultado.lidas} linhas lidas, {resultado.importadas} importadas, "
+            f"{resultado.conflitos + resultado.invalidas} rejeitadas "
+            f"({resultado.linhas_por_segundo:.0f} linhas/s)",
+            err=True
+        )
+
+    arquivo_rejeitados = open(rejeitados, "w", newline="", encoding="utf-8") if rejeitados else None
+    try:
+        ao_rejeitar = None
+        if arquivo_rejeitados:
+            escritor = csv.writer(arquivo_rejeitados)
+            escritor.writerow(["linha", "status", "motivo"])
+            ao_rejeitar = lambda linha, status, motivo: escritor.writerow([linha, status, motivo])
+
+        with open(arquivo, "rb") as stream:
+            resultado = importar_clientes(
+                db.session,
+                LEITORES[formato](stream),
+                tamanho_bloco=tamanho_lote,
+                ao_progredir=mostrar_progresso,
+                ao_rejeitar=ao_rejeitar,
+                limite_rejeicoes=0
+            )
+    finally:
+        if arquivo_rejeitados:
+            arquivo_rejeitados.close()
+
+    click.echo(
+        f"Importação concluída em {resultado.segundos:.1f}s: {resultado.importadas} importadas, "
+        f"{resultado.conflitos} conflitos, {resultado.invalidas} inválidas."
+    )
+
+
+@cliente_bp.cli.command("reconstruir-estatisticas") # flask clientes reconstruir-estatisticas
+def reconstruir_estatisticas():
+    """Recalcula a tabela clientes_resumo (GET /clientes/stats) a partir de clientes."""
+    grupos = reconstruir_resumo(db.session, db.engine.dialect.name)
+    click.echo(f"Estatísticas reconstruídas: {grupos} grupos.")
+
+
+@cliente_bp.cli.command("compactar-alteracoes") # flask clientes compactar-alteracoes --reter-dias 7
+@click.option("--reter-dias", type=click.IntRange(min=0), help="Remove também as alterações mais antigas que isso; since anteriores recebem 410.")
+def compactar_alteracoes(reter_dias):
+    """Compacta clientes_alteracoes (GET /clientes/changes), mantendo só a alteração mais recente de cada cliente."""
+    resultado = compactar(db.session, db.engine.dialect.name, reter_dias)
+    click.echo(
+        f"Alterações compactadas: {resultado['substituidas']} substituídas, {resultado['podadas']} podadas."
+    )
+
+
+@cliente_bp.cli.command("gerar-openapi") # flask clientes gerar-openapi --saida openapi.json
+@click.option("--saida", default="openapi.json", show_default=True, type=click.Path(dir_okay=False, writable=True))
+def gerar_openapi(saida):
+    """Grava a spec OpenAPI em um arquivo, para servir com OPENAPI_SPEC_FILE sem gerá-la em cada processo."""
+    from app.service.documentacao import EXTENSAO, salvar_spec
+
+    if EXTENSAO not in current_app.extensions:
+        raise click.UsageError("A documentação está desligada (SWAGGER_ENABLED=0).")
+    spec = salvar_spec(current_app.extensions[EXTENSAO], saida)
+    click.echo(f"Spec gravada em {saida}: {len(spec.get('paths', {}))} rotas.")
@@ -1,39 +1,70 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
 from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
 from app import db
 from app.db_models import ClienteDB
-from app.model.cliente_model import ClienteCreate, ClienteUpdate, Cliente as ClienteSchema
+from app.model.cliente_model import ClienteCreate, ClienteUpdate
+from app.service import alteracoes, estatisticas, listagem, lote
+from app.service.cache import get_cache
+from app.service.exportacao import FORMATOS_EXPORTACAO, gerar_ndjson, gerar_json
+from app.service.importacao import LEITORES, formato_pelo_nome, importar_clientes
+from app.service.replicas import usar_primario
+from app.service.respostas import resposta_412, resposta_integridade
+from app.service.serializacao import CAMPOS_CLIENTE, cliente_para_dict, ler_campos, projetar
+from app.service.unicidade import get_unicidade
+from app.service.upsert import upsert_por_cpf
+from app.service.versao import (
+    etag_colecao, etag_conteudo, incrementar_versao, nao_modificado, precondicao_falhou, resposta_304,
+    versao_tabela
+)
 
 cliente_bp = Blueprint("clientes", __name__, url_prefix="/clientes")
 
 @cliente_bp.route("/", methods=["GET"]) # GET - Listar todos os clientes (Obrigatório)
 def buscar_ou_listar_clientes():
     try:
-        nome = request.args.get('nome')
+        try:
+            parametros = listagem.ler_parametros(request.args, current_app.config)
+        except ValueError as e:
+            return jsonify({
+                "success": False,
+                "message": "Parâmetros inválidos",
+                "error": str(e)
+            }), 400
+
+        # ETag da coleção: só depende da versão da tabela e dos parâmetros, então um
+        # If-None-Match válido dispensa a consulta e a serialização
+        etag = etag_colecao(versao_tabela(db.session), request.args)
+        if nao_modificado(request, etag):
+            return resposta_304(etag)
+
+        # Desafio Extra - Buscar clientes por nome pela query cliente?nome=string
+        dialeto = db.engine.dialect.name
+        query = listagem.montar_consulta(parametros, dialeto)
+        data, next_cursor = listagem.montar_pagina(db.session.execute(query).all(), parametros)
 
-        if nome:
-            clientes_db = ClienteDB.query.filter( # Desafio Extra - Buscar clientes por nome pela query cliente?nome=string
-                ClienteDB.nome.ilike(f"%{nome}%")
-            ).all()
-            if not clientes_db:
+        total, tipo_contagem = listagem.contar(
+            db.session, parametros, dialeto, current_app.config.get('CLIENTES_COUNT_EXACT_THRESHOLD', 100000)
+        )
+        contagem = {"count": total, "count_type": tipo_contagem} if tipo_contagem else {}
+
+        if not data:
+            if parametros.nome:
                 return jsonify({
                     "success": False,
                     "message": "Nenhum cliente encontrado",
-                    "error": f"Nenhum cliente encontrado contendo '{nome}'"
+                    "error": f"Nenhum cliente encontrado contendo '{parametros.nome}'"
                 }), 404
-        else:
-            clientes_db = ClienteDB.query.all()
-            if not clientes_db:
-                return jsonify({"success": True, "message": "Nenhum cliente cadastrado", "data": []}), 200
-            
-            
-        data = [ClienteSchema.model_validate(c).model_dump(exclude_none=True) for c in clientes_db]
+            return jsonify({"success": True, "message": "Nenhum cliente cadastrado", "data": [], "next_cursor": None, **contagem}), 200, {"ETag": f'"{etag}"'}
 
         return jsonify({
             "success": True,
             "message": "Clientes encontrados com sucesso",
-            "data": data
-        }), 200
+            "data": data,
+            "next_cursor": next_cursor,
+            **contagem
+        }), 200, {"ETag": f'"{etag}"'}
 
     except Exception as e:
         return jsonify({
@@ -43,22 +74,185 @@ def buscar_ou_listar_clientes():
         }), 500
 
 
+@cliente_bp.route("/export", methods=["GET"]) # GET - Exportar todos os clientes em streaming
+def exportar_clientes():
+    formato = request.args.get('format', 'ndjson')
+    if formato not in FORMATOS_EXPORTACAO:
+        return jsonify({
+            "success": False,
+            "message": "Parâmetros inválidos",
+            "error": f"Formato '{formato}' não suportado. Use: {', '.join(FORMATOS_EXPORTACAO)}"
+        }), 400
+
+    try:
+        campos = ler_campos(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "message": "Parâmetros inválidos",
+            "error": str(e)
+        }), 400
+
+    gerador = gerar_ndjson if formato == 'ndjson' else gerar_json
+    tamanho_lote = current_app.config.get('CLIENTES_EXPORT_CHUNK_SIZE', 1000)
+    return Response(
+        stream_with_context(gerador(db.session, tamanho_lote, campos)),
+        mimetype=FORMATOS_EXPORTACAO[formato],
+        headers={"Content-Disposition": f"attachment; filename=clientes.{formato}"}
+    )
+
+
+@cliente_bp.route("/cache/stats", methods=["GET"]) # GET - Contadores do cache de clientes
+def estatisticas_cache():
+    return jsonify({
+        "success": True,
+        "message": "Estatísticas do cache",
+        "data": get_cache().stats()
+    }), 200
+
+
+@cliente_bp.route("/unicidade/stats", methods=["GET"]) # GET - Memória e falsos positivos do filtro de cpf/email
+def estatisticas_unicidade():
+    return jsonify({
+        "success": True,
+        "message": "Estatísticas do filtro de unicidade",
+        "data": get_unicidade().stats()
+    }), 200
+
+
+@cliente_bp.route("/stats", methods=["GET"]) # GET - Totais de clientes por agencia, tipo_conta e bandeira
+def estatisticas_clientes():
+    try:
+        agrupamento = estatisticas.ler_agrupamento(request.args.get('group_by'))
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "message": "Parâmetros inválidos",
+            "error": str(e)
+        }), 400
+
+    try:
+        etag = etag_colecao(versao_tabela(db.session), request.args)
+        if nao_modificado(request, etag):
+            return resposta_304(etag)
+
+        return jsonify({
+            "success": True,
+            "message": "Estatísticas dos clientes",
+            "data": estatisticas.estatisticas(db.session, agrupamento)
+        }), 200, {"ETag": f'"{etag}"'}
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "message": "Erro ao calcular estatísticas",
+            "error": str(e)
+        }), 500
+
+
+@cliente_bp.route("/changes", methods=["GET"]) # GET - Alterações de clientes desde um seq (sincronização incremental)
+def listar_alteracoes():
+    try:
+        parametros = alteracoes.ler_parametros(request.args, current_app.config)
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "message": "Parâmetros inválidos",
+            "error": str(e)
+        }), 400
+
+    try:
+        if parametros.desde is None:
+            # Sem since: devolve só a posição atual, para começar a seguir o feed após um /export
+            return jsonify({
+                "success": True,
+                "message": "Posição atual do feed de alterações",
+                "data": [],
+                "next_since": alteracoes.posicao_atual(db.session),
+                "has_more": False
+            }), 200
+
+        if alteracoes.expirado(db.session, parametros.desde):
+            return jsonify({
+                "success": False,
+                "message": "Posição expirada",
+                "error": "Alterações posteriores a 'since' já foram compactadas; ressincronize por /clientes/export"
+            }), 410
+
+        # Sem vaga de long-poll no processo, responde na hora em vez de prender mais uma thread
+        esperando = parametros.espera > 0 and alteracoes.reservar_espera(current_app)
+        try:
+            entradas, mais = alteracoes.aguardar(
+                db.session, parametros.desde, parametros.limite, parametros.espera if esperando else 0,
+                intervalo=current_app.config.get('CHANGES_POLL_INTERVAL', 0.5)
+            )
+        finally:
+            if esperando:
+                alteracoes.liberar_espera(current_app)
+
+        headers = {}
+        if parametros.espera > 0 and not esperando and not entradas:
+            headers["Retry-After"] = str(parametros.espera)
+        return jsonify({
+            "success": True,
+            "message": "Alterações encontradas" if entradas else "Nenhuma alteração",
+            "data": entradas,
+            "next_since": entradas[-1]["seq"] if entradas else parametros.desde,
+            "has_more": mais
+        }), 200, headers
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "message": "Erro ao listar alterações",
+            "error": str(e)
+        }), 500
+
+
 @cliente_bp.route("/<int:id>", methods=["GET"]) # Obrigatório - Listar cliente por ID
 def buscar_cliente_por_id(id: int):
    
     try:
-        cliente_db = db.session.get(ClienteDB, id)
-        if not cliente_db:
-            return jsonify({
-                "success": False,
-                "message": "Cliente não encontrado",
-                "error": f"Nenhum cliente encontrado com ID {id}"
-            }), 404
+        campos = ler_campos(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "message": "Parâmetros inválidos",
+            "error": str(e)
+        }), 400
+
+    try:
+        cache = get_cache()
+        cliente = cache.get(id)
+        if cliente is None:
+            # A geração é lida antes da consulta: se uma escrita invalidar o cliente
+            # enquanto isso, a linha lida aqui (já antiga) não entra no cache
+            geracao = cache.geracao(id)
+            if cache.backend != "none":
+                usar_primario(db.session)
+            cliente_db = db.session.get(ClienteDB, id)
+            if not cliente_db:
+                return jsonify({
+                    "success": False,
+                    "message": "Cliente não encontrado",
+                    "error": f"Nenhum cliente encontrado com ID {id}"
+                }), 404
+            cliente = cliente_para_dict(cliente_db)
+            cache.preencher(id, cliente, geracao)
+
+        # A ETag é a do cliente completo, para valer no If-Match de PUT/PATCH/DELETE
+        # também quando vem de uma resposta com `fields`
+        etag = etag_conteudo(cliente)
+
+        # O cache guarda o cliente completo; a projeção de `fields` é aplicada sobre ele
+        if campos != CAMPOS_CLIENTE:
+            cliente = projetar(cliente, campos)
+
+        if nao_modificado(request, etag):
+            return resposta_304(etag)
         return jsonify({
             "success": True,
             "message": "Cliente encontrado com sucesso",
-            "data": ClienteSchema.model_validate(cliente_db).model_dump()
-        }), 200
+            "data": cliente
+        }), 200, {"ETag": f'"{etag}"'}
     except Exception as e:
         return jsonify({
             "success": False,
@@ -86,13 +280,20 @@ def criar_cliente():
             "errors": e.errors()
         }), 400
     
-    from sqlalchemy import or_
-    db_cliente_existente = ClienteDB.query.filter(
-        or_(
-            ClienteDB.cpf == cliente_create.cpf,
-            ClienteDB.email == cliente_create.email
-        )
-    ).first()
+    # O filtro de Bloom responde "certamente não cadastrado" sem ir ao banco; a
+    # consulta só é feita quando ele responde "talvez" (a restrição única segue valendo)
+    unicidade = get_unicidade()
+    unicidade.garantir_construido(current_app._get_current_object())
+    db_cliente_existente = None
+    if unicidade.talvez_exista(cpf=cliente_create.cpf, email=cliente_create.email):
+        from sqlalchemy import or_
+        db_cliente_existente = ClienteDB.query.filter(
+            or_(
+                ClienteDB.cpf == cliente_create.cpf,
+                ClienteDB.email == cliente_create.email
+            )
+        ).first()
+        unicidade.registrar_consulta(db_cliente_existente is not None)
 
     if db_cliente_existente:
         if db_cliente_existente.email == cliente_create.email:
@@ -111,12 +312,17 @@ def criar_cliente():
     novo_cliente = ClienteDB(**cliente_create.model_dump())
     try:
         db.session.add(novo_cliente)
+        incrementar_versao(db.session)
         db.session.commit()
+        unicidade.adicionar(cpf=novo_cliente.cpf, email=novo_cliente.email)
         return jsonify({
             "success": True,
             "message": "Cliente criado com sucesso",
-            "data": ClienteSchema.model_validate(novo_cliente).model_dump()
+            "data": cliente_para_dict(novo_cliente)
         }), 201
+    except IntegrityError as e: # Outra requisição gravou o mesmo CPF/email depois da verificação
+        db.session.rollback()
+        return resposta_integridade(e)
     except Exception as e:
         db.session.rollback()
         return jsonify({
@@ -126,6 +332,363 @@ def criar_cliente():
         }), 500
 
 
+@cliente_bp.route("/bulk", methods=["POST"]) # POST - Criar clientes em lote
+def criar_clientes_em_lote():
+    data = request.get_json(silent=True)
+    if isinstance(data, list):
+        data = {"clientes": data}
+
+    if not data or not isinstance(data.get("clientes"), list) or not data["clientes"]:
+        return jsonify({
+            "success": False,
+            "message": "Requisição inválida",
+            "error": "Requisição precisa conter uma lista 'clientes' não vazia"
+        }), 400
+
+    modo = data.get("modo", lote.MODO_TUDO_OU_NADA)
+    if modo not in lote.MODOS:
+        return jsonify({
+            "success": False,
+            "message": "Requisição inválida",
+            "error": f"Modo '{modo}' inválido. Use: {', '.join(lote.MODOS)}"
+        }), 400
+
+    maximo = current_app.config.get('CLIENTES_BULK_MAX_ITEMS', 10000)
+    if len(data["clientes"]) > maximo:
+        return jsonify({
+            "success": False,
+            "message": "Requisição inválida",
+            "error": f"O lote pode ter no máximo {maximo} clientes"
+        }), 413
+
+    try:
+        resultados = lote.criar_clientes_em_lote(
+            db.session,
+            data["clientes"],
+            modo=modo,
+            tamanho_bloco=current_app.config.get('CLIENTES_BULK_CHUNK_SIZE', 1000)
+        )
+        if any(r.status == lote.STATUS_CRIADO for r in resultados):
+            incrementar_versao(db.session)
+        db.session.commit()
+        unicidade = get_unicidade()
+        for resultado in resultados:
+            if resultado.status == lote.STATUS_CRIADO:
+                item = data["clientes"][resultado.index]
+                unicidade.adicionar(cpf=item.get("cpf"), email=item.get("email"))
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({
+            "success": False,
+            "message": "Conflito ao salvar clientes",
+            "error": "CPF ou email já cadastrado por outra requisição. Nenhum cliente foi criado."
+        }), 409
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            "success": False,
+            "message": "Erro ao salvar clientes",
+            "error": str(e)
+        }), 500
+
+    resumo = {status: 0 for status in (lote.STATUS_CRIADO, lote.STATUS_CONFLITO, lote.STATUS_INVALIDO, lote.STATUS_IGNORADO)}
+    for resultado in resultados:
+        resumo[resultado.status] += 1
+
+    if resumo[lote.STATUS_CRIADO] == len(resultados):
+        status_code, mensagem = 201, "Clientes criados com sucesso"
+    elif modo == lote.MODO_TUDO_OU_NADA or resumo[lote.STATUS_CRIADO] == 0:
+        status_code = 409 if resumo[lote.STATUS_CONFLITO] else 400
+        mensagem = "Nenhum cliente foi criado: o lote contém itens inválidos ou duplicados"
+    else:
+        status_code, mensagem = 207, "Lote processado parcialmente"
+
+    return jsonify({
+        "success": status_code in (201, 207),
+        "message": mensagem,
+        "data": {
+            "resumo": resumo,
+            "resultados": [r.to_dict() for r in resultados]
+        }
+    }), status_code
+
+
+def _ler_selecao_lote(data):
+    """Lê `ids` ou `filtro` e `modo` do corpo das rotas PATCH/DELETE /bulk. Levanta ValueError."""
+    if ("ids" in data) == ("filtro" in data):
+        raise ValueError("Informe 'ids' ou 'filtro', e apenas um deles")
+    modo = data.get("modo", lote.MODO_TUDO_OU_NADA)
+    if modo not in lote.MODOS:
+        raise ValueError(f"Modo '{modo}' inválido. Use: {', '.join(lote.MODOS)}")
+    if "filtro" in data:
+        return None, lote.ler_filtro(data["filtro"]), modo
+    return lote.ler_ids(data["ids"]), None, modo
+
+
+def _resposta_lote(resultados, status_ok, verbo, detalhar=True):
+    """Resposta das rotas PATCH/DELETE /bulk. Com `detalhar=False` (seleção por filtro)
+    só vão as contagens: a lista por id poderia ter milhares de itens."""
+    resumo = {}
+    for resultado in resultados:
+        resumo[resultado.status] = resumo.get(resultado.status, 0) + 1
+
+    if not resultados:
+        status_code, mensagem = 404, "Nenhum cliente encontrado com o filtro informado"
+    elif resumo.get(status_ok, 0) == len(resultados):
+        status_code, mensagem = 200, f"Clientes {verbo}s com sucesso"
+    elif resumo.get(status_ok, 0) == 0:
+        status_code = 409 if resumo.get(lote.STATUS_CONFLITO) else 404
+        mensagem = f"Nenhum cliente foi {verbo}: o lote contém ids inexistentes ou em conflito"
+    else:
+        status_code, mensagem = 207, "Lote processado parcialmente"
+
+    dados = {"resumo": resumo}
+    if detalhar:
+        dados["resultados"] = [r.to_dict() for r in resultados]
+    return jsonify({
+        "success": status_code in (200, 207),
+        "message": mensagem,
+        "data": dados
+    }), status_code
+
+
+def _resposta_limite_excedido(e):
+    return jsonify({
+        "success": False,
+        "message": "Requisição inválida",
+        "error": str(e)
+    }), 413
+
+
+@cliente_bp.route("/bulk", methods=["PATCH"]) # PATCH - Atualizar clientes em lote
+def atualizar_clientes_em_lote():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({
+            "success": False,
+            "message": "Requisição inválida",
+            "error": "Requisição precisa conter 'dados' e 'ids' ou 'filtro'"
+        }), 400
+    try:
+        ids, filtro, modo = _ler_selecao_lote(data)
+        alteracoes = lote.ler_alteracoes(data.get("dados"))
+    except ValidationError as e:
+        return jsonify({
+            "success": False,
+            "message": "Dados inválidos",
+            "errors": e.errors(include_url=False, include_context=False)
+        }), 400
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "message": "Requisição inválida",
+            "error": str(e)
+        }), 400
+
+    maximo = current_app.config.get('CLIENTES_BULK_MAX_ITEMS', 10000)
+    if ids is not None and len(ids) > maximo:
+        return jsonify({
+            "success": False,
+            "message": "Requisição inválida",
+            "error": f"O lote pode ter no máximo {maximo} ids"
+        }), 413
+
+    try:
+        resultados = lote.atualizar_clientes_em_lote(
+            db.session,
+            alteracoes,
+            ids=ids,
+            filtro=filtro,
+            modo=modo,
+            tamanho_bloco=current_app.config.get('CLIENTES_BULK_CHUNK_SIZE', 1000),
+            maximo=maximo
+        )
+        atualizados = [r.id for r in resultados if r.status == lote.STATUS_ATUALIZADO]
+        if atualizados:
+            incrementar_versao(db.session)
+        db.session.commit()
+    except lote.LimiteExcedido as e:
+        db.session.rollback()
+        return _resposta_limite_excedido(e)
+    except IntegrityError as e:
+        db.session.rollback()
+        return resposta_integridade(e)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            "success": False,
+            "message": "Erro ao atualizar clientes",
+            "error": str(e)
+        }), 500
+
+    if atualizados:
+        get_unicidade().adicionar(cpf=alteracoes.get("cpf"), email=alteracoes.get("email"))
+
+    get_cache().delete(*atualizados)
+    return _resposta_lote(resultados, lote.STATUS_ATUALIZADO, "atualizado", detalhar=filtro is None)
+
+
+@cliente_bp.route("/bulk", methods=["DELETE"]) # DELETE - Deletar clientes em lote
+def deletar_clientes_em_lote():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({
+            "success": False,
+            "message": "Requisição inválida",
+            "error": "Requisição precisa conter 'ids' ou 'filtro'"
+        }), 400
+    try:
+        ids, filtro, modo = _ler_selecao_lote(data)
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "message": "Requisição inválida",
+            "error": str(e)
+        }), 400
+
+    maximo = current_app.config.get('CLIENTES_BULK_MAX_ITEMS', 10000)
+    if ids is not None and len(ids) > maximo:
+        return jsonify({
+            "success": False,
+            "message": "Requisição inválida",
+            "error": f"O lote pode ter no máximo {maximo} ids"
+        }), 413
+
+    try:
+        resultados = lote.remover_clientes_em_lote(
+            db.session,
+            ids=ids,
+            filtro=filtro,
+            modo=modo,
+            tamanho_bloco=current_app.config.get('CLIENTES_BULK_CHUNK_SIZE', 1000),
+            maximo=maximo
+        )
+        removidos = [r.id for r in resultados if r.status == lote.STATUS_REMOVIDO]
+        if removidos:
+            incrementar_versao(db.session)
+        db.session.commit()
+    except lote.LimiteExcedido as e:
+        db.session.rollback()
+        return _resposta_limite_excedido(e)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            "success": False,
+            "message": "Erro ao remover clientes",
+            "error": str(e)
+        }), 500
+
+    get_cache().delete(*removidos)
+    return _resposta_lote(resultados, lote.STATUS_REMOVIDO, "removido", detalhar=filtro is None)
+
+
+@cliente_bp.route("/import", methods=["POST"]) # POST - Importar clientes de arquivo CSV/NDJSON
+def importar_clientes_arquivo():
+    arquivo = request.files.get('arquivo')
+    if arquivo is None or not arquivo.filename:
+        return jsonify({
+            "success": False,
+            "message": "Requisição inválida",
+            "error": "Envie o arquivo no campo multipart 'arquivo'"
+        }), 400
+
+    formato = request.form.get('formato') or request.args.get('formato') or formato_pelo_nome(arquivo.filename)
+    if formato not in LEITORES:
+        return jsonify({
+            "success": False,
+            "message": "Requisição inválida",
+            "error": f"Formato não suportado. Use: {', '.join(LEITORES)}"
+        }), 400
+
+    unicidade = get_unicidade()
+    try:
+        # O upload multipart já fica em arquivo temporário (não em memória) e é lido em streaming
+        resultado = importar_clientes(
+            db.session,
+            LEITORES[formato](arquivo.stream),
+            tamanho_bloco=current_app.config.get('CLIENTES_IMPORT_CHUNK_SIZE', 5000),
+            ao_importar=lambda dados: unicidade.adicionar(cpf=dados["cpf"], email=dados["email"])
+        )
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "message": "Erro ao importar clientes",
+            "error": str(e)
+        }), 500
+
+    return jsonify({
+        "success": True,
+        "message": "Importação concluída",
+        "data": resultado.to_dict()
+    }), 200
+
+
+@cliente_bp.route("/by-cpf/<string:cpf>", methods=["PUT"]) # PUT - Criar ou atualizar cliente pelo CPF (upsert)
+def upsert_cliente_por_cpf(cpf: str):
+    data = request.get_json(silent=True)
+
+    if not data or not isinstance(data, dict):
+        return jsonify({
+            "success": False,
+            "message": "Requisição inválida",
+            "error": "Requisição precisa conter dados JSON"
+        }), 400
+
+    if data.get("cpf") not in (None, cpf):
+        return jsonify({
+            "success": False,
+            "message": "Dados inválidos",
+            "error": "O CPF do corpo da requisição difere do CPF da URL"
+        }), 400
+
+    try:
+        dados = ClienteCreate(**{**data, "cpf": cpf}).model_dump()
+    except ValidationError as e:
+        return jsonify({
+            "success": False,
+            "message": "Dados inválidos",
+            "errors": e.errors(include_url=False, include_context=False)
+        }), 400
+
+    faltando = [coluna for coluna in lote.COLUNAS_OBRIGATORIAS if dados.get(coluna) is None]
+    if faltando:
+        return jsonify({
+            "success": False,
+            "message": "Dados inválidos",
+            "error": f"Campos obrigatórios ausentes: {', '.join(faltando)}"
+        }), 400
+
+    try:
+        cliente = upsert_por_cpf(db.session, dados)
+        incrementar_versao(db.session)
+        db.session.commit()
+    except IntegrityError as e:
+        db.session.rollback()
+        return resposta_integridade(e)
+    except NotImplementedError as e:
+        db.session.rollback()
+        return jsonify({
+            "success": False,
+            "message": "Operação não suportada",
+            "error": str(e)
+        }), 501
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            "success": False,
+            "message": "Erro ao salvar cliente",
+            "error": str(e)
+        }), 500
+
+    get_cache().delete(cliente["id"])
+    get_unicidade().adicionar(cpf=cliente["cpf"], email=cliente["email"])
+    return jsonify({
+        "success": True,
+        "message": "Cliente salvo com sucesso",
+        "data": cliente
+    }), 200
+
+
 @cliente_bp.route("/<int:id>", methods=["PUT"]) # PUT - Atualizar cliente por ID (Extra)
 def atualizar_cliente(id: int):
 
@@ -137,6 +700,10 @@ def atualizar_cliente(id: int):
             "message": "Cliente não encontrado",
             "error": f"Nenhum cliente encontrado com o ID {id}" 
         }), 404
+
+    etag_atual = etag_conteudo(cliente_para_dict(cliente_db))
+    if precondicao_falhou(request, etag_atual):
+        return resposta_412(etag_atual)
     
     data = request.get_json()
 
@@ -156,12 +723,16 @@ def atualizar_cliente(id: int):
             "errors": e.errors()
         }), 400
     
+    unicidade = get_unicidade()
+    unicidade.garantir_construido(current_app._get_current_object())
     try:
-        if cliente_update.email is not None and cliente_update.email != cliente_db.email:
+        if (cliente_update.email is not None and cliente_update.email != cliente_db.email
+                and unicidade.talvez_exista(email=cliente_update.email)):
             email_existente = ClienteDB.query.filter(
                 ClienteDB.email == cliente_update.email, 
                 ClienteDB.id != cliente_db.id
             ).first() 
+            unicidade.registrar_consulta(email_existente is not None)
 
             if email_existente:
                 return jsonify({
@@ -170,11 +741,13 @@ def atualizar_cliente(id: int):
                     "error": f"O email '{cliente_update.email}' já está cadastrado"
                 }), 409
         
-        if cliente_update.cpf is not None and cliente_update.cpf != cliente_db.cpf:
+        if (cliente_update.cpf is not None and cliente_update.cpf != cliente_db.cpf
+                and unicidade.talvez_exista(cpf=cliente_update.cpf)):
             cpf_existente = ClienteDB.query.filter(
                 ClienteDB.cpf == cliente_update.cpf, 
                 ClienteDB.id != cliente_db.id
             ).first()
+            unicidade.registrar_consulta(cpf_existente is not None)
 
             if cpf_existente:
                 return jsonify({
@@ -185,24 +758,92 @@ def atualizar_cliente(id: int):
 
         for key, value in cliente_update.model_dump(exclude_unset=True).items():
             setattr(cliente_db, key, value)
-            
+
+        incrementar_versao(db.session)
         db.session.commit()
-        
+        unicidade.adicionar(cpf=cliente_db.cpf, email=cliente_db.email)
+
+        cliente_atualizado = cliente_para_dict(cliente_db)
+        get_cache().delete(id)
+
         return jsonify({
             "success": True,
             "message": "Cliente atualizado com sucesso",
-            "data": ClienteSchema.model_validate(cliente_db).model_dump()
-        }), 200
-        
+            "data": cliente_atualizado
+        }), 200, {"ETag": f'"{etag_conteudo(cliente_atualizado)}"'}
+
+    except IntegrityError as e:
+        db.session.rollback()
+        return resposta_integridade(e)
+    except StaleDataError:
+        db.session.rollback()
+        return resposta_412()
     except Exception as e:
         db.session.rollback()
-        print(f"Erro ao atualizar cliente: {e}") 
+        current_app.logger.exception("Erro ao atualizar cliente %s", id)
         return jsonify({ 
             "success": False,
             "message": "Erro ao atualizar cliente", # Mensagem mais específica
             "error": str(e)
         }), 500
 
+@cliente_bp.route("/<int:id>", methods=["PATCH"]) # PATCH - Atualizar parcialmente cliente por ID
+def atualizar_cliente_parcial(id: int):
+    data = request.get_json(silent=True)
+    try:
+        alteracoes = lote.ler_alteracoes(data)
+    except ValidationError as e:
+        return jsonify({
+            "success": False,
+            "message": "Dados inválidos. Verifique os campos enviados.",
+            "errors": e.errors(include_url=False, include_context=False)
+        }), 400
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "message": "Requisição inválida",
+            "error": str(e)
+        }), 400
+
+    cliente_db = db.session.get(ClienteDB, id)
+    if cliente_db is None:
+        return jsonify({
+            "success": False,
+            "message": "Cliente não encontrado",
+            "error": f"Nenhum cliente encontrado com o ID {id}"
+        }), 404
+
+    cliente = cliente_para_dict(cliente_db)
+    if precondicao_falhou(request, etag_conteudo(cliente)):
+        return resposta_412(etag_conteudo(cliente))
+
+    # Só os campos que mudam entram no UPDATE; CPF/email inalterados não são
+    # verificados de novo, e os alterados são validados pela restrição única.
+    alteracoes = {campo: valor for campo, valor in alteracoes.items() if cliente[campo] != valor}
+    if alteracoes:
+        for campo, valor in alteracoes.items():
+            setattr(cliente_db, campo, valor)
+        try:
+            incrementar_versao(db.session)
+            db.session.commit()
+        except IntegrityError as e:
+            db.session.rollback()
+            return resposta_integridade(e)
+        except StaleDataError:
+            # Outra requisição gravou depois da nossa leitura: o UPDATE ... WHERE versao = n não casou
+            db.session.rollback()
+            return resposta_412()
+        cliente = cliente_para_dict(cliente_db)
+        get_cache().delete(id)
+        get_unicidade().adicionar(cpf=alteracoes.get("cpf"), email=alteracoes.get("email"))
+
+    return jsonify({
+        "success": True,
+        "message": "Cliente atualizado com sucesso" if alteracoes else "Nenhum campo alterado",
+        "data": cliente
+    }), 200, {"ETag": f'"{etag_conteudo(cliente)}"'}
+
+
 @cliente_bp.route("/<int:id>", methods=["DELETE"]) # DELETE - Deletar cliente por ID (Extra)
 def deletar_cliente(id: int):
 
@@ -214,15 +855,23 @@ def deletar_cliente(id: int):
             "message": "Cliente não encontrado",
             "error": f"Nenhum cliente encontrado com o ID informado"
         }), 404
+
+    cliente_deletado = cliente_para_dict(cliente)
+    if precondicao_falhou(request, etag_conteudo(cliente_deletado)):
+        return resposta_412(etag_conteudo(cliente_deletado))
     try:
-        cliente_deletado = ClienteSchema.model_validate(cliente).model_dump()
         db.session.delete(cliente)
+        incrementar_versao(db.session)
         db.session.commit()
+        get_cache().delete(id)
         return jsonify({
             "success": True,
             "message": "Cliente deletado com sucesso",
             "data": cliente_deletado
         }), 200
+    except StaleDataError:
+        db.session.rollback()
+        return resposta_412()
     except Exception as e:
         db.session.rollback()
         return jsonify({
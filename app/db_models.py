@@ -1,8 +1,17 @@
+import sqlalchemy as sa
+
 from . import db
 
+def _fora_do_postgresql(ddl, target, bind, dialect, **kw):
+    return dialect.name != 'postgresql'
+
 class ClienteDB(db.Model):
 
     __tablename__ = 'clientes'
+    # No PostgreSQL a tabela é particionada por hash do cpf (migração c6f08b2d94e1):
+    # a chave primária no banco é (id, cpf) e o email é único por gatilho. Para o
+    # ORM nada muda; id continua único, vindo da sequence clientes_id_seq. Mas a
+    # busca só por id (session.get, PUT/PATCH/DELETE por id) consulta as 8 partições.
 
     id = db.Column(db.Integer, primary_key=True)
     cpf = db.Column(db.String(14), unique=True, nullable=False)
@@ -15,6 +24,66 @@ class ClienteDB(db.Model):
     cartao_credito = db.Column(db.String(20), nullable=True)
     bandeira_cartao_credito = db.Column(db.String(20), nullable=True)
     cartao_debito = db.Column(db.String(19), nullable=False)
+    # Controle de concorrência otimista: todo UPDATE/DELETE do ORM inclui
+    # "WHERE versao = <versão lida>" e incrementa a coluna
+    versao = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+
+    __mapper_args__ = {"version_id_col": versao}
+
+    # Os mesmos índices das migrações 3e24e2a4a244 e b52e7c1d0f3a, para que
+    # db.create_all() os crie e o autogenerate não proponha removê-los. No
+    # PostgreSQL a busca por nome usa o índice GIN de trigramas da migração
+    # (ix_clientes_nome_trgm, que depende de f_unaccent) no lugar de ix_clientes_nome.
+    __table_args__ = (
+        db.Index('ix_clientes_nome', 'nome').ddl_if(callable_=_fora_do_postgresql),
+        db.Index('ix_clientes_agencia_id', 'agencia', 'id'),
+        db.Index('ix_clientes_tipo_conta_id', 'tipo_conta', 'id'),
+        db.Index('ix_clientes_bandeira_id', sa.text("coalesce(bandeira_cartao_credito, '')"), 'id'),
+    )
+
+    def __repr__(self):
+        return f'<Cliente {self.nome}>'
+
+class TabelaVersaoDB(db.Model):
+
+    __tablename__ = 'tabela_versoes'
+
+    tabela = db.Column(db.String(50), primary_key=True)
+    versao = db.Column(db.BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<TabelaVersao {self.tabela}={self.versao}>'
+
+class ClienteResumoDB(db.Model):
+
+    __tablename__ = 'clientes_resumo'
+
+    # Contagem de clientes por grupo, mantida por gatilhos (ver app/service/estatisticas.py);
+    # clientes sem cartão de crédito ficam com bandeira ''
+    agencia = db.Column(db.String(10), primary_key=True)
+    tipo_conta = db.Column(db.String(19), primary_key=True)
+    bandeira = db.Column(db.String(20), primary_key=True)
+    total = db.Column(db.BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<ClienteResumo {self.agencia}/{self.tipo_conta}/{self.bandeira}={self.total}>'
+
+class ClienteAlteracaoDB(db.Model):
+
+    __tablename__ = 'clientes_alteracoes'
+
+    # Changelog de clientes (GET /clientes/changes), gravado por gatilhos na mesma
+    # transação da escrita (ver app/service/alteracoes.py). O id segue a ordem de
+    # gravação; o seq, que o feed expõe, segue a ordem de commit. No PostgreSQL ele
+    # só é dado quando a transação termina (alteracoes.publicar), e a tabela tem
+    # também a coluna xid, criada fora do modelo.
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    seq = db.Column(db.BigInteger, unique=True)
+    cliente_id = db.Column(db.Integer, nullable=False)
+    operacao = db.Column(db.String(6), nullable=False) # insert, update ou delete
+    criado_em = db.Column(db.DateTime(timezone=True), nullable=False, server_default=db.func.now())
+
+    __table_args__ = (db.Index('ix_clientes_alteracoes_cliente', 'cliente_id', 'id'),)
 
     def __repr__(self):
-        return f'<Cliente {self.nome}>'
\ No newline at end of file
+        return f'<ClienteAlteracao {self.seq} {self.operacao} {self.cliente_id}>'
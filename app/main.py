@@ -1,9 +1,6 @@
-from flask import Flask
-from app.cliente_routes import cliente_bp
+from app import create_app
 
-app = Flask(__name__)
-
-app.register_blueprint(cliente_bp)
+app = create_app()
 
 if __name__ == "__main__":
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    app.run(debug=True, host='0.0.0.0', port=5000)
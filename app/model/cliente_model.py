@@ -37,6 +37,7 @@ class Cliente(BaseModel):
     cartao_debito: str = None
     cartao_credito: Optional[str] = None
     bandeira_cartao_credito: Optional[str] = None
+    versao: Optional[int] = None
     
     model_config = ConfigDict(from_attributes=True)
 
@@ -55,4 +56,19 @@ class ClienteUpdate(BaseModel):
     cartao_credito: Optional[str] = None
     bandeira_cartao_credito: Optional[str] = None
 
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+class ClienteParcial(BaseModel):
+    """Atualização parcial: só os campos enviados são alterados."""
+    cpf: Optional[constr(strip_whitespace=True, min_length=1)] = None
+    nome: Optional[constr(strip_whitespace=True, min_length=1)] = None
+    email: Optional[EmailStr] = None
+    telefone: Optional[str] = None
+    agencia: Optional[str] = None
+    conta: Optional[str] = None
+    tipo_conta: Optional[str] = None
+    cartao_debito: Optional[str] = None
+    cartao_credito: Optional[str] = None
+    bandeira_cartao_credito: Optional[str] = None
+
+    model_config = ConfigDict(extra="forbid")
@@ -0,0 +1,254 @@
+import threading
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Optional
+
+from sqlalchemy import delete, exists, func, insert, select, text, update
+from sqlalchemy.orm import aliased
+
+from app.db_models import ClienteAlteracaoDB, ClienteDB, TabelaVersaoDB
+from app.service.replicas import usar_primario
+from app.service.serializacao import COLUNAS_CLIENTE, linhas_para_dicts
+from app.service.versao import versao_tabela
+
+# Linhas de tabela_versoes usadas pelo feed: o último seq emitido e o maior seq já podado
+CONTADOR = "clientes_alteracoes"
+PODADAS = "clientes_alteracoes_podadas"
+OPERACAO_REMOCAO = "delete"
+EXTENSAO = "alteracoes_espera"
+
+# SQLite: gatilhos por linha. As escritas no SQLite já são serializadas pelo
+# lock do banco, então a ordem dos seqs é a ordem de commit.
+_REGISTRAR_SQLITE = """
+    INSERT INTO tabela_versoes (tabela, versao) VALUES ('clientes_alteracoes', 1)
+    ON CONFLICT (tabela) DO UPDATE SET versao = versao + 1;
+    INSERT INTO clientes_alteracoes (seq, cliente_id, operacao)
+    SELECT versao, {linha}.id, '{operacao}' FROM tabela_versoes WHERE tabela = 'clientes_alteracoes';
+"""
+GATILHOS_SQLITE = [
+    f"CREATE TRIGGER clientes_alteracoes_{operacao} AFTER {operacao.upper()} ON clientes "
+    f"BEGIN {_REGISTRAR_SQLITE.format(linha=linha, operacao=operacao)} END"
+    for operacao, linha in (("insert", "NEW"), ("update", "NEW"), ("delete", "OLD"))
+]
+
+# PostgreSQL: gatilhos por comando com tabelas de transição. Os gatilhos só
+# anexam as entradas, com id de uma sequence e o xid da transação, sem seq: um
+# contador travado até o commit faria as transações que escrevem em clientes
+# terminarem uma de cada vez. O seq é dado depois, por `publicar`.
+ESTRUTURA_POSTGRESQL = [
+    "ALTER TABLE clientes_alteracoes ADD COLUMN xid xid8 NOT NULL DEFAULT pg_current_xact_id()",
+    "CREATE INDEX ix_clientes_alteracoes_pendentes ON clientes_alteracoes (id) WHERE seq IS NULL",
+]
+GATILHOS_POSTGRESQL = [
+    """
+    CREATE OR REPLACE FUNCTION clientes_alteracoes_registrar() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            INSERT INTO clientes_alteracoes (cliente_id, operacao)
+            SELECT id, 'delete' FROM antigas ORDER BY id;
+        ELSE
+            INSERT INTO clientes_alteracoes (cliente_id, operacao)
+            SELECT id, lower(TG_OP) FROM novas ORDER BY id;
+        END IF;
+        RETURN NULL;
+    END
+    $$
+    """,
+    "CREATE TRIGGER clientes_alteracoes_insert AFTER INSERT ON clientes REFERENCING NEW TABLE AS novas "
+    "FOR EACH STATEMENT EXECUTE FUNCTION clientes_alteracoes_registrar()",
+    "CREATE TRIGGER clientes_alteracoes_update AFTER UPDATE ON clientes REFERENCING NEW TABLE AS novas "
+    "FOR EACH STATEMENT EXECUTE FUNCTION clientes_alteracoes_registrar()",
+    "CREATE TRIGGER clientes_alteracoes_delete AFTER DELETE ON clientes REFERENCING OLD TABLE AS antigas "
+    "FOR EACH STATEMENT EXECUTE FUNCTION clientes_alteracoes_registrar()",
+]
+
+# Entradas anteriores à marca d'água: todas as transações com xid menor que o
+# xmin do snapshot já terminaram, então nenhuma entrada nova aparece abaixo dela
+_PENDENTES = "seq IS NULL AND xid < pg_snapshot_xmin(pg_current_snapshot())"
+_HA_PENDENTES = text(f"SELECT EXISTS (SELECT 1 FROM clientes_alteracoes WHERE {_PENDENTES})")
+_TRAVAR_CONTADOR = text(
+    "INSERT INTO tabela_versoes AS t (tabela, versao) VALUES (:tabela, 0) "
+    "ON CONFLICT (tabela) DO UPDATE SET versao = t.versao RETURNING versao"
+)
+_NUMERAR = text(
+    "UPDATE clientes_alteracoes AS a SET seq = :ultimo + p.n "
+    f"FROM (SELECT id, row_number() OVER (ORDER BY id) AS n FROM clientes_alteracoes WHERE {_PENDENTES}) AS p "
+    "WHERE a.id = p.id RETURNING a.seq"
+)
+
+GATILHOS = {"sqlite": GATILHOS_SQLITE, "postgresql": ESTRUTURA_POSTGRESQL + GATILHOS_POSTGRESQL}
+
+
+@dataclass
+class ParametrosAlteracoes:
+    desde: Optional[int]
+    limite: int
+    espera: int
+
+
+def _inteiro(args, nome, padrao, minimo, maximo):
+    try:
+        valor = int(args.get(nome, padrao))
+    except ValueError:
+        raise ValueError(f"O parâmetro '{nome}' deve ser um número inteiro")
+    if valor < minimo or valor > maximo:
+        raise ValueError(f"O parâmetro '{nome}' deve estar entre {minimo} e {maximo}")
+    return valor
+
+
+def ler_parametros(args, config) -> ParametrosAlteracoes:
+    """Lê `since`, `limit` e `wait` de GET /clientes/changes. Levanta ValueError se algum for inválido."""
+    desde = args.get("since")
+    return ParametrosAlteracoes(
+        desde=_inteiro(args, "since", 0, 0, 2 ** 63 - 1) if desde is not None else None,
+        limite=_inteiro(
+            args, "limit", config.get("CLIENTES_PAGE_SIZE", 100), 1, config.get("CLIENTES_MAX_PAGE_SIZE", 1000)
+        ),
+        espera=_inteiro(args, "wait", 0, 0, config.get("CHANGES_MAX_WAIT_SECONDS", 30)),
+    )
+
+
+def publicar(session):
+    """Dá seq às entradas de transações já terminadas (PostgreSQL) e faz commit.
+
+    As entradas chegam sem seq; antes de ler, quem consulta o feed numera, em
+    ordem de id, as que estão abaixo da marca d'água. Como nenhuma entrada nova
+    aparece abaixo dela, todo seq dado depois é maior, e quem leu até 42 nunca
+    perde um 41. O contador fica travado só entre leitores, e só quando há
+    entradas a numerar. No SQLite os gatilhos já gravam o seq.
+    """
+    if session.get_bind().dialect.name != "postgresql":
+        return
+    # Numerar é escrita, e a marca d'água só vale no snapshot do primário
+    usar_primario(session)
+    if not session.execute(_HA_PENDENTES).scalar():
+        session.rollback()
+        return
+    ultimo = session.execute(_TRAVAR_CONTADOR, {"tabela": CONTADOR}).scalar()
+    numerados = session.execute(_NUMERAR, {"ultimo": ultimo}).scalars().all()
+    if numerados:
+        session.execute(
+            update(TabelaVersaoDB).where(TabelaVersaoDB.tabela == CONTADOR).values(versao=max(numerados))
+        )
+    session.commit()
+
+
+def posicao_atual(session) -> int:
+    """Último seq emitido: o `since` de quem acabou de copiar a tabela inteira."""
+    publicar(session)
+    return versao_tabela(session, CONTADOR)
+
+
+def expirado(session, desde: int) -> bool:
+    """True se entradas posteriores a `desde` já foram podadas: o consumidor precisa ressincronizar."""
+    return desde < versao_tabela(session, PODADAS)
+
+
+def ler(session, desde: int, limite: int):
+    """Retorna `(entradas, has_more)` com até `limite` alterações de seq maior que `desde`.
+
+    Cada entrada traz o estado atual do cliente (None se ele foi removido
+    depois), lido por chave primária só para os ids da página.
+    """
+    publicar(session)
+    linhas = session.execute(
+        select(ClienteAlteracaoDB.seq, ClienteAlteracaoDB.cliente_id, ClienteAlteracaoDB.operacao)
+        .where(ClienteAlteracaoDB.seq > desde)
+        .order_by(ClienteAlteracaoDB.seq)
+        .limit(limite + 1)
+    ).all()
+    mais = len(linhas) > limite
+    linhas = linhas[:limite]
+
+    ids = {linha.cliente_id for linha in linhas if linha.operacao != OPERACAO_REMOCAO}
+    clientes = {}
+    if ids:
+        atuais = session.execute(select(*COLUNAS_CLIENTE).where(ClienteDB.id.in_(ids))).all()
+        clientes = {cliente["id"]: cliente for cliente in linhas_para_dicts(atuais)}
+
+    entradas = [
+        {
+            "seq": linha.seq,
+            "id": linha.cliente_id,
+            "op": linha.operacao,
+            "cliente": clientes.get(linha.cliente_id) if linha.operacao != OPERACAO_REMOCAO else None,
+        }
+        for linha in linhas
+    ]
+    return entradas, mais
+
+
+def aguardar(session, desde: int, limite: int, espera: float, intervalo: float = 0.5):
+    """Como `ler`, mas espera até `espera` segundos por alterações (long-poll).
+
+    Cada tentativa é uma consulta pelo índice de seq; entre elas a transação
+    de leitura é encerrada, para enxergar os novos commits e, no SQLite, não
+    segurar o lock que bloquearia as escritas.
+    """
+    prazo = time.monotonic() + espera
+    while True:
+        entradas, mais = ler(session, desde, limite)
+        if entradas or time.monotonic() >= prazo:
+            return entradas, mais
+        session.rollback()
+        time.sleep(min(intervalo, max(prazo - time.monotonic(), 0)))
+
+
+def instalar_alteracoes(app):
+    """Limita quantas requisições do processo podem esperar no long-poll ao mesmo tempo.
+
+    Cada espera prende uma thread do worker (`time.sleep`); sem o limite, poucos
+    consumidores parados em `wait` tirariam o worker de circulação.
+    """
+    app.extensions[EXTENSAO] = threading.BoundedSemaphore(app.config.get("CHANGES_MAX_WAITERS", 1))
+
+
+def reservar_espera(app) -> bool:
+    """Tenta ocupar uma vaga de long-poll sem bloquear; quem recebe True chama `liberar_espera`."""
+    return app.extensions[EXTENSAO].acquire(blocking=False)
+
+
+def liberar_espera(app):
+    app.extensions[EXTENSAO].release()
+
+
+def _registrar_poda(session, seq: int):
+    resultado = session.execute(
+        update(TabelaVersaoDB)
+        .where(TabelaVersaoDB.tabela == PODADAS, TabelaVersaoDB.versao < seq)
+        .values(versao=seq)
+    )
+    if resultado.rowcount == 0 and versao_tabela(session, PODADAS) == 0:
+        session.execute(insert(TabelaVersaoDB).values(tabela=PODADAS, versao=seq))
+
+
+def compactar(session, dialeto: str, reter_dias: Optional[int] = None) -> dict:
+    """Compacta o changelog e retorna quantas entradas saíram.
+
+    Sempre remove as entradas de um cliente que têm outra mais nova (quem ler o
+    feed chega à mais nova, com o estado atual, então nenhum `since` deixa de
+    valer). Com `reter_dias`, remove também tudo o que é mais antigo que isso
+    e registra o seq podado: `since` anteriores passam a receber 410.
+    """
+    posterior = aliased(ClienteAlteracaoDB)
+    substituidas = session.execute(delete(ClienteAlteracaoDB).where(exists().where(
+        posterior.cliente_id == ClienteAlteracaoDB.cliente_id, posterior.id > ClienteAlteracaoDB.id
+    ))).rowcount
+
+    podadas = 0
+    if reter_dias is not None:
+        if dialeto == "postgresql":
+            limite = func.now() - timedelta(days=reter_dias)
+        else:
+            limite = func.datetime("now", f"-{int(reter_dias)} days")
+        corte = session.execute(
+            select(func.max(ClienteAlteracaoDB.seq)).where(ClienteAlteracaoDB.criado_em < limite)
+        ).scalar()
+        if corte is not None:
+            podadas = session.execute(delete(ClienteAlteracaoDB).where(ClienteAlteracaoDB.seq <= corte)).rowcount
+            _registrar_poda(session, corte)
+
+    session.commit()
+    return {"substituidas": substituidas, "podadas": podadas}
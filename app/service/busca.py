@@ -0,0 +1,61 @@
+import unicodedata
+
+from sqlalchemy import case, event, func
+
+from app.db_models import ClienteDB
+
+
+def remover_acentos(texto):
+    if texto is None:
+        return None
+    decomposto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in decomposto if not unicodedata.combining(c))
+
+
+def normalizar_termo(texto: str) -> str:
+    return remover_acentos(texto).lower()
+
+
+def _escapar_like(texto: str) -> str:
+    return texto.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def nome_normalizado():
+    # Mesma expressão do índice GIN (pg_trgm) criado na migração; usar outra
+    # forma aqui faria o PostgreSQL voltar ao seq scan.
+    return func.lower(func.f_unaccent(ClienteDB.nome))
+
+
+def registrar_funcoes_sqlite(engine):
+    """Registra `f_unaccent` nas conexões SQLite, espelhando a função criada na migração do PostgreSQL."""
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _registrar(dbapi_connection, connection_record):
+        dbapi_connection.create_function("f_unaccent", 1, remover_acentos, deterministic=True)
+
+
+def filtrar_por_nome(query, termo: str, dialeto: str):
+    """Aplica a busca por nome (sem acento e sem diferenciar maiúsculas) ordenada por relevância.
+
+    Ordem: nome idêntico, nome começando pelo termo, alguma palavra começando
+    pelo termo e, por fim, termo em qualquer posição. No PostgreSQL empates são
+    desfeitos pela similaridade de trigramas.
+    """
+    termo_normalizado = normalizar_termo(termo)
+    termo_escapado = _escapar_like(termo_normalizado)
+    coluna = nome_normalizado()
+
+    relevancia = case(
+        (coluna == termo_normalizado, 0),
+        (coluna.like(f"{termo_escapado}%", escape="\\"), 1),
+        (coluna.like(f"% {termo_escapado}%", escape="\\"), 2),
+        else_=3,
+    )
+    ordem = [relevancia]
+    if dialeto == "postgresql":
+        ordem.append(func.similarity(coluna, termo_normalizado).desc())
+    ordem.append(ClienteDB.id)
+
+    return query.filter(coluna.like(f"%{termo_escapado}%", escape="\\")).order_by(*ordem)
@@ -0,0 +1,230 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+
+EXTENSAO = "cliente_cache"
+
+
+class _Contadores:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def registrar(self, acerto: bool):
+        with self._lock:
+            if acerto:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def to_dict(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+class NullCache:
+    """Backend usado quando o cache está desligado (CACHE_BACKEND=none)."""
+
+    backend = "none"
+
+    def __init__(self):
+        self.contadores = _Contadores()
+
+    def get(self, chave):
+        self.contadores.registrar(False)
+        return None
+
+    def set(self, chave, valor):
+        pass
+
+    def geracao(self, chave):
+        """Geração atual de `chave`: lida antes de buscar a linha no banco e passada a `preencher`."""
+        return None
+
+    def preencher(self, chave, valor, geracao) -> bool:
+        """Grava o valor lido do banco só se `chave` não foi invalidada desde `geracao`."""
+        return False
+
+    def delete(self, *chaves):
+        pass
+
+    def clear(self):
+        pass
+
+    def stats(self):
+        return {"backend": self.backend, **self.contadores.to_dict()}
+
+
+class LRUCache(NullCache):
+    """Cache em memória do processo, limitado a `maxsize` entradas e com expiração por `ttl` segundos.
+
+    Cada processo tem o seu: a escrita só invalida a entrada do worker que a
+    atendeu. Com vários workers, os outros podem servir o cliente antigo por até
+    `ttl` segundos; nesse caso use o backend `redis`.
+    """
+
+    backend = "memory"
+
+    def __init__(self, maxsize=10000, ttl=60):
+        super().__init__()
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._dados = OrderedDict()
+        self._lock = threading.Lock()
+        # Geração da última invalidação de cada chave, limitada a `maxsize` chaves.
+        # Quem sai do limite eleva `_descartadas_ate`, e leituras anteriores a ela
+        # deixam de preencher qualquer chave sem registro (na dúvida, não grava).
+        self._geracao_atual = 0
+        self._invalidacoes = OrderedDict()
+        self._descartadas_ate = 0
+
+    def get(self, chave):
+        agora = time.monotonic()
+        with self._lock:
+            item = self._dados.get(chave)
+            if item is not None and item[0] <= agora:
+                del self._dados[chave]
+                item = None
+            if item is not None:
+                self._dados.move_to_end(chave)
+        self.contadores.registrar(item is not None)
+        return item[1] if item is not None else None
+
+    def set(self, chave, valor):
+        with self._lock:
+            self._gravar(chave, valor)
+
+    def _gravar(self, chave, valor):
+        self._dados[chave] = (time.monotonic() + self.ttl, valor)
+        self._dados.move_to_end(chave)
+        while len(self._dados) > self.maxsize:
+            self._dados.popitem(last=False)
+
+    def geracao(self, chave):
+        with self._lock:
+            return self._geracao_atual
+
+    def preencher(self, chave, valor, geracao) -> bool:
+        with self._lock:
+            invalidada_em = self._invalidacoes.get(chave, self._descartadas_ate)
+            if invalidada_em > geracao:
+                return False
+            self._gravar(chave, valor)
+            return True
+
+    def delete(self, *chaves):
+        with self._lock:
+            self._geracao_atual += 1
+            for chave in chaves:
+                self._dados.pop(chave, None)
+                self._invalidacoes[chave] = self._geracao_atual
+                self._invalidacoes.move_to_end(chave)
+            while len(self._invalidacoes) > self.maxsize:
+                _, descartada = self._invalidacoes.popitem(last=False)
+                self._descartadas_ate = descartada
+
+    def clear(self):
+        with self._lock:
+            self._dados.clear()
+            # Leituras em andamento não podem repor o que foi limpo
+            self._geracao_atual += 1
+            self._invalidacoes.clear()
+            self._descartadas_ate = self._geracao_atual
+
+    def stats(self):
+        return {**super().stats(), "size": len(self._dados), "maxsize": self.maxsize, "ttl": self.ttl}
+
+
+# Grava a linha só se a geração da chave ainda é a lida antes da consulta ao banco
+SCRIPT_PREENCHER = """
+if (redis.call('GET', KEYS[1]) or '0') == ARGV[1] then
+    redis.call('SET', KEYS[2], ARGV[2], 'EX', ARGV[3])
+    return 1
+end
+return 0
+"""
+# Bem maior que qualquer leitura em andamento, que é o único uso da geração
+EXPIRACAO_GERACAO = 3600
+
+
+class RedisCache(NullCache):
+    """Cache compartilhado entre processos em um servidor compatível com Redis.
+
+    `cliente` precisa oferecer `get`, `set(..., ex=)`, `delete`, `incr`,
+    `expire` e `eval`, como `redis.Redis`; nos testes um fake local ocupa o
+    lugar dele.
+    """
+
+    backend = "redis"
+
+    def __init__(self, cliente, ttl=60, prefixo="clientes:"):
+        super().__init__()
+        self.cliente = cliente
+        self.ttl = ttl
+        self.prefixo = prefixo
+
+    def get(self, chave):
+        bruto = self.cliente.get(self.prefixo + str(chave))
+        self.contadores.registrar(bruto is not None)
+        return json.loads(bruto) if bruto is not None else None
+
+    def set(self, chave, valor):
+        self.cliente.set(self.prefixo + str(chave), json.dumps(valor), ex=self.ttl)
+
+    def _chave_geracao(self, chave):
+        return f"{self.prefixo}geracao:{chave}"
+
+    def geracao(self, chave):
+        bruto = self.cliente.get(self._chave_geracao(chave))
+        return int(bruto) if bruto is not None else 0
+
+    def preencher(self, chave, valor, geracao) -> bool:
+        gravado = self.cliente.eval(
+            SCRIPT_PREENCHER, 2, self._chave_geracao(chave), self.prefixo + str(chave),
+            str(geracao), json.dumps(valor), self.ttl
+        )
+        return bool(gravado)
+
+    def delete(self, *chaves):
+        # A geração sobe antes de a entrada sair: uma leitura que começou antes
+        # desta escrita não consegue mais preencher a chave com a linha antiga
+        for chave in chaves:
+            self.cliente.incr(self._chave_geracao(chave))
+            self.cliente.expire(self._chave_geracao(chave), EXPIRACAO_GERACAO)
+        if chaves:
+            self.cliente.delete(*[self.prefixo + str(chave) for chave in chaves])
+
+    def clear(self):
+        # Apaga só as chaves deste prefixo, sem afetar outros usuários do servidor
+        chaves = list(self.cliente.scan_iter(match=self.prefixo + "*"))
+        if chaves:
+            self.cliente.delete(*chaves)
+
+    def stats(self):
+        return {**super().stats(), "ttl": self.ttl}
+
+
+def criar_cache(config):
+    backend = config.get("CACHE_BACKEND", "memory")
+    ttl = config.get("CACHE_TTL", 60)
+    if backend == "none":
+        return NullCache()
+    if backend == "memory":
+        return LRUCache(maxsize=config.get("CACHE_MAXSIZE", 10000), ttl=ttl)
+    if backend == "redis":
+        import redis  # dependência opcional, só necessária com CACHE_BACKEND=redis
+
+        return RedisCache(redis.Redis.from_url(config["CACHE_REDIS_URL"]), ttl=ttl)
+    raise ValueError(f"CACHE_BACKEND desconhecido: {backend}")
+
+
+def get_cache():
+    return current_app.extensions[EXTENSAO]
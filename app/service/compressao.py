@@ -0,0 +1,164 @@
+import zlib
+from typing import Optional
+
+from flask import request
+
+from app.service.versao import etag_codificada, etag_sem_codificacao
+
+try:
+    import brotli
+except ImportError:  # dependência opcional: sem ela só gzip/zstd são oferecidos
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # dependência opcional: sem ela só gzip/br são oferecidos
+    zstandard = None
+
+# Tipos que valem a pena comprimir; imagens e arquivos já comprimidos ficam de fora
+TIPOS_COMPRIMIVEIS = (
+    "application/json", "application/x-ndjson", "application/javascript", "application/xml", "image/svg+xml",
+)
+
+
+# Cada fábrica devolve (comprimir, descarregar, finalizar). Descarregar fecha um
+# bloco e devolve tudo o que o compressor segurava, sem encerrar o stream.
+def _gzip(nivel):
+    compressor = zlib.compressobj(nivel, zlib.DEFLATED, 31)  # 31: cabeçalho e rodapé gzip
+    return compressor.compress, lambda: compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush
+
+
+def _brotli(nivel):
+    compressor = brotli.Compressor(quality=nivel)
+    return compressor.process, compressor.flush, compressor.finish
+
+
+def _zstd(nivel):
+    compressor = zstandard.ZstdCompressor(level=nivel).compressobj()
+    return compressor.compress, lambda: compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK), compressor.flush
+
+
+# Codificação -> (fábrica do compressor, chave de configuração do nível, nível padrão)
+CODIFICACOES = {"gzip": (_gzip, "COMPRESSION_GZIP_LEVEL", 6)}
+if brotli is not None:
+    CODIFICACOES["br"] = (_brotli, "COMPRESSION_BROTLI_LEVEL", 4)
+if zstandard is not None:
+    CODIFICACOES["zstd"] = (_zstd, "COMPRESSION_ZSTD_LEVEL", 3)
+
+
+def ler_accept_encoding(cabecalho: str) -> dict:
+    """Converte "gzip;q=0.8, br" em {"gzip": 0.8, "br": 1.0}; qualidades inválidas contam como 0."""
+    qualidades = {}
+    for parte in (cabecalho or "").split(","):
+        nome, *parametros = [item.strip() for item in parte.split(";")]
+        if not nome:
+            continue
+        qualidade = 1.0
+        for parametro in parametros:
+            chave, _, valor = parametro.partition("=")
+            if chave.strip().lower() == "q":
+                try:
+                    qualidade = float(valor)
+                except ValueError:
+                    qualidade = 0.0
+        qualidades[nome.lower()] = qualidade
+    return qualidades
+
+
+def escolher_codificacao(cabecalho: str, preferencia) -> Optional[str]:
+    """Codificação de maior qualidade no Accept-Encoding; empates seguem `preferencia` (a do servidor).
+
+    `*` vale para as codificações não citadas; q=0 exclui. None: enviar sem compressão.
+    """
+    qualidades = ler_accept_encoding(cabecalho)
+    curinga = qualidades.get("*", 0.0)
+    melhor, melhor_qualidade = None, 0.0
+    for codificacao in preferencia:
+        qualidade = qualidades.get(codificacao, curinga)
+        if qualidade > melhor_qualidade:
+            melhor, melhor_qualidade = codificacao, qualidade
+    return melhor
+
+
+def _comprimivel(response) -> bool:
+    if response.direct_passthrough or "Content-Encoding" in response.headers:
+        return False
+    if "no-transform" in response.headers.get("Cache-Control", ""):
+        return False
+    mimetype = response.mimetype or ""
+    return mimetype.startswith("text/") or mimetype in TIPOS_COMPRIMIVEIS
+
+
+def _comprimir_stream(partes, comprimir, descarregar, finalizar):
+    # Cada parte do gerador passa pelo compressor assim que é produzida: a memória
+    # usada é a do compressor, não a do corpo inteiro. O descarregamento por parte
+    # faz o cliente receber cada lote na hora, e não quando o compressor enche um
+    # bloco; as partes da exportação são lotes inteiros, então a taxa quase não muda.
+    try:
+        for parte in partes:
+            dados = comprimir(parte.encode() if isinstance(parte, str) else parte) + descarregar()
+            if dados:
+                yield dados
+        yield finalizar()
+    finally:
+        if hasattr(partes, "close"):
+            partes.close()
+
+
+def _marcar_etag(response, codificacao):
+    etag, fraca = response.get_etag()
+    if etag:
+        response.set_etag(etag_codificada(etag_sem_codificacao(etag), codificacao), weak=fraca)
+
+
+def _ajustar_etag_304(response):
+    # O 304 repete a ETag que o cliente guardou, com o sufixo da codificação que ele recebeu
+    etag, _ = response.get_etag()
+    for enviada in request.if_none_match.as_set(include_weak=True):
+        if etag and enviada != etag and etag_sem_codificacao(enviada) == etag:
+            response.set_etag(enviada)
+            return
+
+
+def instalar_compressao(app):
+    """Comprime as respostas conforme o Accept-Encoding (gzip e, se instalados, br e zstd).
+
+    Respostas comuns só são comprimidas a partir de COMPRESSION_MIN_SIZE bytes;
+    respostas em streaming (exportação) têm tamanho desconhecido e são sempre
+    comprimidas, parte a parte, sem juntar o corpo em memória.
+    """
+    if not app.config.get("COMPRESSION_ENABLED", True):
+        return
+
+    preferencia = [c for c in app.config.get("COMPRESSION_ALGORITHMS", ("zstd", "br", "gzip")) if c in CODIFICACOES]
+    tamanho_minimo = app.config.get("COMPRESSION_MIN_SIZE", 1024)
+    niveis = {codificacao: app.config.get(chave, padrao) for codificacao, (_, chave, padrao) in CODIFICACOES.items()}
+
+    @app.after_request
+    def _comprimir(response):
+        if response.status_code == 304:
+            _ajustar_etag_304(response)
+            return response
+        if response.status_code < 200 or response.status_code == 204 or not _comprimivel(response):
+            return response
+
+        # A resposta varia com o Accept-Encoding mesmo quando sai sem compressão
+        response.vary.add("Accept-Encoding")
+        codificacao = escolher_codificacao(request.headers.get("Accept-Encoding"), preferencia)
+        if codificacao is None:
+            return response
+
+        fabrica = CODIFICACOES[codificacao][0]
+        if response.is_streamed:
+            response.response = _comprimir_stream(response.response, *fabrica(niveis[codificacao]))
+            response.headers.pop("Content-Length", None)
+        else:
+            corpo = response.get_data()
+            if len(corpo) < tamanho_minimo:
+                return response
+            comprimir, _, finalizar = fabrica(niveis[codificacao])
+            response.set_data(comprimir(corpo) + finalizar())
+
+        response.headers["Content-Encoding"] = codificacao
+        _marcar_etag(response, codificacao)
+        return response
@@ -0,0 +1,186 @@
+import io
+import logging
+import os
+import random
+import re
+import time
+import uuid
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger("app.diagnostico")
+
+# Parâmetros cujo nome contém um destes termos nunca vão para o log
+CAMPOS_SENSIVEIS = re.compile(r"cpf|cartao", re.IGNORECASE)
+OCULTO = "***"
+MAX_SQL = 2000
+
+
+def ocultar_parametros(parametros):
+    """Cópia dos parâmetros de uma consulta com CPF e cartões substituídos por ***."""
+    if isinstance(parametros, dict):
+        return {
+            chave: OCULTO if CAMPOS_SENSIVEIS.search(str(chave)) else valor
+            for chave, valor in parametros.items()
+        }
+    if isinstance(parametros, (list, tuple)):
+        return [ocultar_parametros(item) if isinstance(item, dict) else OCULTO for item in parametros]
+    return OCULTO
+
+
+def _parametros_do_contexto(context, parameters):
+    # Os parâmetros compilados têm os nomes dos bind params (cpf_1, cartao_credito...),
+    # ao contrário dos posicionais enviados ao driver, então a ocultação é por nome
+    compilados = getattr(context, "compiled_parameters", None)
+    if context is not None and context.compiled is not None and compilados:
+        resumo = ocultar_parametros(compilados[0])
+        if len(compilados) > 1:
+            return {"primeira_linha": resumo, "linhas": len(compilados)}
+        return resumo
+    return ocultar_parametros(parameters)
+
+
+def _rota():
+    # A regra (ex.: /clientes/by-cpf/<string:cpf>) não expõe valores da URL, ao contrário do path
+    return request.url_rule.rule if request.url_rule is not None else "<sem_rota>"
+
+
+def _instrumentar_consultas(engine, limite_ms):
+    @event.listens_for(engine, "before_cursor_execute")
+    def _antes(conn, cursor, statement, parameters, context, executemany):
+        context.diagnostico_inicio = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _depois(conn, cursor, statement, parameters, context, executemany):
+        duracao_ms = (time.perf_counter() - context.diagnostico_inicio) * 1000
+        em_requisicao = has_request_context() and "diagnostico_inicio" in g
+        if em_requisicao:
+            g.diagnostico_consultas += 1
+            g.diagnostico_tempo_db_ms += duracao_ms
+        if limite_ms and duracao_ms >= limite_ms:
+            logger.warning(
+                "Consulta lenta: %.1f ms | endpoint=%s | sql=%s | parametros=%r",
+                duracao_ms,
+                request.endpoint if em_requisicao else None,
+                statement[:MAX_SQL],
+                _parametros_do_contexto(context, parameters),
+            )
+
+
+def _pyinstrument():
+    # Os profilers só são importados na primeira requisição perfilada, fora da inicialização
+    try:
+        import pyinstrument
+    except ImportError:  # dependência opcional: sem ela o perfil usa cProfile
+        return None
+    return pyinstrument
+
+
+class _Perfil:
+    """Perfil de uma única requisição, com cProfile ou pyinstrument."""
+
+    def __init__(self, ferramenta):
+        self.id = uuid.uuid4().hex[:12]
+        pyinstrument = _pyinstrument() if ferramenta == "pyinstrument" else None
+        self.ferramenta = "pyinstrument" if pyinstrument else "cprofile"
+        if pyinstrument:
+            self._perfil = pyinstrument.Profiler()
+            self._perfil.start()
+        else:
+            import cProfile
+            self._perfil = cProfile.Profile()
+            self._perfil.enable()
+
+    def parar(self):
+        if self.ferramenta == "pyinstrument":
+            self._perfil.stop()
+        else:
+            self._perfil.disable()
+
+    def relatorio(self, linhas=30) -> str:
+        if self.ferramenta == "pyinstrument":
+            return self._perfil.output_text()
+        import pstats
+        saida = io.StringIO()
+        pstats.Stats(self._perfil, stream=saida).sort_stats("cumulative").print_stats(linhas)
+        return saida.getvalue()
+
+    def salvar(self, diretorio) -> str:
+        if self.ferramenta == "pyinstrument":
+            caminho = os.path.join(diretorio, f"{self.id}.html")
+            with open(caminho, "w", encoding="utf-8") as arquivo:
+                arquivo.write(self._perfil.output_html())
+        else:
+            caminho = os.path.join(diretorio, f"{self.id}.prof")
+            self._perfil.dump_stats(caminho)
+        return caminho
+
+
+def _deve_perfilar(config):
+    cabecalho = config.get("PROFILE_HEADER")
+    if cabecalho and request.headers.get(cabecalho) == "1":
+        return True
+    taxa = config.get("PROFILE_SAMPLE_RATE", 0)
+    return taxa > 0 and random.random() < taxa
+
+
+def instalar_diagnostico(app, db):
+    """Log de requisições/consultas lentas e perfil por amostragem. Chamar com o app context ativo.
+
+    Tudo é opcional: sem SLOW_REQUEST_MS, SLOW_QUERY_MS, PROFILE_SAMPLE_RATE ou
+    PROFILE_HEADER configurados nenhum hook é registrado.
+    """
+    config = app.config
+    limite_requisicao_ms = config.get("SLOW_REQUEST_MS", 0)
+    limite_consulta_ms = config.get("SLOW_QUERY_MS", 0)
+    perfilar = config.get("PROFILE_SAMPLE_RATE", 0) > 0 or bool(config.get("PROFILE_HEADER"))
+    if not (limite_requisicao_ms or limite_consulta_ms or perfilar):
+        return
+
+    for engine in db.engines.values():
+        _instrumentar_consultas(engine, limite_consulta_ms)
+
+    @app.before_request
+    def _iniciar_diagnostico():
+        g.diagnostico_inicio = time.perf_counter()
+        g.diagnostico_consultas = 0
+        g.diagnostico_tempo_db_ms = 0.0
+        if perfilar and _deve_perfilar(config):
+            try:
+                g.diagnostico_perfil = _Perfil(config.get("PROFILER", "cprofile"))
+            except ValueError:  # outro profiler já ativo neste processo
+                logger.debug("Perfil ignorado: profiler já em uso")
+
+    @app.after_request
+    def _identificar_perfil(response):
+        g.diagnostico_status = response.status_code
+        if "diagnostico_perfil" in g:
+            response.headers["X-Profile-Id"] = g.diagnostico_perfil.id
+        return response
+
+    # Em teardown_request para cobrir também o envio de respostas em streaming
+    @app.teardown_request
+    def _finalizar_diagnostico(erro=None):
+        if "diagnostico_inicio" not in g:
+            return
+        duracao_ms = (time.perf_counter() - g.pop("diagnostico_inicio")) * 1000
+        perfil = g.pop("diagnostico_perfil", None)
+        if perfil is not None:
+            perfil.parar()
+        contexto = {
+            "method": request.method,
+            "rota": _rota(),
+            "endpoint": request.endpoint,
+            "status": g.pop("diagnostico_status", 500),
+            "duracao_ms": round(duracao_ms, 1),
+            "consultas": g.diagnostico_consultas,
+            "tempo_db_ms": round(g.diagnostico_tempo_db_ms, 1),
+        }
+        if limite_requisicao_ms and duracao_ms >= limite_requisicao_ms:
+            logger.warning("Requisição lenta: %s", contexto)
+        if perfil is not None:
+            diretorio = config.get("PROFILE_DIR")
+            if diretorio:
+                contexto["arquivo"] = perfil.salvar(diretorio)
+            logger.info("Perfil %s da requisição %s\n%s", perfil.id, contexto, perfil.relatorio())
@@ -0,0 +1,81 @@
+import json
+import logging
+import os
+from functools import lru_cache
+
+from flasgger import Flasgger
+
+EXTENSAO = "documentacao"
+ENDPOINT_SPEC = "apispec_1"
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE = {
+    "swagger": "2.0",
+    "info": {
+        "title": "API do Desafio Técnico - Clientes",
+        "description": "API para gestão de clientes, parte do desafio técnico.",
+        "version": "1.0.0"
+    },
+    "host": "localhost:5000",
+    "basePath": "/",
+    "schemes": [
+        "http",
+        "httpss"
+    ],
+}
+
+
+@lru_cache(maxsize=None)
+def definicoes() -> dict:
+    """Schemas JSON dos modelos Pydantic, gerados uma vez por processo."""
+    from app.model.cliente_model import Cliente, ClienteCreate, ClienteUpdate
+    return {
+        "Cliente": Cliente.model_json_schema(),
+        "ClienteCreate": ClienteCreate.model_json_schema(),
+        "ClienteUpdate": ClienteUpdate.model_json_schema()
+    }
+
+
+class DocumentacaoPreguicosa(Flasgger):
+    """Flasgger que só monta a spec no primeiro acesso a /apispec_1.json.
+
+    A inicialização registra apenas as rotas da documentação. A leitura das
+    docstrings e a geração dos schemas ficam para o primeiro acesso, e o
+    resultado é guardado pelo próprio Flasgger (fora do modo debug). Com
+    `arquivo`, a spec vem do JSON gerado por `flask clientes gerar-openapi`.
+    """
+
+    def __init__(self, app, arquivo=None, **kwargs):
+        self.arquivo = arquivo
+        super().__init__(app, **kwargs)
+
+    def gerar(self, endpoint=ENDPOINT_SPEC) -> dict:
+        """Monta a spec a partir das rotas, ignorando o arquivo pré-gerado."""
+        self.template.setdefault("definitions", definicoes())
+        return super().get_apispecs(endpoint)
+
+    def get_apispecs(self, endpoint=ENDPOINT_SPEC):
+        if self.arquivo is None:
+            return self.gerar(endpoint)
+        if endpoint not in self.apispecs:
+            with open(self.arquivo, encoding="utf-8") as arquivo:
+                self.apispecs[endpoint] = json.load(arquivo)
+        return self.apispecs[endpoint]
+
+
+def instalar_documentacao(app):
+    """Registra o Swagger UI em /apidocs. A spec é montada no primeiro acesso ou lida de OPENAPI_SPEC_FILE."""
+    arquivo = app.config.get("OPENAPI_SPEC_FILE") or None
+    if arquivo and not os.path.exists(arquivo):
+        logger.warning("OPENAPI_SPEC_FILE %s não encontrado; a spec será gerada no primeiro acesso", arquivo)
+        arquivo = None
+    app.extensions[EXTENSAO] = DocumentacaoPreguicosa(app, arquivo=arquivo, template=dict(TEMPLATE))
+
+
+def salvar_spec(documentacao: DocumentacaoPreguicosa, caminho: str) -> dict:
+    """Gera a spec e grava em `caminho` (JSON). Retorna a spec gravada."""
+    spec = documentacao.gerar()
+    with open(caminho, "w", encoding="utf-8") as arquivo:
+        json.dump(spec, arquivo, ensure_ascii=False, indent=2)
+    return spec
@@ -0,0 +1,138 @@
+from collections import Counter
+
+from sqlalchemy import delete, func, insert, select, text
+
+from app.db_models import ClienteDB, ClienteResumoDB
+
+# Dimensões de GET /clientes/stats; a bandeira é gravada como '' quando não há cartão
+DIMENSOES = ("agencia", "tipo_conta", "bandeira_cartao_credito")
+COLUNAS_RESUMO = {
+    "agencia": "agencia",
+    "tipo_conta": "tipo_conta",
+    "bandeira_cartao_credito": "bandeira",
+}
+
+# SQLite só tem gatilhos por linha: cada escrita ajusta o grupo antigo e o novo.
+# O gatilho de UPDATE só dispara quando algum campo do grupo muda de fato.
+_GRUPO_SQLITE = (
+    "agencia = {linha}.agencia AND tipo_conta = {linha}.tipo_conta "
+    "AND bandeira = coalesce({linha}.bandeira_cartao_credito, '')"
+)
+_INCREMENTAR_SQLITE = """
+    INSERT INTO clientes_resumo (agencia, tipo_conta, bandeira, total)
+    VALUES (NEW.agencia, NEW.tipo_conta, coalesce(NEW.bandeira_cartao_credito, ''), 1)
+    ON CONFLICT (agencia, tipo_conta, bandeira) DO UPDATE SET total = total + 1;
+"""
+_DECREMENTAR_SQLITE = f"""
+    UPDATE clientes_resumo SET total = total - 1 WHERE {_GRUPO_SQLITE.format(linha="OLD")};
+    DELETE FROM clientes_resumo WHERE {_GRUPO_SQLITE.format(linha="OLD")} AND total <= 0;
+"""
+GATILHOS_SQLITE = [
+    f"CREATE TRIGGER clientes_resumo_insert AFTER INSERT ON clientes BEGIN {_INCREMENTAR_SQLITE} END",
+    f"CREATE TRIGGER clientes_resumo_delete AFTER DELETE ON clientes BEGIN {_DECREMENTAR_SQLITE} END",
+    f"""
+    CREATE TRIGGER clientes_resumo_update AFTER UPDATE OF agencia, tipo_conta, bandeira_cartao_credito ON clientes
+    WHEN OLD.agencia IS NOT NEW.agencia OR OLD.tipo_conta IS NOT NEW.tipo_conta
+        OR OLD.bandeira_cartao_credito IS NOT NEW.bandeira_cartao_credito
+    BEGIN {_DECREMENTAR_SQLITE} {_INCREMENTAR_SQLITE} END
+    """,
+]
+
+# PostgreSQL: gatilhos por comando com tabelas de transição. Um INSERT/COPY de
+# milhares de linhas vira um único upsert por grupo, em ordem fixa para que
+# comandos concorrentes travem os grupos na mesma sequência (sem deadlock).
+_DELTA_POSTGRESQL = """
+        INSERT INTO clientes_resumo AS r (agencia, tipo_conta, bandeira, total)
+        SELECT agencia, tipo_conta, coalesce(bandeira_cartao_credito, ''), sum(n)
+        FROM ({fonte}) AS delta
+        GROUP BY 1, 2, 3 HAVING sum(n) <> 0 ORDER BY 1, 2, 3
+        ON CONFLICT (agencia, tipo_conta, bandeira) DO UPDATE SET total = r.total + EXCLUDED.total;"""
+_NOVAS = "SELECT agencia, tipo_conta, bandeira_cartao_credito, 1 AS n FROM novas"
+_ANTIGAS = "SELECT agencia, tipo_conta, bandeira_cartao_credito, -1 AS n FROM antigas"
+GATILHOS_POSTGRESQL = [
+    f"""
+    CREATE OR REPLACE FUNCTION clientes_resumo_aplicar() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN{_DELTA_POSTGRESQL.format(fonte=_NOVAS)}
+        ELSIF TG_OP = 'DELETE' THEN{_DELTA_POSTGRESQL.format(fonte=_ANTIGAS)}
+        ELSE{_DELTA_POSTGRESQL.format(fonte=f"{_ANTIGAS} UNION ALL {_NOVAS}")}
+        END IF;
+        IF TG_OP <> 'INSERT' THEN
+            DELETE FROM clientes_resumo WHERE total <= 0;
+        END IF;
+        RETURN NULL;
+    END
+    $$
+    """,
+    "CREATE TRIGGER clientes_resumo_insert AFTER INSERT ON clientes REFERENCING NEW TABLE AS novas "
+    "FOR EACH STATEMENT EXECUTE FUNCTION clientes_resumo_aplicar()",
+    "CREATE TRIGGER clientes_resumo_update AFTER UPDATE ON clientes REFERENCING OLD TABLE AS antigas "
+    "NEW TABLE AS novas FOR EACH STATEMENT EXECUTE FUNCTION clientes_resumo_aplicar()",
+    "CREATE TRIGGER clientes_resumo_delete AFTER DELETE ON clientes REFERENCING OLD TABLE AS antigas "
+    "FOR EACH STATEMENT EXECUTE FUNCTION clientes_resumo_aplicar()",
+]
+
+GATILHOS = {"sqlite": GATILHOS_SQLITE, "postgresql": GATILHOS_POSTGRESQL}
+
+
+def ler_agrupamento(valor) -> tuple:
+    """Converte `group_by` (ex.: "agencia,tipo_conta") em tupla de dimensões. Levanta ValueError se inválido."""
+    if not valor:
+        return ()
+    agrupamento = tuple(parte.strip() for parte in valor.split(","))
+    invalidos = [campo for campo in agrupamento if campo not in DIMENSOES]
+    if invalidos:
+        raise ValueError(
+            f"Campo inválido em 'group_by': {', '.join(invalidos)}. Campos disponíveis: {', '.join(DIMENSOES)}"
+        )
+    if len(set(agrupamento)) != len(agrupamento):
+        raise ValueError("Campo repetido em 'group_by'")
+    return agrupamento
+
+
+def estatisticas(session, agrupamento=()) -> dict:
+    """Totais de clientes por dimensão, lidos de clientes_resumo (custo proporcional ao número de grupos).
+
+    Com `agrupamento`, inclui também `grupos`: o total de cada combinação das dimensões pedidas.
+    """
+    linhas = session.execute(select(
+        ClienteResumoDB.agencia, ClienteResumoDB.tipo_conta, ClienteResumoDB.bandeira, ClienteResumoDB.total
+    )).all()
+
+    dados = {"total": sum(linha.total for linha in linhas)}
+    for dimensao in DIMENSOES:
+        contagem = Counter()
+        for linha in linhas:
+            contagem[getattr(linha, COLUNAS_RESUMO[dimensao])] += linha.total
+        dados[dimensao] = dict(sorted(contagem.items()))
+
+    if agrupamento:
+        grupos = Counter()
+        for linha in linhas:
+            grupos[tuple(getattr(linha, COLUNAS_RESUMO[d]) for d in agrupamento)] += linha.total
+        dados["grupos"] = [
+            {**dict(zip(agrupamento, chave)), "total": total} for chave, total in sorted(grupos.items())
+        ]
+    return dados
+
+
+def reconstruir_resumo(session, dialeto: str) -> int:
+    """Recalcula clientes_resumo a partir de clientes e retorna o número de grupos.
+
+    Para backfills e correções. No PostgreSQL trava clientes em modo SHARE até o
+    commit: leituras continuam, escritas esperam, então nenhuma escrita
+    concorrente é contada duas vezes ou perdida.
+    """
+    if dialeto == "postgresql":
+        session.execute(text("LOCK TABLE clientes IN SHARE MODE"))
+    session.execute(delete(ClienteResumoDB))
+    bandeira = func.coalesce(ClienteDB.bandeira_cartao_credito, "")
+    session.execute(insert(ClienteResumoDB).from_select(
+        ["agencia", "tipo_conta", "bandeira", "total"],
+        select(ClienteDB.agencia, ClienteDB.tipo_conta, bandeira, func.count())
+        .group_by(ClienteDB.agencia, ClienteDB.tipo_conta, bandeira)
+    ))
+    grupos = session.execute(select(func.count()).select_from(ClienteResumoDB)).scalar()
+    session.commit()
+    return grupos
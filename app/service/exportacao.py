@@ -0,0 +1,38 @@
+from sqlalchemy import select
+
+from app.db_models import ClienteDB
+from app.service.serializacao import CAMPOS_CLIENTE, colunas, dumps, linhas_para_dicts
+
+FORMATOS_EXPORTACAO = {
+    "ndjson": "application/x-ndjson",
+    "json": "application/json",
+}
+
+
+def _ler_em_lotes(session, tamanho_lote, campos):
+    # yield_per ativa stream_results: no PostgreSQL o psycopg2 usa um cursor
+    # nomeado (server-side), então só `tamanho_lote` linhas ficam em memória.
+    stmt = select(*colunas(campos)).order_by(ClienteDB.id).execution_options(yield_per=tamanho_lote)
+    resultado = session.execute(stmt)
+    try:
+        for lote in resultado.partitions():
+            yield linhas_para_dicts(lote, campos)
+    finally:
+        resultado.close()
+
+
+def gerar_ndjson(session, tamanho_lote=1000, campos=CAMPOS_CLIENTE):
+    """Gera a tabela de clientes como NDJSON, um bloco de texto por lote lido do banco."""
+    for lote in _ler_em_lotes(session, tamanho_lote, campos):
+        yield "".join(dumps(c) + "\n" for c in lote)
+
+
+def gerar_json(session, tamanho_lote=1000, campos=CAMPOS_CLIENTE):
+    """Gera a tabela de clientes como um único array JSON, escrito lote a lote."""
+    yield "["
+    primeiro = True
+    for lote in _ler_em_lotes(session, tamanho_lote, campos):
+        bloco = ",".join(dumps(c) for c in lote)
+        yield bloco if primeiro else "," + bloco
+        primeiro = False
+    yield "]"
@@ -0,0 +1,22 @@
+from sqlalchemy import event
+
+from app.db_models import ClienteDB
+from app.service import alteracoes, estatisticas
+
+# Tabelas mantidas por gatilhos em clientes -> gatilhos de cada banco
+CONJUNTOS = {
+    "clientes_resumo": estatisticas.GATILHOS,
+    "clientes_alteracoes": alteracoes.GATILHOS,
+}
+
+
+@event.listens_for(ClienteDB.metadata, "after_create")
+def _criar_gatilhos(metadata, connection, tables=(), **kw):
+    # Mantém db.create_all() (testes, bancos novos) equivalente às migrações
+    criadas = {tabela.name for tabela in tables}
+    if "clientes" not in criadas:
+        return
+    for tabela, gatilhos in CONJUNTOS.items():
+        if tabela in criadas:
+            for comando in gatilhos.get(connection.dialect.name, ()):
+                connection.exec_driver_sql(comando)
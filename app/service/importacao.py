@@ -0,0 +1,225 @@
+import csv
+import io
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from sqlalchemy.exc import IntegrityError
+
+from app.db_models import ClienteDB
+from app.model.cliente_model import ClienteCreate
+from app.service import lote
+from app.service.versao import incrementar_versao
+
+TABELA_STAGING = "clientes_import_staging"
+# Colunas gravadas pelo COPY: id e versao ficam com os defaults do banco
+COLUNAS = [c.name for c in ClienteDB.__table__.columns if c.name in ClienteCreate.model_fields]
+NULL_COPY = "\\N"
+
+
+@dataclass
+class ResultadoImportacao:
+    lidas: int = 0
+    importadas: int = 0
+    conflitos: int = 0
+    invalidas: int = 0
+    segundos: float = 0.0
+    rejeicoes: list = field(default_factory=list)
+    limite_rejeicoes: int = 1000
+    ao_rejeitar: Optional[Callable] = field(default=None, repr=False)
+
+    def rejeitar(self, linha, status, motivo):
+        if status == lote.STATUS_CONFLITO:
+            self.conflitos += 1
+        else:
+            self.invalidas += 1
+        if self.ao_rejeitar:
+            self.ao_rejeitar(linha, status, motivo)
+        # Só as primeiras rejeições são guardadas, para a memória não crescer com o arquivo
+        if len(self.rejeicoes) < self.limite_rejeicoes:
+            self.rejeicoes.append({"linha": linha, "status": status, "motivo": motivo})
+
+    @property
+    def linhas_por_segundo(self):
+        return self.lidas / self.segundos if self.segundos else 0.0
+
+    def to_dict(self):
+        return {
+            "lidas": self.lidas,
+            "importadas": self.importadas,
+            "conflitos": self.conflitos,
+            "invalidas": self.invalidas,
+            "segundos": round(self.segundos, 3),
+            "linhas_por_segundo": round(self.linhas_por_segundo, 1),
+            "rejeicoes": self.rejeicoes,
+        }
+
+
+def ler_csv(stream):
+    """Lê um CSV (com cabeçalho) linha a linha a partir de um stream binário."""
+    texto = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    leitor = csv.DictReader(texto)
+    for registro in leitor:
+        # Linha 1 é o cabeçalho; células vazias viram None (campos opcionais)
+        yield leitor.line_num, {k: (v if v != "" else None) for k, v in registro.items() if k}
+
+
+def ler_ndjson(stream):
+    """Lê NDJSON linha a linha a partir de um stream binário."""
+    for numero, linha in enumerate(stream, start=1):
+        linha = linha.strip()
+        if not linha:
+            continue
+        try:
+            yield numero, json.loads(linha)
+        except ValueError as e:
+            yield numero, ValueError(f"JSON inválido: {e}")
+
+
+LEITORES = {"csv": ler_csv, "ndjson": ler_ndjson}
+FORMATOS_IMPORTACAO = tuple(LEITORES)
+
+
+def formato_pelo_nome(nome_arquivo):
+    extensao = nome_arquivo.rsplit(".", 1)[-1].lower() if "." in nome_arquivo else ""
+    if extensao in ("ndjson", "jsonl"):
+        return "ndjson"
+    if extensao == "csv":
+        return "csv"
+    return None
+
+
+def _campo_copy(valor):
+    # COPY csv com NULL '\N': só o marcador sem aspas vira NULL. O csv.writer
+    # escreveria "" e None do mesmo jeito (campo vazio), e o COPY leria os dois como NULL.
+    if valor is None:
+        return NULL_COPY
+    return '"' + str(valor).replace('"', '""') + '"'
+
+
+def buffer_copy(livres):
+    """Monta o CSV do COPY para os itens `(index, dados)`, com texto vazio e NULL distintos."""
+    buffer = io.StringIO()
+    for _, dados in livres:
+        buffer.write(",".join(_campo_copy(dados[coluna]) for coluna in COLUNAS) + "\n")
+    buffer.seek(0)
+    return buffer
+
+
+def _gravar_via_copy(session, livres):
+    """Grava o bloco com COPY em uma tabela temporária e faz o merge em `clientes`.
+
+    O merge usa ON CONFLICT DO NOTHING: linhas que violam CPF/email únicos
+    (no banco ou repetidas no próprio arquivo) não voltam no RETURNING. Com a
+    tabela particionada o email é único por gatilho, e não por índice, então
+    os emails já cadastrados são descartados antes pelo NOT EXISTS.
+    """
+    conexao = session.connection()
+    nomes = ", ".join(COLUNAS)
+    conexao.exec_driver_sql(
+        f"CREATE TEMP TABLE IF NOT EXISTS {TABELA_STAGING} ON COMMIT DELETE ROWS "
+        f"AS SELECT {nomes} FROM clientes WITH NO DATA"
+    )
+
+    cursor = conexao.connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {TABELA_STAGING} ({nomes}) FROM STDIN WITH (FORMAT csv, NULL '{NULL_COPY}')",
+            buffer_copy(livres)
+        )
+    finally:
+        cursor.close()
+
+    inseridos = conexao.exec_driver_sql(
+        f"INSERT INTO clientes ({nomes}) SELECT {nomes} FROM {TABELA_STAGING} AS s "
+        f"WHERE NOT EXISTS (SELECT 1 FROM clientes AS c WHERE c.email = s.email) "
+        f"ON CONFLICT DO NOTHING RETURNING cpf"
+    ).scalars().all()
+    return set(inseridos)
+
+
+def _gravar_bloco(session, itens, linhas, resultado, tamanho_bloco):
+    """Grava um bloco e retorna os dados das linhas importadas."""
+    resultados = {}
+    validos = lote.validar_itens(itens, resultados)
+
+    if session.get_bind().dialect.name == "postgresql":
+        unicos = lote.remover_repetidos(validos, resultados)
+        try:
+            with session.begin_nested():
+                inseridos = _gravar_via_copy(session, unicos)
+        except IntegrityError:
+            # Ex.: email gravado por outra requisição depois do NOT EXISTS (o gatilho de
+            # clientes_emails barra o bloco todo). Refaz linha a linha e rejeita só as culpadas.
+            lote.inserir_em_blocos(session, unicos, resultados, tamanho_bloco, lote.MODO_MELHOR_ESFORCO)
+            inseridos = {
+                dados["cpf"] for index, dados in unicos
+                if index in resultados and resultados[index].status == lote.STATUS_CRIADO
+            }
+        gravados = []
+        for index, dados in unicos:
+            if dados["cpf"] in inseridos:
+                gravados.append(dados)
+            else:
+                resultados[index] = lote.ResultadoItem(index, lote.STATUS_CONFLITO, error="CPF ou email já cadastrado")
+    else:
+        livres = lote.detectar_conflitos(session, validos, resultados, tamanho_bloco)
+        lote.inserir_em_blocos(session, livres, resultados, tamanho_bloco, lote.MODO_MELHOR_ESFORCO)
+        gravados = [dados for index, dados in livres if resultados[index].status == lote.STATUS_CRIADO]
+    resultado.importadas += len(gravados)
+
+    for index, item in sorted(resultados.items()):
+        if item.status != lote.STATUS_CRIADO:
+            motivo = item.error or "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in item.errors)
+            resultado.rejeitar(linhas[index], item.status, motivo)
+    return gravados
+
+
+def importar_clientes(session, registros, tamanho_bloco=5000, ao_progredir=None, ao_rejeitar=None,
+                      limite_rejeicoes=1000, ao_importar=None):
+    """Importa clientes a partir de um iterável de `(linha, registro)`.
+
+    Os registros são consumidos sob demanda e gravados bloco a bloco, com um
+    commit por bloco: a memória usada depende de `tamanho_bloco`, não do
+    tamanho do arquivo, e o próximo bloco só é lido depois que o anterior foi
+    gravado. `ao_progredir(resultado)` é chamado após cada bloco,
+    `ao_rejeitar(linha, status, motivo)` a cada linha rejeitada e
+    `ao_importar(dados)` a cada linha gravada, depois do commit do bloco.
+    """
+    resultado = ResultadoImportacao(limite_rejeicoes=limite_rejeicoes, ao_rejeitar=ao_rejeitar)
+    inicio = time.perf_counter()
+    itens, linhas = [], []
+
+    def descarregar():
+        try:
+            gravados = _gravar_bloco(session, itens, linhas, resultado, tamanho_bloco)
+            if gravados:
+                incrementar_versao(session)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        if ao_importar:
+            for dados in gravados:
+                ao_importar(dados)
+        itens.clear()
+        linhas.clear()
+        resultado.segundos = time.perf_counter() - inicio
+        if ao_progredir:
+            ao_progredir(resultado)
+
+    for linha, registro in registros:
+        resultado.lidas += 1
+        if isinstance(registro, Exception):
+            resultado.rejeitar(linha, lote.STATUS_INVALIDO, str(registro))
+            continue
+        itens.append(registro)
+        linhas.append(linha)
+        if len(itens) >= tamanho_bloco:
+            descarregar()
+
+    if itens:
+        descarregar()
+    resultado.segundos = time.perf_counter() - inicio
+    return resultado
@@ -0,0 +1,25 @@
+from sqlalchemy.exc import IntegrityError
+
+# SQLSTATE do PostgreSQL para unique_violation
+UNIQUE_VIOLATION = "23505"
+
+
+def campo_duplicado(erro: IntegrityError):
+    """Retorna "cpf" ou "email" quando o erro é uma violação de unicidade desses campos.
+
+    Retorna None para outras violações (ex.: NOT NULL), que não são conflitos.
+    """
+    original = erro.orig
+    mensagem = str(original).lower()
+    unicidade = (
+        getattr(original, "pgcode", None) == UNIQUE_VIOLATION
+        or "unique constraint" in mensagem
+        or "duplicate key" in mensagem
+    )
+    if not unicidade:
+        return None
+    # O nome da restrição (clientes_email_key) ou da coluna (clientes.email) aparece na mensagem
+    for campo in ("email", "cpf"):
+        if campo in mensagem:
+            return campo
+    return "cpf"
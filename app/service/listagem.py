@@ -0,0 +1,214 @@
+from dataclasses import dataclass, field
+from typing import Optional
+
+from sqlalchemy import and_, func, or_, select, tuple_
+
+from app.db_models import ClienteDB
+from app.service.busca import filtrar_por_nome
+from app.service.paginacao import Paginacao, encode_cursor, ler_paginacao
+from app.service.serializacao import colunas, ler_campos, linha_para_dict
+
+# Colunas aceitas como filtro (?agencia=0001) e em `sort`; todas têm índice (campo, id)
+FILTROS = ("agencia", "tipo_conta", "bandeira_cartao_credito")
+ORDENACOES = FILTROS + ("id",)
+CONTAGEM_EXATA = "exact"
+CONTAGEM_ESTIMADA = "estimated"
+CONTAGENS = (CONTAGEM_EXATA, CONTAGEM_ESTIMADA)
+
+
+@dataclass
+class ParametrosListagem:
+    nome: Optional[str]
+    pagina: Paginacao
+    cursor: Optional[list]
+    campos: tuple
+    filtros: dict = field(default_factory=dict)
+    ordenacao: tuple = (("id", False),)
+    contagem: Optional[str] = None
+
+    @property
+    def campos_ordenacao(self):
+        return tuple(campo for campo, _ in self.ordenacao)
+
+    @property
+    def campos_consulta(self):
+        # As colunas da ordenação são sempre selecionadas porque formam o cursor
+        extras = tuple(campo for campo in self.campos_ordenacao if campo not in self.campos)
+        return extras + self.campos
+
+
+def expressao(campo):
+    # bandeira_cartao_credito é opcional: sem cartão vira '' para filtrar, ordenar
+    # e paginar sem tratar NULL à parte (o índice usa a mesma expressão)
+    coluna = ClienteDB.__table__.c[campo]
+    return func.coalesce(coluna, "") if coluna.nullable else coluna
+
+
+def condicoes_filtro(filtros: dict):
+    """Condições WHERE para `{campo: [valores]}`; vários valores do mesmo campo viram IN."""
+    return [
+        expressao(campo) == valores[0] if len(valores) == 1 else expressao(campo).in_(valores)
+        for campo, valores in filtros.items()
+    ]
+
+
+def ler_ordenacao(valor):
+    """Converte `sort` (ex.: "agencia,-id") em ((campo, decrescente), ...), sempre terminando em id."""
+    if not valor:
+        return (("id", False),)
+    ordenacao = []
+    for parte in valor.split(","):
+        parte = parte.strip()
+        campo = parte.lstrip("-")
+        if campo not in ORDENACOES:
+            raise ValueError(
+                f"Campo inválido em 'sort': {campo or valor}. Campos disponíveis: {', '.join(ORDENACOES)}"
+            )
+        if campo in (c for c, _ in ordenacao):
+            raise ValueError(f"Campo repetido em 'sort': {campo}")
+        ordenacao.append((campo, parte.startswith("-")))
+    # id desempata e torna a ordem total, condição para a paginação por cursor
+    if ordenacao[-1][0] != "id" and "id" not in (c for c, _ in ordenacao):
+        ordenacao.append(("id", ordenacao[0][1]))
+    return tuple(ordenacao)
+
+
+def _validar_cursor(cursor, ordenacao):
+    if cursor is None:
+        return None
+    if len(cursor) != len(ordenacao):
+        raise ValueError("Cursor inválido")
+    for valor, (campo, _) in zip(cursor, ordenacao):
+        tipo = int if campo == "id" else str
+        if not isinstance(valor, tipo) or isinstance(valor, bool):
+            raise ValueError("Cursor inválido")
+    return cursor
+
+
+def ler_parametros(args, config) -> ParametrosListagem:
+    """Lê os parâmetros de GET /clientes/. Levanta ValueError se algum for inválido."""
+    pagina = ler_paginacao(args, config)
+    ordenacao = ler_ordenacao(args.get("sort"))
+    if args.get("nome") and args.get("sort"):
+        raise ValueError("A busca por 'nome' é ordenada por relevância e não aceita 'sort'")
+
+    contagem = args.get("count") or None
+    if contagem is not None and contagem not in CONTAGENS:
+        raise ValueError(f"O parâmetro 'count' deve ser um de: {', '.join(CONTAGENS)}")
+
+    return ParametrosListagem(
+        nome=args.get("nome"),
+        pagina=pagina,
+        cursor=_validar_cursor(pagina.after, ordenacao),
+        campos=ler_campos(args.get("fields")),
+        filtros={campo: args.getlist(campo) for campo in FILTROS if campo in args},
+        ordenacao=ordenacao,
+        contagem=contagem,
+    )
+
+
+def _depois_do_cursor(ordenacao, cursor):
+    expressoes = [(expressao(campo), decrescente) for campo, decrescente in ordenacao]
+    direcoes = {decrescente for _, decrescente in expressoes}
+    if len(direcoes) == 1:
+        # Comparação de tuplas (row values): o banco usa o índice composto direto
+        linha, valores = tuple_(*(e for e, _ in expressoes)), tuple_(*cursor)
+        return linha < valores if direcoes.pop() else linha > valores
+
+    # Direções mistas: (a > x) OR (a = x AND b < y) OR ...
+    condicoes = []
+    for i, (expr, decrescente) in enumerate(expressoes):
+        iguais = [expressoes[j][0] == cursor[j] for j in range(i)]
+        condicoes.append(and_(*iguais, expr < cursor[i] if decrescente else expr > cursor[i]))
+    return or_(*condicoes)
+
+
+def _ordem(parametros: ParametrosListagem):
+    return [
+        expressao(campo).desc() if decrescente else expressao(campo)
+        for campo, decrescente in parametros.ordenacao
+    ]
+
+
+def montar_consulta(parametros: ParametrosListagem, dialeto: str):
+    """Monta o SELECT da listagem, já restrito às colunas pedidas em `fields`.
+
+    Paginação por cursor (keyset) nas colunas de `sort`, desempatadas por id: o
+    custo de cada página não depende da posição na tabela, ao contrário de
+    OFFSET. `all=true` mantém a listagem completa antiga, apenas mediante pedido
+    explícito. A busca por nome é ordenada por relevância e limitada a `limit`
+    resultados.
+    """
+    query = select(*colunas(parametros.campos_consulta)).where(*condicoes_filtro(parametros.filtros))
+    if parametros.nome:
+        return filtrar_por_nome(query, parametros.nome, dialeto).limit(parametros.pagina.limit)
+    if parametros.pagina.todos:
+        return query.order_by(*_ordem(parametros))
+    if parametros.cursor is not None:
+        query = query.where(_depois_do_cursor(parametros.ordenacao, parametros.cursor))
+    # Uma linha a mais indica se existe próxima página
+    return query.order_by(*_ordem(parametros)).limit(parametros.pagina.limit + 1)
+
+
+def montar_pagina(linhas, parametros: ParametrosListagem):
+    """Converte as linhas da consulta em `(data, next_cursor)`."""
+    next_cursor = None
+    paginada = not parametros.nome and not parametros.pagina.todos
+    if paginada and len(linhas) > parametros.pagina.limit:
+        linhas = linhas[:parametros.pagina.limit]
+        posicoes = [parametros.campos_consulta.index(campo) for campo in parametros.campos_ordenacao]
+        ultima = linhas[-1]
+        next_cursor = encode_cursor(*("" if ultima[p] is None else ultima[p] for p in posicoes))
+
+    inicio = len(parametros.campos_consulta) - len(parametros.campos)
+    data = [linha_para_dict(linha[inicio:], parametros.campos, exclude_none=True) for linha in linhas]
+    return data, next_cursor
+
+
+SQL_RELTUPLES = """
+    SELECT CASE WHEN c.relkind = 'p' THEN (
+        SELECT sum(p.reltuples) FROM pg_inherits AS i JOIN pg_class AS p ON p.oid = i.inhrelid
+        WHERE i.inhparent = c.oid AND p.reltuples >= 0
+    ) ELSE c.reltuples END::bigint
+    FROM pg_class AS c WHERE c.oid = 'clientes'::regclass
+"""
+
+
+def _estimar(session, consulta, filtrada):
+    conexao = session.connection()
+    if not filtrada:
+        # Mantido pelo VACUUM/ANALYZE; -1 enquanto a tabela nunca foi analisada.
+        # Na tabela particionada o pai não tem estatística própria: soma as partições.
+        valor = conexao.exec_driver_sql(SQL_RELTUPLES).scalar()
+    else:
+        sql = consulta.compile(dialect=conexao.dialect, compile_kwargs={"literal_binds": True})
+        plano = conexao.exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {sql}", execution_options={"no_parameters": True}
+        ).scalar()
+        valor = int(plano[0]["Plan"]["Plan Rows"])
+    return valor if valor is not None and valor >= 0 else None
+
+
+def contar(session, parametros: ParametrosListagem, dialeto: str, limiar_exato=100000):
+    """Retorna `(total, tipo)` dos clientes que casam com os filtros, ou `(None, None)` sem `count`.
+
+    `count=estimated` no PostgreSQL usa `pg_class.reltuples` (sem filtros) ou a
+    estimativa do planejador (EXPLAIN), sem varrer a tabela; abaixo de
+    `limiar_exato` linhas, ou em outros bancos, a contagem exata já é barata e é
+    feita no lugar. `count=exact` sempre faz o COUNT(*).
+    """
+    if parametros.contagem is None:
+        return None, None
+
+    consulta = select(ClienteDB.id).where(*condicoes_filtro(parametros.filtros))
+    if parametros.nome:
+        consulta = filtrar_por_nome(consulta, parametros.nome, dialeto).order_by(None)
+    filtrada = bool(parametros.filtros or parametros.nome)
+
+    if parametros.contagem == CONTAGEM_ESTIMADA and dialeto == "postgresql":
+        estimativa = _estimar(session, consulta, filtrada)
+        if estimativa is not None and estimativa >= limiar_exato:
+            return estimativa, CONTAGEM_ESTIMADA
+
+    total = session.execute(select(func.count()).select_from(consulta.subquery())).scalar()
+    return total, CONTAGEM_EXATA
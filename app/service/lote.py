@@ -0,0 +1,336 @@
+from dataclasses import dataclass, field
+from typing import Optional
+
+from pydantic import ValidationError
+from sqlalchemy import delete, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.db_models import ClienteDB
+from app.model.cliente_model import ClienteCreate, ClienteParcial
+from app.service.listagem import FILTROS, condicoes_filtro
+
+MODO_TUDO_OU_NADA = "all_or_nothing"
+MODO_MELHOR_ESFORCO = "best_effort"
+MODOS = (MODO_TUDO_OU_NADA, MODO_MELHOR_ESFORCO)
+
+STATUS_CRIADO = "created"
+STATUS_CONFLITO = "conflict"
+STATUS_INVALIDO = "invalid"
+STATUS_IGNORADO = "skipped"
+STATUS_ATUALIZADO = "updated"
+STATUS_REMOVIDO = "deleted"
+STATUS_NAO_ENCONTRADO = "not_found"
+CAMPOS_UNICOS = ("cpf", "email")
+
+# Colunas NOT NULL que o ClienteCreate aceita como opcionais; sem elas o INSERT
+# falharia no banco e derrubaria o lote inteiro.
+COLUNAS_OBRIGATORIAS = [
+    c.name for c in ClienteDB.__table__.columns if not c.nullable and c.name in ClienteCreate.model_fields
+]
+
+
+class LimiteExcedido(ValueError):
+    """O filtro seleciona mais clientes do que o lote permite (CLIENTES_BULK_MAX_ITEMS)."""
+
+
+@dataclass
+class ResultadoItem:
+    index: int
+    status: str
+    id: Optional[int] = None
+    error: Optional[str] = None
+    errors: list = field(default_factory=list)
+
+    def to_dict(self):
+        resultado = {"index": self.index, "status": self.status}
+        if self.id is not None:
+            resultado["id"] = self.id
+        if self.error:
+            resultado["error"] = self.error
+        if self.errors:
+            resultado["errors"] = self.errors
+        return resultado
+
+
+@dataclass
+class ResultadoId:
+    id: int
+    status: str
+    error: Optional[str] = None
+
+    def to_dict(self):
+        resultado = {"id": self.id, "status": self.status}
+        if self.error:
+            resultado["error"] = self.error
+        return resultado
+
+
+def _em_blocos(itens, tamanho):
+    for inicio in range(0, len(itens), tamanho):
+        yield itens[inicio:inicio + tamanho]
+
+
+def validar_itens(itens, resultados):
+    """Valida cada item com ClienteCreate; os inválidos são registrados em `resultados`."""
+    validos = []
+    for index, item in enumerate(itens):
+        if not isinstance(item, dict):
+            resultados[index] = ResultadoItem(index, STATUS_INVALIDO, error="Item precisa ser um objeto JSON")
+            continue
+        try:
+            cliente = ClienteCreate(**item)
+        except ValidationError as e:
+            resultados[index] = ResultadoItem(
+                index, STATUS_INVALIDO, errors=e.errors(include_url=False, include_context=False)
+            )
+            continue
+        dados = cliente.model_dump()
+        faltando = [coluna for coluna in COLUNAS_OBRIGATORIAS if dados.get(coluna) is None]
+        if faltando:
+            resultados[index] = ResultadoItem(
+                index, STATUS_INVALIDO, error=f"Campos obrigatórios ausentes: {', '.join(faltando)}"
+            )
+            continue
+        validos.append((index, dados))
+    return validos
+
+
+def remover_repetidos(validos, resultados):
+    """Marca como conflito os itens cujo CPF/email já apareceu antes no mesmo lote."""
+    cpfs_vistos, emails_vistos = set(), set()
+    unicos = []
+    for index, dados in validos:
+        if dados["cpf"] in cpfs_vistos:
+            resultados[index] = ResultadoItem(index, STATUS_CONFLITO, error="CPF repetido no lote")
+        elif dados["email"] in emails_vistos:
+            resultados[index] = ResultadoItem(index, STATUS_CONFLITO, error="Email repetido no lote")
+        else:
+            cpfs_vistos.add(dados["cpf"])
+            emails_vistos.add(dados["email"])
+            unicos.append((index, dados))
+    return unicos
+
+
+def detectar_conflitos(session, validos, resultados, tamanho_bloco):
+    """Marca como conflito os itens com CPF/email repetidos no lote ou já existentes no banco.
+
+    A consulta ao banco é feita por conjunto (`cpf IN (...) OR email IN (...)`),
+    uma por bloco, em vez de um SELECT por cliente.
+    """
+    unicos = remover_repetidos(validos, resultados)
+
+    cpfs_existentes, emails_existentes = set(), set()
+    for bloco in _em_blocos(unicos, tamanho_bloco):
+        cpfs = [dados["cpf"] for _, dados in bloco]
+        emails = [dados["email"] for _, dados in bloco]
+        linhas = session.execute(
+            select(ClienteDB.cpf, ClienteDB.email).where(
+                or_(ClienteDB.cpf.in_(cpfs), ClienteDB.email.in_(emails))
+            )
+        )
+        for cpf, email in linhas:
+            cpfs_existentes.add(cpf)
+            emails_existentes.add(email)
+
+    livres = []
+    for index, dados in unicos:
+        if dados["email"] in emails_existentes:
+            resultados[index] = ResultadoItem(index, STATUS_CONFLITO, error="Email já cadastrado")
+        elif dados["cpf"] in cpfs_existentes:
+            resultados[index] = ResultadoItem(index, STATUS_CONFLITO, error="CPF já cadastrado")
+        else:
+            livres.append((index, dados))
+    return livres
+
+
+def _inserir_bloco(session, bloco):
+    # executemany com RETURNING ("insertmanyvalues"): um INSERT multi-VALUES por
+    # bloco, devolvendo os ids na mesma ordem dos parâmetros.
+    stmt = insert(ClienteDB.__table__).returning(
+        ClienteDB.__table__.c.id, sort_by_parameter_order=True
+    )
+    return session.execute(stmt, [dados for _, dados in bloco]).scalars().all()
+
+
+def inserir_em_blocos(session, livres, resultados, tamanho_bloco, modo):
+    """Insere os itens em blocos de `tamanho_bloco`.
+
+    No modo tudo-ou-nada uma violação de unicidade (ex.: corrida com outra
+    requisição) é propagada. No modo de melhor esforço cada bloco roda em um
+    SAVEPOINT e, se falhar, é reinserido item a item para isolar o culpado.
+    """
+    for bloco in _em_blocos(livres, tamanho_bloco):
+        if modo == MODO_TUDO_OU_NADA:
+            ids = _inserir_bloco(session, bloco)
+        else:
+            try:
+                with session.begin_nested():
+                    ids = _inserir_bloco(session, bloco)
+            except IntegrityError:
+                ids = []
+                for index, dados in bloco:
+                    try:
+                        with session.begin_nested():
+                            ids.extend(_inserir_bloco(session, [(index, dados)]))
+                    except IntegrityError:
+                        ids.append(None)
+                        resultados[index] = ResultadoItem(
+                            index, STATUS_CONFLITO, error="CPF ou email já cadastrado"
+                        )
+        for (index, _), id_criado in zip(bloco, ids):
+            if id_criado is not None:
+                resultados[index] = ResultadoItem(index, STATUS_CRIADO, id=id_criado)
+
+
+def criar_clientes_em_lote(session, itens, modo=MODO_TUDO_OU_NADA, tamanho_bloco=1000):
+    """Valida, verifica duplicidade e insere um lote de clientes.
+
+    Retorna a lista de ResultadoItem na ordem dos itens recebidos. Não faz commit:
+    no modo tudo-ou-nada, se algum item falhar nada é inserido e os itens
+    válidos voltam como `skipped`.
+    """
+    resultados = {}
+    validos = validar_itens(itens, resultados)
+    livres = detectar_conflitos(session, validos, resultados, tamanho_bloco)
+
+    if modo == MODO_TUDO_OU_NADA and resultados:
+        for index, _ in livres:
+            resultados[index] = ResultadoItem(index, STATUS_IGNORADO)
+    else:
+        inserir_em_blocos(session, livres, resultados, tamanho_bloco, modo)
+
+    return [resultados[index] for index in range(len(itens))]
+
+
+def ler_ids(ids):
+    """Valida a lista `ids` do corpo e remove repetidos, mantendo a ordem. Levanta ValueError."""
+    if not isinstance(ids, list) or not ids:
+        raise ValueError("'ids' precisa ser uma lista não vazia")
+    if not all(isinstance(id_, int) and not isinstance(id_, bool) for id_ in ids):
+        raise ValueError("'ids' precisa conter apenas números inteiros")
+    return list(dict.fromkeys(ids))
+
+
+def ler_filtro(filtro):
+    """Valida o `filtro` do corpo (ex.: {"agencia": "0001"}). Levanta ValueError."""
+    if not isinstance(filtro, dict) or not filtro:
+        raise ValueError("'filtro' precisa ser um objeto não vazio")
+    invalidos = [campo for campo in filtro if campo not in FILTROS]
+    if invalidos:
+        raise ValueError(
+            f"Campos inválidos em 'filtro': {', '.join(invalidos)}. "
+            f"Campos disponíveis: {', '.join(FILTROS)}"
+        )
+    if not all(isinstance(valor, str) for valor in filtro.values()):
+        raise ValueError("Os valores de 'filtro' precisam ser textos")
+    return filtro
+
+
+def ler_alteracoes(dados):
+    """Valida as alterações com ClienteParcial. Levanta ValidationError ou ValueError."""
+    if not isinstance(dados, dict) or not dados:
+        raise ValueError("Informe um objeto com os campos a alterar")
+    alteracoes = ClienteParcial(**dados).model_dump(exclude_unset=True)
+    nulos = [campo for campo in COLUNAS_OBRIGATORIAS if campo in alteracoes and alteracoes[campo] is None]
+    if nulos:
+        raise ValueError(f"Campos obrigatórios não podem ser nulos: {', '.join(nulos)}")
+    return alteracoes
+
+
+def selecionar_ids(session, ids=None, filtro=None, tamanho_bloco=1000, maximo=None):
+    """Retorna `(encontrados, ausentes)`: os ids pedidos que existem, ou os que casam com o filtro.
+
+    Com `filtro`, lê no máximo `maximo + 1` ids e levanta LimiteExcedido se
+    passar de `maximo`: um filtro amplo não carrega a tabela inteira.
+    """
+    if filtro is not None:
+        condicoes = condicoes_filtro({campo: [valor] for campo, valor in filtro.items()})
+        stmt = select(ClienteDB.id).where(*condicoes).order_by(ClienteDB.id)
+        if maximo is not None:
+            stmt = stmt.limit(maximo + 1)
+        encontrados = session.execute(stmt).scalars().all()
+        if maximo is not None and len(encontrados) > maximo:
+            raise LimiteExcedido(f"O filtro seleciona mais de {maximo} clientes; use um filtro mais restrito")
+        return encontrados, []
+
+    existentes = set()
+    for bloco in _em_blocos(ids, tamanho_bloco):
+        existentes.update(session.execute(select(ClienteDB.id).where(ClienteDB.id.in_(bloco))).scalars())
+    return [id_ for id_ in ids if id_ in existentes], [id_ for id_ in ids if id_ not in existentes]
+
+
+def _conflitos_de_unicidade(session, encontrados, alteracoes, tamanho_bloco):
+    unicos = {campo: alteracoes[campo] for campo in CAMPOS_UNICOS if campo in alteracoes}
+    if not unicos:
+        return {}
+    if len(encontrados) > 1:
+        erro = f"{' e '.join(unicos)} não pode ser atribuído a mais de um cliente"
+        return {id_: erro for id_ in encontrados}
+
+    conflitos = {}
+    for bloco in _em_blocos(encontrados, tamanho_bloco):
+        # Uma consulta por bloco: alguém fora do bloco já usa o CPF ou email novo?
+        existente = session.execute(
+            select(ClienteDB.cpf, ClienteDB.email).where(
+                or_(*(ClienteDB.__table__.c[campo] == valor for campo, valor in unicos.items())),
+                ClienteDB.id.notin_(bloco),
+            ).limit(1)
+        ).first()
+        if existente:
+            erro = "Email já cadastrado" if existente.email == unicos.get("email") else "CPF já cadastrado"
+            conflitos.update({id_: erro for id_ in bloco})
+    return conflitos
+
+
+def _resultados_finais(resultados, ordem, status_ok, aplicados, modo):
+    falhou = any(r.status != status_ok for r in resultados.values())
+    if modo == MODO_TUDO_OU_NADA and falhou:
+        for id_ in aplicados:
+            resultados[id_] = ResultadoId(id_, STATUS_IGNORADO)
+    return [resultados[id_] for id_ in ordem]
+
+
+def atualizar_clientes_em_lote(session, alteracoes, ids=None, filtro=None,
+                               modo=MODO_TUDO_OU_NADA, tamanho_bloco=1000, maximo=None):
+    """Aplica `alteracoes` aos clientes de `ids` ou do `filtro` (até `maximo` clientes).
+
+    Um `UPDATE ... WHERE id IN (...)` por bloco, todos na transação corrente
+    (não faz commit). No modo tudo-ou-nada, se algum id não existir ou entrar em
+    conflito, nada é alterado e os demais voltam como `skipped`.
+    """
+    encontrados, ausentes = selecionar_ids(session, ids, filtro, tamanho_bloco, maximo)
+    resultados = {id_: ResultadoId(id_, STATUS_NAO_ENCONTRADO, error="Cliente não encontrado") for id_ in ausentes}
+    conflitos = _conflitos_de_unicidade(session, encontrados, alteracoes, tamanho_bloco)
+    for id_, erro in conflitos.items():
+        resultados[id_] = ResultadoId(id_, STATUS_CONFLITO, error=erro)
+
+    livres = [id_ for id_ in encontrados if id_ not in conflitos]
+    if modo != MODO_TUDO_OU_NADA or not resultados:
+        tabela = ClienteDB.__table__
+        for bloco in _em_blocos(livres, tamanho_bloco):
+            session.execute(
+                update(tabela).where(tabela.c.id.in_(bloco)).values(**alteracoes, versao=tabela.c.versao + 1)
+            )
+    for id_ in livres:
+        resultados[id_] = ResultadoId(id_, STATUS_ATUALIZADO)
+
+    return _resultados_finais(resultados, ids or encontrados, STATUS_ATUALIZADO, livres, modo)
+
+
+def remover_clientes_em_lote(session, ids=None, filtro=None, modo=MODO_TUDO_OU_NADA,
+                             tamanho_bloco=1000, maximo=None):
+    """Remove os clientes de `ids` ou do `filtro` (até `maximo`) com um `DELETE ... WHERE id IN (...)` por bloco.
+
+    Não faz commit. No modo tudo-ou-nada, se algum id não existir nada é removido.
+    """
+    encontrados, ausentes = selecionar_ids(session, ids, filtro, tamanho_bloco, maximo)
+    resultados = {id_: ResultadoId(id_, STATUS_NAO_ENCONTRADO, error="Cliente não encontrado") for id_ in ausentes}
+
+    if modo != MODO_TUDO_OU_NADA or not resultados:
+        tabela = ClienteDB.__table__
+        for bloco in _em_blocos(encontrados, tamanho_bloco):
+            session.execute(delete(tabela).where(tabela.c.id.in_(bloco)))
+    for id_ in encontrados:
+        resultados[id_] = ResultadoId(id_, STATUS_REMOVIDO)
+
+    return _resultados_finais(resultados, ids or encontrados, STATUS_REMOVIDO, encontrados, modo)
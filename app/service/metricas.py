@@ -0,0 +1,266 @@
+import threading
+import time
+from bisect import bisect_left
+
+from flask import Response, current_app, g, has_request_context, request
+from sqlalchemy import event
+
+EXTENSAO = "metricas"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_CONSULTAS = (1, 2, 5, 10, 25, 50, 100)
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _formatar_rotulos(nomes, valores, extra=()):
+    pares = [*zip(nomes, valores), *extra]
+    if not pares:
+        return ""
+    return "{" + ",".join(f'{nome}="{_escapar(valor)}"' for nome, valor in pares) + "}"
+
+
+def _formatar_numero(valor) -> str:
+    if valor == float("inf"):
+        return "+Inf"
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class _Metrica:
+    tipo = "untyped"
+
+    def __init__(self, nome, ajuda, rotulos=()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def _linhas(self):
+        with self._lock:
+            itens = list(self._valores.items())
+        for valores, valor in itens:
+            yield f"{self.nome}{_formatar_rotulos(self.rotulos, valores)} {_formatar_numero(valor)}"
+
+    def exportar(self):
+        yield f"# HELP {self.nome} {self.ajuda}"
+        yield f"# TYPE {self.nome} {self.tipo}"
+        yield from self._linhas()
+
+
+class Contador(_Metrica):
+    tipo = "counter"
+
+    def inc(self, *rotulos, valor=1):
+        with self._lock:
+            self._valores[rotulos] = self._valores.get(rotulos, 0) + valor
+
+
+class Gauge(_Metrica):
+    tipo = "gauge"
+
+    def inc(self, *rotulos, valor=1):
+        with self._lock:
+            self._valores[rotulos] = self._valores.get(rotulos, 0) + valor
+
+    def dec(self, *rotulos, valor=1):
+        self.inc(*rotulos, valor=-valor)
+
+
+class Histograma(_Metrica):
+    tipo = "histogram"
+
+    def __init__(self, nome, ajuda, rotulos=(), buckets=BUCKETS_LATENCIA):
+        super().__init__(nome, ajuda, rotulos)
+        self.buckets = tuple(buckets)
+
+    def observe(self, valor, *rotulos):
+        # Contagens por bucket não acumuladas: a soma acumulada só é feita na exportação
+        indice = bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._valores.get(rotulos)
+            if serie is None:
+                serie = self._valores[rotulos] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            serie[0][indice] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def _linhas(self):
+        with self._lock:
+            itens = [(valores, (list(c), s, n)) for valores, (c, s, n) in self._valores.items()]
+        for valores, (contagens, soma, total) in itens:
+            acumulado = 0
+            for limite, contagem in zip(self.buckets + (float("inf"),), contagens):
+                acumulado += contagem
+                rotulos = _formatar_rotulos(self.rotulos, valores, [("le", _formatar_numero(limite))])
+                yield f"{self.nome}_bucket{rotulos} {acumulado}"
+            rotulos = _formatar_rotulos(self.rotulos, valores)
+            yield f"{self.nome}_sum{rotulos} {_formatar_numero(soma)}"
+            yield f"{self.nome}_count{rotulos} {total}"
+
+
+class _Coletada(_Metrica):
+    """Métrica cujos valores são lidos na hora da exportação, por uma função."""
+
+    def __init__(self, nome, ajuda, tipo, rotulos, coletar):
+        super().__init__(nome, ajuda, rotulos)
+        self.tipo = tipo
+        self._coletar = coletar
+
+    def _linhas(self):
+        for valores, valor in self._coletar():
+            yield f"{self.nome}{_formatar_rotulos(self.rotulos, valores)} {_formatar_numero(valor)}"
+
+
+class Registro:
+    """Conjunto de métricas de um processo, exportado no formato texto do Prometheus.
+
+    Os valores ficam na memória do processo: com vários workers do gunicorn cada
+    um expõe os próprios números, e o Prometheus agrega por instância.
+    """
+
+    def __init__(self):
+        self._metricas = []
+
+    def _registrar(self, metrica):
+        self._metricas.append(metrica)
+        return metrica
+
+    def contador(self, nome, ajuda, rotulos=()):
+        return self._registrar(Contador(nome, ajuda, rotulos))
+
+    def gauge(self, nome, ajuda, rotulos=()):
+        return self._registrar(Gauge(nome, ajuda, rotulos))
+
+    def histograma(self, nome, ajuda, rotulos=(), buckets=BUCKETS_LATENCIA):
+        return self._registrar(Histograma(nome, ajuda, rotulos, buckets))
+
+    def coletada(self, nome, ajuda, tipo, rotulos, coletar):
+        return self._registrar(_Coletada(nome, ajuda, tipo, rotulos, coletar))
+
+    def exportar(self) -> str:
+        return "\n".join(linha for metrica in self._metricas for linha in metrica.exportar()) + "\n"
+
+
+def _endpoint():
+    # O endpoint (ex.: "clientes.buscar_cliente_por_id") tem cardinalidade fixa, ao contrário da URL
+    return request.endpoint or "<sem_rota>"
+
+
+def _nome_engine(chave):
+    return chave or "primary"
+
+
+def _estatisticas_pool(db):
+    # Pools do SQLite (StaticPool, SingletonThreadPool) não têm esses contadores
+    for chave, engine in db.engines.items():
+        pool = engine.pool
+        for estado, metodo in (("checked_out", "checkedout"), ("idle", "checkedin"),
+                               ("overflow", "overflow"), ("size", "size")):
+            if hasattr(pool, metodo):
+                yield (_nome_engine(chave), estado), getattr(pool, metodo)()
+
+
+def _estatisticas_cache(app, chave):
+    from app.service.cache import EXTENSAO as CACHE_EXTENSAO
+
+    contadores = app.extensions[CACHE_EXTENSAO].contadores.to_dict()
+    return [((), contadores[chave])]
+
+
+def _estatisticas_replicas(app):
+    from app.service.replicas import EXTENSAO as REPLICAS_EXTENSAO
+
+    roteador = app.extensions.get(REPLICAS_EXTENSAO)
+    if roteador is None:
+        return []
+    return [((nome,), int(estado == "healthy")) for nome, estado in roteador.stats().items()]
+
+
+def _instrumentar_engine(engine, nome, metricas):
+    @event.listens_for(engine, "before_cursor_execute")
+    def _antes(conn, cursor, statement, parameters, context, executemany):
+        context.metricas_inicio = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _depois(conn, cursor, statement, parameters, context, executemany):
+        duracao = time.perf_counter() - context.metricas_inicio
+        metricas["consultas"].observe(duracao, nome)
+        if has_request_context() and "metricas_inicio" in g:
+            g.metricas_consultas += 1
+            g.metricas_tempo_db += duracao
+
+
+def instalar_metricas(app, db):
+    """Instrumenta requisições e engines do app e registra GET /metrics. Chamar com o app context ativo."""
+    if not app.config.get("METRICS_ENABLED", True):
+        return
+
+    registro = Registro()
+    metricas = {
+        "latencia": registro.histograma(
+            "clientes_http_request_duration_seconds", "Duração das requisições HTTP.",
+            ("method", "endpoint", "status")),
+        "em_andamento": registro.gauge(
+            "clientes_http_requests_in_flight", "Requisições HTTP em andamento.", ("endpoint",)),
+        "consultas_por_requisicao": registro.histograma(
+            "clientes_http_request_db_queries", "Consultas SQL executadas por requisição.",
+            ("endpoint",), BUCKETS_CONSULTAS),
+        "tempo_db": registro.contador(
+            "clientes_http_request_db_seconds_total", "Tempo gasto no banco durante requisições.",
+            ("endpoint",)),
+        "consultas": registro.histograma(
+            "clientes_db_query_duration_seconds", "Duração das consultas SQL.", ("engine",)),
+    }
+    registro.coletada(
+        "clientes_db_pool_connections", "Conexões do pool por estado.", "gauge",
+        ("engine", "state"), lambda: _estatisticas_pool(db))
+    registro.coletada(
+        "clientes_cache_hits_total", "Acertos do cache de clientes.", "counter",
+        (), lambda: _estatisticas_cache(app, "hits"))
+    registro.coletada(
+        "clientes_cache_misses_total", "Faltas do cache de clientes.", "counter",
+        (), lambda: _estatisticas_cache(app, "misses"))
+    registro.coletada(
+        "clientes_cache_hit_ratio", "Proporção de acertos do cache de clientes.", "gauge",
+        (), lambda: _estatisticas_cache(app, "hit_ratio"))
+    registro.coletada(
+        "clientes_db_replica_healthy", "1 se a réplica está no rodízio de leituras.", "gauge",
+        ("replica",), lambda: _estatisticas_replicas(app))
+    app.extensions[EXTENSAO] = registro
+
+    for chave, engine in db.engines.items():
+        _instrumentar_engine(engine, _nome_engine(chave), metricas)
+
+    @app.before_request
+    def _iniciar_medicao():
+        g.metricas_inicio = time.perf_counter()
+        g.metricas_consultas = 0
+        g.metricas_tempo_db = 0.0
+        metricas["em_andamento"].inc(_endpoint())
+
+    @app.after_request
+    def _registrar_status(response):
+        g.metricas_status = response.status_code
+        return response
+
+    # teardown_request roda também após respostas em streaming e após exceções,
+    # então a duração inclui o envio do corpo e o gauge sempre é decrementado
+    @app.teardown_request
+    def _finalizar_medicao(erro=None):
+        if "metricas_inicio" not in g:
+            return
+        endpoint = _endpoint()
+        status = g.pop("metricas_status", 500)
+        metricas["latencia"].observe(
+            time.perf_counter() - g.pop("metricas_inicio"), request.method, endpoint, str(status))
+        metricas["em_andamento"].dec(endpoint)
+        metricas["consultas_por_requisicao"].observe(g.metricas_consultas, endpoint)
+        metricas["tempo_db"].inc(endpoint, valor=g.metricas_tempo_db)
+
+    @app.route("/metrics", methods=["GET"])
+    def exportar_metricas():
+        return Response(current_app.extensions[EXTENSAO].exportar(), content_type=CONTENT_TYPE)
@@ -0,0 +1,65 @@
+import click
+
+EXTENSAO = "migrate"
+COMANDO = "db"
+# A busca por nome é indexada de um jeito em cada banco (migração 3e24e2a4a244):
+# GIN de trigramas no PostgreSQL e ix_clientes_nome, declarado no modelo, nos demais.
+# No PostgreSQL o autogenerate ignora os dois, para não propor trocar um pelo outro.
+INDICES_DE_BUSCA = {"ix_clientes_nome", "ix_clientes_nome_trgm"}
+# Estrutura do changelog que só existe no PostgreSQL e fica fora do modelo
+# (alteracoes.ESTRUTURA_POSTGRESQL): o autogenerate não propõe removê-la.
+FORA_DO_MODELO = {("column", "xid"), ("index", "ix_clientes_alteracoes_pendentes")}
+
+
+def incluir_no_autogenerate(objeto, nome, tipo, refletido, comparado):
+    if tipo == "index" and nome in INDICES_DE_BUSCA:
+        from alembic import context
+        return context.get_bind().dialect.name != "postgresql"
+    if (tipo, nome) in FORA_DO_MODELO and comparado is None:
+        return False
+    return True
+
+
+def _carregar(app, db):
+    # Migrate.init_app substitui o objeto e o grupo abaixo pelos de verdade
+    from flask_migrate import Migrate
+    if not isinstance(app.extensions.get(EXTENSAO), MigracoesAdiadas):
+        return
+    Migrate(app, db, command=COMANDO, include_object=incluir_no_autogenerate)
+
+
+class MigracoesAdiadas:
+    """Ocupa app.extensions["migrate"] até o primeiro uso do Flask-Migrate.
+
+    O Flask-Migrate importa o Alembic inteiro, que só serve para migrar o
+    banco: o import fica para quando algum atributo além de `db` é pedido
+    (ex.: `flask_migrate.upgrade()` em um script).
+    """
+
+    def __init__(self, app, db):
+        self.app = app
+        self.db = db
+
+    def __getattr__(self, nome):
+        _carregar(self.app, self.db)
+        return getattr(self.app.extensions[EXTENSAO], nome)
+
+
+class ComandosMigracao(click.Group):
+    """Grupo `flask db` que só importa o Flask-Migrate quando é usado."""
+
+    def __init__(self, app, db):
+        super().__init__(name=COMANDO, help="Migrações do banco (Flask-Migrate/Alembic).")
+        self.app = app
+        self.db = db
+
+    def make_context(self, info_name, args, parent=None, **extra):
+        # A execução inteira (opções, ajuda e subcomandos) passa para o grupo do Flask-Migrate
+        _carregar(self.app, self.db)
+        from flask_migrate.cli import db as grupo
+        return grupo.make_context(info_name, args, parent=parent, **extra)
+
+
+def instalar_migracoes(app, db):
+    app.extensions[EXTENSAO] = MigracoesAdiadas(app, db)
+    app.cli.add_command(ComandosMigracao(app, db))
@@ -0,0 +1,51 @@
+import base64
+import json
+from dataclasses import dataclass
+from typing import Optional
+
+VALORES_VERDADEIROS = {"1", "true", "yes", "sim"}
+
+
+@dataclass
+class Paginacao:
+    limit: int
+    after: Optional[list]
+    todos: bool = False
+
+
+def encode_cursor(*valores) -> str:
+    # Cursor opaco: os valores da última linha da página, em JSON + base64 url-safe
+    bruto = json.dumps(list(valores), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(bruto).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        preenchido = cursor + "=" * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(preenchido.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Cursor inválido")
+    if not isinstance(valores, list) or not valores:
+        raise ValueError("Cursor inválido")
+    return valores
+
+
+def ler_paginacao(args, config) -> Paginacao:
+    """Lê `limit`, `after` e `all` da query string, validando contra os limites do `config`."""
+    todos = args.get("all", "").lower() in VALORES_VERDADEIROS
+
+    limite_padrao = config.get("CLIENTES_PAGE_SIZE", 100)
+    limite_maximo = config.get("CLIENTES_MAX_PAGE_SIZE", 1000)
+    try:
+        limit = int(args.get("limit", limite_padrao))
+    except ValueError:
+        raise ValueError("O parâmetro 'limit' deve ser um número inteiro")
+    if limit < 1 or limit > limite_maximo:
+        raise ValueError(f"O parâmetro 'limit' deve estar entre 1 e {limite_maximo}")
+
+    after = args.get("after")
+    return Paginacao(
+        limit=limit,
+        after=decode_cursor(after) if after else None,
+        todos=todos,
+    )
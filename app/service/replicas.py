@@ -0,0 +1,150 @@
+import itertools
+import threading
+import time
+
+from flask import current_app, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.sql.dml import UpdateBase
+
+EXTENSAO = "replicas"
+COOKIE_LEITURA = "ryow_ate"
+METODOS_LEITURA = ("GET", "HEAD")
+_FIXADO = "replica_fixada"
+_PRIMARIO = "usou_primario"
+
+
+def nome_bind(indice: int) -> str:
+    return f"replica_{indice}"
+
+
+class RoteadorReplicas:
+    """Escolhe a réplica de cada leitura em round-robin, pulando as que falharam
+    há menos de `cooldown` segundos."""
+
+    def __init__(self, nomes, cooldown=30):
+        self.nomes = list(nomes)
+        self.cooldown = cooldown
+        self._proxima = itertools.count()
+        self._indisponivel_ate = {}
+        self._lock = threading.Lock()
+
+    def escolher(self):
+        """Retorna o nome do bind da próxima réplica saudável, ou None se não houver."""
+        agora = time.monotonic()
+        with self._lock:
+            for _ in range(len(self.nomes)):
+                nome = self.nomes[next(self._proxima) % len(self.nomes)]
+                if self._indisponivel_ate.get(nome, 0) <= agora:
+                    return nome
+        return None
+
+    def marcar_indisponivel(self, nome):
+        with self._lock:
+            self._indisponivel_ate[nome] = time.monotonic() + self.cooldown
+
+    def stats(self):
+        agora = time.monotonic()
+        return {
+            nome: "evicted" if self._indisponivel_ate.get(nome, 0) > agora else "healthy"
+            for nome in self.nomes
+        }
+
+
+def _leitura_recente():
+    # Janela de "read your own writes": depois de uma escrita o cliente recebe o
+    # cookie e, até ele expirar, suas leituras vão para o primário.
+    try:
+        return float(request.cookies.get(COOKIE_LEITURA, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+class SessaoRoteada(Session):
+    """Session do Flask-SQLAlchemy que manda as leituras de requisições GET/HEAD
+    para as réplicas e todo o resto para o primário.
+
+    A réplica é fixada na primeira leitura da transação, para que as consultas
+    de uma mesma requisição vejam o mesmo estado. Qualquer escrita (flush ou
+    INSERT/UPDATE/DELETE) passa a transação para o primário.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if self._flushing or isinstance(clause, UpdateBase) or _for_update(clause):
+                self.info[_PRIMARIO] = True
+            elif self._pode_ler_da_replica():
+                nome = self.info.get(_FIXADO) or current_app.extensions[EXTENSAO].escolher()
+                if nome is not None:
+                    self.info[_FIXADO] = nome
+                    return self._db.engines[nome]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _pode_ler_da_replica(self):
+        return (
+            not self.info.get(_PRIMARIO)
+            and has_request_context()
+            and EXTENSAO in current_app.extensions
+            and request.method in METODOS_LEITURA
+            and not _leitura_recente()
+        )
+
+
+def usar_primario(session):
+    """Manda as próximas leituras da transação corrente para o primário.
+
+    Para leituras que vão ser guardadas (ex.: preenchimento do cache): uma
+    réplica atrasada devolveria a linha anterior a uma escrita, e ela ficaria
+    servida pelo TTL inteiro, não só pelo atraso da réplica.
+    """
+    session.info[_PRIMARIO] = True
+
+
+def _for_update(clause):
+    return getattr(clause, "_for_update_arg", None) is not None
+
+
+@event.listens_for(SessaoRoteada, "after_transaction_end")
+def _liberar_replica(session, transaction):
+    if transaction.parent is None:
+        session.info.pop(_FIXADO, None)
+        session.info.pop(_PRIMARIO, None)
+
+
+def binds_replicas(uris, opcoes_engine):
+    """Entradas de SQLALCHEMY_BINDS para as URLs de réplica configuradas."""
+    return {nome_bind(i): {"url": uri, **opcoes_engine(uri)} for i, uri in enumerate(uris)}
+
+
+def _observar_falhas(engine, nome, roteador):
+    @event.listens_for(engine, "handle_error")
+    def _ao_falhar(contexto):
+        # Queda de conexão ou falha ao conectar tira a réplica do rodízio
+        if contexto.is_disconnect or isinstance(contexto.sqlalchemy_exception, OperationalError):
+            roteador.marcar_indisponivel(nome)
+
+
+def instalar_replicas(app, db):
+    """Ativa o roteamento para as réplicas de SQLALCHEMY_REPLICA_URIS. Chamar com o app context ativo."""
+    uris = app.config.get("SQLALCHEMY_REPLICA_URIS") or []
+    if not uris:
+        return
+    nomes = [nome_bind(i) for i in range(len(uris))]
+    roteador = RoteadorReplicas(nomes, cooldown=app.config.get("REPLICA_COOLDOWN", 30))
+    for nome in nomes:
+        _observar_falhas(db.engines[nome], nome, roteador)
+        # O init_app cria um MetaData vazio por bind; o `db` é global, e sem isso
+        # create_all/drop_all de outros apps procurariam engines "replica_N" que não têm
+        db.metadatas.pop(nome, None)
+    app.extensions[EXTENSAO] = roteador
+
+    janela = app.config.get("READ_YOUR_WRITES_SECONDS", 0)
+    if janela > 0:
+        @app.after_request
+        def _marcar_escrita(response):
+            if request.method not in METODOS_LEITURA + ("OPTIONS",) and response.status_code < 400:
+                response.set_cookie(
+                    COOKIE_LEITURA, str(time.time() + janela), max_age=janela, httponly=True
+                )
+            return response
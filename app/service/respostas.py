@@ -0,0 +1,39 @@
+from sqlalchemy.exc import IntegrityError
+
+from app.service.integridade import campo_duplicado
+
+# Respostas de erro comuns a cliente_controller.py e cliente_async_controller.py.
+# Saem como (dict, status, headers): o Flask e o Quart convertem o dict em JSON,
+# então as mesmas funções servem aos dois apps.
+
+
+def resposta_integridade(e: IntegrityError):
+    """400 para violações que não são conflito (ex.: NOT NULL); 409 para CPF ou email duplicado."""
+    campo = campo_duplicado(e)
+    if campo is None:
+        return {
+            "success": False,
+            "message": "Dados inválidos",
+            "error": str(e.orig)
+        }, 400, {}
+    if campo == "email":
+        return {
+            "success": False,
+            "message": "Email já cadastrado",
+            "error": "O email já está cadastrado"
+        }, 409, {}
+    return {
+        "success": False,
+        "message": "CPF já cadastrado",
+        "error": "O CPF já está cadastrado"
+    }, 409, {}
+
+
+def resposta_412(etag=None):
+    """If-Match não confere; com `etag`, devolve a atual para o cliente não precisar de outro GET."""
+    headers = {"ETag": f'"{etag}"'} if etag else {}
+    return {
+        "success": False,
+        "message": "Cliente modificado por outra requisição",
+        "error": "A ETag enviada em If-Match não corresponde à versão atual do cliente"
+    }, 412, headers
@@ -0,0 +1,84 @@
+import json
+
+from flask.json.provider import DefaultJSONProvider
+
+from app.db_models import ClienteDB
+from app.model.cliente_model import Cliente as ClienteSchema
+
+try:
+    import orjson
+except ImportError:  # dependência opcional: sem ela usamos o json da biblioteca padrão
+    orjson = None
+
+CAMPOS_CLIENTE = tuple(ClienteSchema.model_fields)
+COLUNAS_CLIENTE = tuple(ClienteDB.__table__.c[campo] for campo in CAMPOS_CLIENTE)
+
+
+def ler_campos(valor):
+    """Converte o parâmetro `fields` (ex.: "id,nome,email") em uma tupla de campos de ClienteSchema."""
+    if not valor:
+        return CAMPOS_CLIENTE
+    campos = tuple(dict.fromkeys(campo.strip() for campo in valor.split(",") if campo.strip()))
+    invalidos = [campo for campo in campos if campo not in CAMPOS_CLIENTE]
+    if not campos or invalidos:
+        raise ValueError(
+            f"Campos inválidos em 'fields': {', '.join(invalidos) or valor}. "
+            f"Campos disponíveis: {', '.join(CAMPOS_CLIENTE)}"
+        )
+    return campos
+
+
+def colunas(campos):
+    return [ClienteDB.__table__.c[campo] for campo in campos]
+
+
+def projetar(cliente: dict, campos):
+    return {campo: cliente[campo] for campo in campos}
+
+
+# Os dados vêm do nosso próprio banco, já validados na escrita: montar os dicts
+# direto das linhas evita revalidar (inclusive EmailStr) cada cliente a cada leitura.
+
+def linha_para_dict(linha, campos=CAMPOS_CLIENTE, exclude_none=False):
+    if exclude_none:
+        return {campo: valor for campo, valor in zip(campos, linha) if valor is not None}
+    return dict(zip(campos, linha))
+
+
+def linhas_para_dicts(linhas, campos=CAMPOS_CLIENTE, exclude_none=False):
+    return [linha_para_dict(linha, campos, exclude_none) for linha in linhas]
+
+
+def cliente_para_dict(cliente_db, campos=CAMPOS_CLIENTE):
+    return {campo: getattr(cliente_db, campo) for campo in campos}
+
+
+def dumps(obj) -> str:
+    if orjson is not None:
+        return orjson.dumps(obj, default=DefaultJSONProvider.default).decode()
+    return json.dumps(obj, ensure_ascii=False, default=DefaultJSONProvider.default)
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider do Flask baseado em orjson, usado por `jsonify` e `request.get_json`.
+
+    Não ordena as chaves (ao contrário do provider padrão) e gera UTF-8 direto,
+    sem escapar caracteres não ASCII.
+    """
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default) + b"\n", mimetype=self.mimetype
+        )
+
+
+def instalar_json_provider(app):
+    if app.config.get("FAST_JSON", True) and orjson is not None:
+        app.json = OrjsonProvider(app)
@@ -0,0 +1,295 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import func, select
+from sqlalchemy.pool import StaticPool
+
+from app import db
+from app.db_models import ClienteDB
+
+EXTENSAO = "unicidade"
+CAMPOS = ("cpf", "email")
+# Espera (s) antes de tentar montar o filtro de novo após uma falha; dobra a cada falha
+ESPERA_INICIAL = 1
+ESPERA_MAXIMA = 300
+
+logger = logging.getLogger(__name__)
+
+
+class FiltroBloom:
+    """Conjunto probabilístico: `valor in filtro` nunca dá falso negativo, só falso positivo.
+
+    Dimensionado para `capacidade` itens com taxa de falsos positivos `taxa_fp`
+    (m = -n·ln p / ln²2 bits, k = m/n·ln 2 funções de hash). Não remove itens:
+    um CPF apagado continua "talvez presente", o que só custa uma consulta.
+    """
+
+    def __init__(self, capacidade: int, taxa_fp: float):
+        self.capacidade = max(capacidade, 1)
+        self.bits = max(8, math.ceil(-self.capacidade * math.log(taxa_fp) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / self.capacidade * math.log(2)))
+        self._array = bytearray((self.bits + 7) // 8)
+        self.itens = 0
+
+    def _posicoes(self, valor: str):
+        # Hash duplo (Kirsch-Mitzenmacher): k posições a partir de dois hashes de 64 bits
+        digest = hashlib.blake2b(valor.encode(), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def adicionar(self, valor: str):
+        for posicao in self._posicoes(valor):
+            self._array[posicao >> 3] |= 1 << (posicao & 7)
+        self.itens += 1
+
+    def __contains__(self, valor: str) -> bool:
+        return all(self._array[p >> 3] & (1 << (p & 7)) for p in self._posicoes(valor))
+
+    @property
+    def memoria_bytes(self) -> int:
+        return len(self._array)
+
+    @property
+    def taxa_fp_estimada(self) -> float:
+        # (1 - e^(-k·n/m))^k para os n itens já inseridos
+        return (1 - math.exp(-self.hashes * self.itens / self.bits)) ** self.hashes
+
+
+class FiltroEscalavel:
+    """Filtro de Bloom que cresce sem ser remontado (Almeida et al., "Scalable Bloom Filters").
+
+    Quando a camada atual enche, uma nova, com o dobro da capacidade e metade
+    da taxa de falsos positivos, passa a receber os itens; a consulta olha todas.
+    As taxas das camadas formam uma série que soma no máximo `taxa_fp`.
+    """
+
+    RAZAO_TAXA = 0.5
+
+    def __init__(self, capacidade: int, taxa_fp: float):
+        self.taxa_fp = taxa_fp
+        self.camadas = [FiltroBloom(capacidade, taxa_fp * (1 - self.RAZAO_TAXA))]
+
+    def adicionar(self, valor: str):
+        atual = self.camadas[-1]
+        if atual.itens >= atual.capacidade:
+            atual = FiltroBloom(2 * atual.capacidade, self._taxa_camada(len(self.camadas)))
+            self.camadas.append(atual)
+        atual.adicionar(valor)
+
+    def _taxa_camada(self, indice: int) -> float:
+        return self.taxa_fp * (1 - self.RAZAO_TAXA) * self.RAZAO_TAXA ** indice
+
+    def __contains__(self, valor: str) -> bool:
+        return any(valor in camada for camada in self.camadas)
+
+    @property
+    def itens(self) -> int:
+        return sum(camada.itens for camada in self.camadas)
+
+    @property
+    def capacidade(self) -> int:
+        return sum(camada.capacidade for camada in self.camadas)
+
+    @property
+    def memoria_bytes(self) -> int:
+        return sum(camada.memoria_bytes for camada in self.camadas)
+
+    @property
+    def taxa_fp_estimada(self) -> float:
+        return 1 - math.prod(1 - camada.taxa_fp_estimada for camada in self.camadas)
+
+
+class IndiceUnicidade:
+    """Pré-filtro por processo de CPFs e emails já cadastrados.
+
+    `talvez_exista` falso garante que o valor não estava no banco quando o
+    filtro foi montado nem foi gravado por este processo depois: a consulta de
+    duplicidade pode ser pulada. Gravações de outros processos não aparecem
+    aqui, então a restrição única do banco continua sendo a garantia final.
+
+    O filtro é montado por uma thread em segundo plano, com app context e
+    sessão próprios; até ele ficar pronto (ou durante a espera após uma falha)
+    as verificações consultam o banco.
+    """
+
+    def __init__(self, capacidade=1_000_000, taxa_fp=0.01, tamanho_lote=10000):
+        self.capacidade_minima = capacidade
+        self.taxa_fp = taxa_fp
+        self.tamanho_lote = tamanho_lote
+        self.filtros = None  # None: ainda não montado, toda verificação vai ao banco
+        self._lock = threading.Lock()
+        self._construindo = False
+        self._thread = None
+        self._pendentes = []  # gravados durante a montagem, incluídos ao final dela
+        self._espera = 0
+        self._proxima_tentativa = 0.0
+        self.falhas = 0
+        self.verificacoes = 0
+        self.consultas_evitadas = 0
+        self.falsos_positivos = 0
+
+    @property
+    def pronto(self) -> bool:
+        return self.filtros is not None
+
+    def construir(self, session):
+        """Monta os filtros lendo cpf/email em streaming; os antigos só são trocados no fim.
+
+        A capacidade inicial é o dobro dos clientes atuais (ou
+        UNIQUENESS_FILTER_CAPACITY, se maior); depois disso o filtro cresce por camadas.
+        """
+        total = session.execute(select(func.count()).select_from(ClienteDB)).scalar()
+        capacidade = max(self.capacidade_minima, 2 * total)
+        filtros = {campo: FiltroEscalavel(capacidade, self.taxa_fp) for campo in CAMPOS}
+
+        stmt = select(ClienteDB.cpf, ClienteDB.email).execution_options(yield_per=self.tamanho_lote)
+        resultado = session.execute(stmt)
+        try:
+            for lote in resultado.partitions():
+                for cpf, email in lote:
+                    filtros["cpf"].adicionar(cpf)
+                    filtros["email"].adicionar(email)
+        finally:
+            resultado.close()
+
+        with self._lock:
+            for valores in self._pendentes:
+                self._incluir(filtros, valores)
+            self._pendentes = []
+            self.filtros = filtros
+        logger.info("Filtro de unicidade montado: %s clientes, capacidade %s", total, capacidade)
+
+    def garantir_construido(self, app):
+        """Inicia a montagem em segundo plano se o filtro ainda não existe. Não bloqueia:
+        com outra montagem em andamento, ou na espera após uma falha, não faz nada."""
+        with self._lock:
+            if self.filtros is not None or self._construindo or time.monotonic() < self._proxima_tentativa:
+                return
+            self._construindo = True
+        self._thread = threading.Thread(target=self._montar, args=(app,), name="unicidade", daemon=True)
+        self._thread.start()
+
+    def _montar(self, app):
+        with app.app_context():
+            try:
+                self.construir(db.session)
+                self._espera = 0
+            except Exception as erro:
+                # Ex.: tabela ainda não criada. Sem a espera, todo cadastro refaria a leitura
+                self.falhas += 1
+                self._espera = min(max(2 * self._espera, ESPERA_INICIAL), ESPERA_MAXIMA)
+                self._proxima_tentativa = time.monotonic() + self._espera
+                logger.info(
+                    "Filtro de unicidade não montado (%s); nova tentativa em %ss",
+                    getattr(erro, "orig", None) or erro, self._espera
+                )
+            finally:
+                db.session.remove()
+                with self._lock:
+                    self._construindo = False
+                    if self.filtros is None:
+                        self._pendentes = []
+
+    def aguardar(self, timeout=None):
+        """Espera a montagem em andamento, se houver, terminar."""
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def talvez_exista(self, **valores) -> bool:
+        """True se algum dos valores (cpf=..., email=...) pode já estar cadastrado."""
+        filtros = self.filtros
+        with self._lock:
+            self.verificacoes += 1
+        if filtros is None:
+            return True
+        if any(valor is not None and valor in filtros[campo] for campo, valor in valores.items()):
+            return True
+        with self._lock:
+            self.consultas_evitadas += 1
+        return False
+
+    def registrar_consulta(self, encontrado: bool):
+        """Registra o resultado da consulta feita após um "talvez": nada encontrado é falso positivo."""
+        if not encontrado and self.pronto:
+            with self._lock:
+                self.falsos_positivos += 1
+
+    def adicionar(self, **valores):
+        """Inclui valores gravados por este processo (chamar após o commit)."""
+        with self._lock:
+            if self.filtros is not None:
+                self._incluir(self.filtros, valores)
+            elif self._construindo:
+                # A leitura em andamento pode já ter passado por esta linha
+                self._pendentes.append(valores)
+
+    @staticmethod
+    def _incluir(filtros, valores):
+        for campo, valor in valores.items():
+            if valor is not None:
+                filtros[campo].adicionar(valor)
+
+    def stats(self):
+        filtros = self.filtros
+        consultas = self.verificacoes - self.consultas_evitadas
+        dados = {
+            "pronto": filtros is not None,
+            "construindo": self._construindo,
+            "falhas_montagem": self.falhas,
+            "verificacoes": self.verificacoes,
+            "consultas_evitadas": self.consultas_evitadas,
+            "falsos_positivos": self.falsos_positivos,
+            "taxa_fp_observada": round(self.falsos_positivos / consultas, 4) if consultas else 0.0,
+        }
+        if filtros is not None:
+            dados["memoria_bytes"] = sum(filtro.memoria_bytes for filtro in filtros.values())
+            dados["filtros"] = {
+                campo: {
+                    "itens": filtro.itens,
+                    "capacidade": filtro.capacidade,
+                    "camadas": len(filtro.camadas),
+                    "bits": sum(camada.bits for camada in filtro.camadas),
+                    "taxa_fp_estimada": round(filtro.taxa_fp_estimada, 6),
+                }
+                for campo, filtro in filtros.items()
+            }
+        return dados
+
+
+class IndiceDesligado(IndiceUnicidade):
+    """UNIQUENESS_FILTER_ENABLED=0 (ou SQLite em memória): toda verificação vai ao banco, como antes."""
+
+    def garantir_construido(self, app):
+        pass
+
+    def adicionar(self, **valores):
+        pass
+
+
+def instalar_unicidade(app):
+    """Cria o índice do processo, ainda vazio.
+
+    A montagem começa no `post_fork` do gunicorn (uma thread por worker; no
+    master ela não sobreviveria ao fork) ou, em outros servidores, no primeiro
+    cadastro. O boot não lê a tabela.
+    """
+    with app.app_context():
+        # SQLite em memória: uma única conexão, que a thread de montagem dividiria com as requisições
+        conexao_unica = isinstance(db.engine.pool, StaticPool)
+    if conexao_unica or not app.config.get("UNIQUENESS_FILTER_ENABLED", True):
+        app.extensions[EXTENSAO] = IndiceDesligado()
+        return
+    indice = IndiceUnicidade(
+        capacidade=app.config.get("UNIQUENESS_FILTER_CAPACITY", 1_000_000),
+        taxa_fp=app.config.get("UNIQUENESS_FILTER_FP_RATE", 0.01),
+    )
+    app.extensions[EXTENSAO] = indice
+
+
+def get_unicidade() -> IndiceUnicidade:
+    return current_app.extensions[EXTENSAO]
@@ -0,0 +1,34 @@
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.db_models import ClienteDB
+from app.service.serializacao import CAMPOS_CLIENTE, COLUNAS_CLIENTE
+
+INSERTS_COM_CONFLITO = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def upsert_por_cpf(session, dados: dict) -> dict:
+    """Insere ou atualiza o cliente identificado por `dados["cpf"]` em um único comando.
+
+    Usa INSERT ... ON CONFLICT (cpf) DO UPDATE ... RETURNING, apoiado na restrição
+    única de `cpf`; não há SELECT prévio, então não há janela de corrida entre
+    verificar e gravar. Um email já usado por outro cliente ainda viola a
+    restrição única de `email` e sobe como IntegrityError.
+    """
+    dialeto = session.get_bind().dialect.name
+    if dialeto not in INSERTS_COM_CONFLITO:
+        raise NotImplementedError(f"Upsert não suportado no banco '{dialeto}'")
+
+    tabela = ClienteDB.__table__
+    stmt = INSERTS_COM_CONFLITO[dialeto](tabela).values(**dados)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[tabela.c.cpf],
+        set_={
+            **{campo: stmt.excluded[campo] for campo in dados if campo != "cpf"},
+            "versao": tabela.c.versao + 1,
+        },
+    ).returning(*COLUNAS_CLIENTE)
+    linha = session.execute(stmt).one()
+    return dict(zip(CAMPOS_CLIENTE, linha))
@@ -0,0 +1,81 @@
+import hashlib
+import json
+import re
+
+from flask import Response
+from sqlalchemy import insert, select, update
+
+from app.db_models import TabelaVersaoDB
+
+TABELA_CLIENTES = "clientes"
+# A compressão (app/service/compressao.py) marca a ETag com a codificação usada:
+# "abc" vira "abc-gzip", pois os bytes enviados são outros; a versão do recurso é a mesma
+SUFIXO_CODIFICACAO = re.compile(r"-(gzip|br|zstd)$")
+
+
+def versao_tabela(session, tabela=TABELA_CLIENTES) -> int:
+    versao = session.execute(
+        select(TabelaVersaoDB.versao).where(TabelaVersaoDB.tabela == tabela)
+    ).scalar()
+    return versao or 0
+
+
+def incrementar_versao(session, tabela=TABELA_CLIENTES):
+    """Incrementa a versão da tabela na transação corrente.
+
+    Deve ser chamado logo antes do commit: a linha fica travada até o fim da
+    transação, então quanto mais tarde, menor a contenção entre escritas.
+    """
+    resultado = session.execute(
+        update(TabelaVersaoDB)
+        .where(TabelaVersaoDB.tabela == tabela)
+        .values(versao=TabelaVersaoDB.versao + 1)
+    )
+    if resultado.rowcount == 0:
+        session.execute(insert(TabelaVersaoDB).values(tabela=tabela, versao=1))
+
+
+def _hash(texto: str) -> str:
+    return hashlib.blake2b(texto.encode(), digest_size=12).hexdigest()
+
+
+def etag_conteudo(payload) -> str:
+    # Hash do JSON canônico: mesmo conteúdo, mesma ETag, em qualquer processo
+    return _hash(json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":")))
+
+
+def etag_colecao(versao: int, args) -> str:
+    # A resposta depende da versão da tabela e dos parâmetros da consulta
+    parametros = "&".join(f"{k}={v}" for k, v in sorted(args.items(multi=True)))
+    return f"{TABELA_CLIENTES}-{versao}-{_hash(parametros)}"
+
+
+def etag_codificada(etag: str, codificacao: str) -> str:
+    return f"{etag}-{codificacao}"
+
+
+def etag_sem_codificacao(etag: str) -> str:
+    return SUFIXO_CODIFICACAO.sub("", etag)
+
+
+def _contem(etags, etag: str, incluir_fracas: bool) -> bool:
+    if etags.star_tag:
+        return True
+    return etag in {etag_sem_codificacao(e) for e in etags.as_set(include_weak=incluir_fracas)}
+
+
+def nao_modificado(request, etag: str) -> bool:
+    return _contem(request.if_none_match, etag, incluir_fracas=True)
+
+
+def precondicao_falhou(request, etag: str) -> bool:
+    """True se a requisição trouxe If-Match e nenhuma das ETags (comparação forte) é a atual."""
+    if "If-Match" not in request.headers:
+        return False
+    return not _contem(request.if_match, etag, incluir_fracas=False)
+
+
+def resposta_304(etag: str) -> Response:
+    resposta = Response(status=304)
+    resposta.set_etag(etag)
+    return resposta
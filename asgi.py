@@ -0,0 +1,4 @@
+from app.async_app import create_async_app
+
+# Ponto de entrada assíncrono: `WEB_CONCURRENCY=4 uvicorn asgi:app` ou `hypercorn asgi:app`
+app = create_async_app()
@@ -0,0 +1,77 @@
+"""Mede o tempo de inicialização da aplicação: import do pacote, create_app e primeiro acesso à spec.
+
+Cada rodada é um interpretador novo, como o boot de um worker: os imports não
+são reaproveitados entre rodadas.
+
+Uso:
+    python -m benchmarks.bench_inicializacao --repeticoes 10
+    python -m benchmarks.bench_inicializacao --sem-documentacao
+    python -m benchmarks.bench_inicializacao --spec openapi.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Roda no processo filho; imprime os tempos de cada etapa em JSON
+RODADA = """
+import json, sys, time
+inicio = time.perf_counter()
+import app
+importado = time.perf_counter()
+aplicacao = app.create_app(app.TestConfig)
+criado = time.perf_counter()
+spec = None
+if aplicacao.config.get("SWAGGER_ENABLED", True):
+    resposta = aplicacao.test_client().get("/apispec_1.json")
+    assert resposta.status_code == 200, resposta.status_code
+    spec = time.perf_counter() - criado
+print(json.dumps({
+    "import": importado - inicio,
+    "create_app": criado - importado,
+    "primeira_spec": spec,
+    "modulos": len(sys.modules),
+}))
+"""
+
+ETAPAS = ("processo", "import", "create_app", "primeira_spec")
+
+
+def rodar(ambiente):
+    inicio = time.perf_counter()
+    saida = subprocess.run(
+        [sys.executable, "-c", RODADA], env=ambiente, check=True, capture_output=True, text=True
+    ).stdout
+    tempos = json.loads(saida.strip().splitlines()[-1])
+    tempos["processo"] = time.perf_counter() - inicio
+    return tempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeticoes", type=int, default=10)
+    parser.add_argument("--sem-documentacao", action="store_true", help="SWAGGER_ENABLED=0 (sem Flasgger)")
+    parser.add_argument("--spec", help="OPENAPI_SPEC_FILE gerado por `flask clientes gerar-openapi`")
+    args = parser.parse_args()
+
+    ambiente = {**os.environ, "PYTHONPATH": os.getcwd()}
+    if args.sem_documentacao:
+        ambiente["SWAGGER_ENABLED"] = "0"
+    if args.spec:
+        ambiente["OPENAPI_SPEC_FILE"] = os.path.abspath(args.spec)
+
+    rodar(ambiente)  # aquece o cache de bytecode e do sistema de arquivos
+    rodadas = [rodar(ambiente) for _ in range(args.repeticoes)]
+
+    print(f"rodadas: {args.repeticoes}, módulos carregados: {rodadas[0]['modulos']}")
+    for etapa in ETAPAS:
+        tempos = [rodada[etapa] for rodada in rodadas if rodada[etapa] is not None]
+        if tempos:
+            print(f"{etapa:<14}: mediana {statistics.median(tempos) * 1000:7.1f} ms  mínimo {min(tempos) * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
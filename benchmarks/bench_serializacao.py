@@ -0,0 +1,73 @@
+"""Compara a serialização antiga (ORM + Pydantic + json) com o caminho rápido (tuplas + orjson).
+
+Uso:
+    python -m benchmarks.bench_serializacao --linhas 20000 --repeticoes 5
+"""
+import argparse
+import json
+import time
+
+from sqlalchemy import insert, select
+
+from app import TestConfig, create_app, db
+from app.db_models import ClienteDB
+from app.model.cliente_model import Cliente as ClienteSchema
+from app.service.serializacao import COLUNAS_CLIENTE, dumps, linhas_para_dicts, orjson
+
+
+def popular(quantidade):
+    db.session.execute(insert(ClienteDB), [
+        {
+            "cpf": f"{i:011d}", "nome": f"Cliente {i}", "email": f"cliente{i}@example.com",
+            "telefone": "11999999999", "agencia": "0001", "conta": str(i), "tipo_conta": "corrente",
+            "cartao_debito": str(i), "cartao_credito": None if i % 2 else str(i), "bandeira_cartao_credito": None,
+        }
+        for i in range(quantidade)
+    ])
+    db.session.commit()
+
+
+def caminho_antigo():
+    clientes_db = ClienteDB.query.all()
+    data = [ClienteSchema.model_validate(c).model_dump(exclude_none=True) for c in clientes_db]
+    return json.dumps({"success": True, "data": data}, sort_keys=True)
+
+
+def caminho_rapido():
+    linhas = db.session.execute(select(*COLUNAS_CLIENTE)).all()
+    return dumps({"success": True, "data": linhas_para_dicts(linhas, exclude_none=True)})
+
+
+def medir(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        db.session.expunge_all()  # não reaproveitar objetos já carregados na identity map
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--linhas", type=int, default=20000)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        popular(args.linhas)
+
+        assert json.loads(caminho_antigo()) == json.loads(caminho_rapido())
+        antigo = medir(caminho_antigo, args.repeticoes)
+        rapido = medir(caminho_rapido, args.repeticoes)
+
+    print(f"linhas: {args.linhas} (orjson: {'sim' if orjson else 'não'})")
+    print(f"ORM + model_validate + json : {antigo * 1000:9.1f} ms  ({args.linhas / antigo:,.0f} linhas/s)")
+    print(f"tuplas + dict + orjson      : {rapido * 1000:9.1f} ms  ({args.linhas / rapido:,.0f} linhas/s)")
+    print(f"ganho: {antigo / rapido:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+# Configuração do gunicorn: gunicorn -c gunicorn.conf.py wsgi:app
+from multiprocessing import cpu_count
+from os import environ, getenv
+
+bind = f"{getenv('HOST', '0.0.0.0')}:{getenv('PORT', 5000)}"
+workers = int(getenv("WEB_CONCURRENCY", cpu_count() * 2 + 1))
+# A aplicação lê o número de workers para escolher o CACHE_BACKEND padrão
+environ["WEB_CONCURRENCY"] = str(workers)
+threads = int(getenv("GUNICORN_THREADS", 4))
+worker_class = "gthread" if threads > 1 else "sync"
+timeout = int(getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(getenv("GUNICORN_KEEPALIVE", 5))
+max_requests = int(getenv("GUNICORN_MAX_REQUESTS", 0))
+max_requests_jitter = int(getenv("GUNICORN_MAX_REQUESTS_JITTER", 0))
+# Carregar a aplicação no master acelera o boot dos workers e compartilha memória
+preload_app = getenv("GUNICORN_PRELOAD", "1") == "1"
+accesslog = getenv("GUNICORN_ACCESSLOG", "-")
+
+
+def post_fork(server, worker):
+    # Com preload_app o engine (e seu pool) nasce no master. Cada worker precisa
+    # abrir as próprias conexões: dispose(close=False) descarta o pool herdado sem
+    # fechar os sockets, que continuam em uso pelo processo pai.
+    from app import db
+    from app.service.unicidade import EXTENSAO as UNICIDADE
+    from wsgi import app
+
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+    # Threads não sobrevivem ao fork: o filtro de cpf/email é montado aqui, em
+    # segundo plano, e as requisições consultam o banco até ele ficar pronto
+    app.extensions[UNICIDADE].garantir_construido(app)
@@ -11,7 +11,9 @@ config = context.config
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
-fileConfig(config.config_file_name)
+# Sem desligar os loggers que já existem: migrar de dentro do processo da
+# aplicação (flask_migrate.upgrade()) não pode calar app.diagnostico e afins.
+fileConfig(config.config_file_name, disable_existing_loggers=False)
 logger = logging.getLogger('alembic.env')
 
 
@@ -0,0 +1,47 @@
+"""Índice de busca por nome (pg_trgm, sem acentos)
+
+Revision ID: 3e24e2a4a244
+Revises: f403e2a15c3f
+Create Date: 2026-10-17 09:12:41.108254
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3e24e2a4a244'
+down_revision = 'f403e2a15c3f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        # SQLite não tem trigramas; a função f_unaccent é registrada pela aplicação
+        # em cada conexão e o índice simples ajuda apenas buscas por prefixo.
+        op.create_index('ix_clientes_nome', 'clientes', ['nome'])
+        return
+
+    op.execute('CREATE EXTENSION IF NOT EXISTS unaccent')
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # unaccent() é apenas STABLE; o wrapper IMMUTABLE permite usá-la no índice.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT AS
+        $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+    """)
+    with op.get_context().autocommit_block():
+        op.execute(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_clientes_nome_trgm '
+            'ON clientes USING gin (lower(f_unaccent(nome)) gin_trgm_ops)'
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        op.drop_index('ix_clientes_nome', table_name='clientes')
+        return
+
+    op.execute('DROP INDEX IF EXISTS ix_clientes_nome_trgm')
+    op.execute('DROP FUNCTION IF EXISTS f_unaccent(text)')
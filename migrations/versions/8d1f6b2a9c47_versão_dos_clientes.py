@@ -0,0 +1,27 @@
+"""Coluna de versão dos clientes para controle de concorrência otimista
+
+Revision ID: 8d1f6b2a9c47
+Revises: 4c65b47217d6
+Create Date: 2026-10-17 14:21:08.412377
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d1f6b2a9c47'
+down_revision = '4c65b47217d6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # server_default preenche as linhas existentes com 1 sem reescrever a tabela
+    # (PostgreSQL 11+ guarda o default nos metadados)
+    op.add_column('clientes', sa.Column('versao', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('clientes') as batch_op:
+        batch_op.drop_column('versao')
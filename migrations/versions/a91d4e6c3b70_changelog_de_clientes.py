@@ -0,0 +1,97 @@
+"""Tabela clientes_alteracoes gravada por gatilhos (GET /clientes/changes)
+
+Revision ID: a91d4e6c3b70
+Revises: e7a3c9f15b28
+Create Date: 2026-10-17 19:42:11.518203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a91d4e6c3b70'
+down_revision = 'e7a3c9f15b28'
+branch_labels = None
+depends_on = None
+
+# Cópia dos gatilhos de app/service/alteracoes.py no momento desta revisão
+REGISTRAR_SQLITE = """
+    INSERT INTO tabela_versoes (tabela, versao) VALUES ('clientes_alteracoes', 1)
+    ON CONFLICT (tabela) DO UPDATE SET versao = versao + 1;
+    INSERT INTO clientes_alteracoes (seq, cliente_id, operacao)
+    SELECT versao, {linha}.id, '{operacao}' FROM tabela_versoes WHERE tabela = 'clientes_alteracoes';
+"""
+GATILHOS_SQLITE = [
+    f"CREATE TRIGGER clientes_alteracoes_{operacao} AFTER {operacao.upper()} ON clientes "
+    f"BEGIN {REGISTRAR_SQLITE.format(linha=linha, operacao=operacao)} END"
+    for operacao, linha in (("insert", "NEW"), ("update", "NEW"), ("delete", "OLD"))
+]
+
+GATILHOS_POSTGRESQL = [
+    """
+    CREATE OR REPLACE FUNCTION clientes_alteracoes_registrar() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    DECLARE
+        quantidade bigint;
+        ultimo bigint;
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            SELECT count(*) INTO quantidade FROM antigas;
+        ELSE
+            SELECT count(*) INTO quantidade FROM novas;
+        END IF;
+        IF quantidade = 0 THEN
+            RETURN NULL;
+        END IF;
+
+        INSERT INTO tabela_versoes AS t (tabela, versao) VALUES ('clientes_alteracoes', quantidade)
+        ON CONFLICT (tabela) DO UPDATE SET versao = t.versao + EXCLUDED.versao
+        RETURNING versao INTO ultimo;
+
+        IF TG_OP = 'DELETE' THEN
+            INSERT INTO clientes_alteracoes (seq, cliente_id, operacao)
+            SELECT ultimo - quantidade + row_number() OVER (ORDER BY id), id, 'delete' FROM antigas;
+        ELSE
+            INSERT INTO clientes_alteracoes (seq, cliente_id, operacao)
+            SELECT ultimo - quantidade + row_number() OVER (ORDER BY id), id, lower(TG_OP) FROM novas;
+        END IF;
+        RETURN NULL;
+    END
+    $$
+    """,
+    "CREATE TRIGGER clientes_alteracoes_insert AFTER INSERT ON clientes REFERENCING NEW TABLE AS novas "
+    "FOR EACH STATEMENT EXECUTE FUNCTION clientes_alteracoes_registrar()",
+    "CREATE TRIGGER clientes_alteracoes_update AFTER UPDATE ON clientes REFERENCING NEW TABLE AS novas "
+    "FOR EACH STATEMENT EXECUTE FUNCTION clientes_alteracoes_registrar()",
+    "CREATE TRIGGER clientes_alteracoes_delete AFTER DELETE ON clientes REFERENCING OLD TABLE AS antigas "
+    "FOR EACH STATEMENT EXECUTE FUNCTION clientes_alteracoes_registrar()",
+]
+
+
+def upgrade():
+    op.create_table('clientes_alteracoes',
+    sa.Column('seq', sa.BigInteger(), autoincrement=False, nullable=False),
+    sa.Column('cliente_id', sa.Integer(), nullable=False),
+    sa.Column('operacao', sa.String(length=6), nullable=False),
+    sa.Column('criado_em', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+    sa.PrimaryKeyConstraint('seq')
+    )
+    op.create_index('ix_clientes_alteracoes_cliente_seq', 'clientes_alteracoes', ['cliente_id', 'seq'], unique=False)
+
+    # Clientes já existentes não entram no feed: consumidores começam por
+    # GET /clientes/changes sem since (posição 0) seguido de /clientes/export
+    postgresql = op.get_bind().dialect.name == 'postgresql'
+    for comando in GATILHOS_POSTGRESQL if postgresql else GATILHOS_SQLITE:
+        op.execute(comando)
+
+
+def downgrade():
+    postgresql = op.get_bind().dialect.name == 'postgresql'
+    for gatilho in ('clientes_alteracoes_insert', 'clientes_alteracoes_update', 'clientes_alteracoes_delete'):
+        op.execute(f'DROP TRIGGER IF EXISTS {gatilho} ON clientes' if postgresql else f'DROP TRIGGER IF EXISTS {gatilho}')
+    if postgresql:
+        op.execute('DROP FUNCTION IF EXISTS clientes_alteracoes_registrar()')
+    op.execute("DELETE FROM tabela_versoes WHERE tabela IN ('clientes_alteracoes', 'clientes_alteracoes_podadas')")
+    op.drop_index('ix_clientes_alteracoes_cliente_seq', table_name='clientes_alteracoes')
+    op.drop_table('clientes_alteracoes')
@@ -0,0 +1,51 @@
+"""Índices de filtro e ordenação da listagem (agencia, tipo_conta, bandeira)
+
+Revision ID: b52e7c1d0f3a
+Revises: 8d1f6b2a9c47
+Create Date: 2026-10-17 16:40:52.903114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b52e7c1d0f3a'
+down_revision = '8d1f6b2a9c47'
+branch_labels = None
+depends_on = None
+
+# (campo, id) atende ao filtro por igualdade e à paginação por cursor em `sort`;
+# a bandeira é opcional e é indexada com a mesma expressão usada pela aplicação
+INDICES = {
+    'ix_clientes_agencia_id': 'agencia, id',
+    'ix_clientes_tipo_conta_id': 'tipo_conta, id',
+    'ix_clientes_bandeira_id': "coalesce(bandeira_cartao_credito, ''), id",
+}
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        op.create_index('ix_clientes_agencia_id', 'clientes', ['agencia', 'id'])
+        op.create_index('ix_clientes_tipo_conta_id', 'clientes', ['tipo_conta', 'id'])
+        op.create_index(
+            'ix_clientes_bandeira_id', 'clientes',
+            [sa.text("coalesce(bandeira_cartao_credito, '')"), 'id']
+        )
+        return
+
+    # CONCURRENTLY não bloqueia escritas durante a criação em tabelas grandes
+    with op.get_context().autocommit_block():
+        for nome, colunas in INDICES.items():
+            op.execute(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {nome} ON clientes ({colunas})')
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        for nome in INDICES:
+            op.drop_index(nome, table_name='clientes')
+        return
+
+    with op.get_context().autocommit_block():
+        for nome in INDICES:
+            op.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {nome}')
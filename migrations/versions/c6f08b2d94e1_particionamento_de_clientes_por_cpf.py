@@ -0,0 +1,210 @@
+"""Tabela clientes particionada por hash do CPF (PostgreSQL), com cópia online
+
+Revision ID: c6f08b2d94e1
+Revises: a91d4e6c3b70
+Create Date: 2026-10-17 21:03:26.740915
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c6f08b2d94e1'
+down_revision = 'a91d4e6c3b70'
+branch_labels = None
+depends_on = None
+
+# Número de partições: HASH não permite mudar sem recriar a tabela, então
+# escolher com folga (cada partição deve ficar confortável para o VACUUM)
+PARTICOES = 8
+# Linhas copiadas por transação na cópia online
+TAMANHO_LOTE = 10000
+
+COLUNAS = (
+    'id', 'cpf', 'nome', 'email', 'telefone', 'agencia', 'conta', 'tipo_conta',
+    'cartao_credito', 'bandeira_cartao_credito', 'cartao_debito', 'versao',
+)
+LISTA_COLUNAS = ', '.join(COLUNAS)
+DEFINICAO_COLUNAS = """
+    id integer NOT NULL DEFAULT nextval('clientes_id_seq'::regclass),
+    cpf varchar(14) NOT NULL,
+    nome varchar(100) NOT NULL,
+    email varchar(100) NOT NULL,
+    telefone varchar(15) NOT NULL,
+    agencia varchar(10) NOT NULL,
+    conta varchar(10) NOT NULL,
+    tipo_conta varchar(19) NOT NULL,
+    cartao_credito varchar(20),
+    bandeira_cartao_credito varchar(20),
+    cartao_debito varchar(19) NOT NULL,
+    versao integer NOT NULL DEFAULT 1"""
+
+# Índices das revisões 3e24e2a4a244 e b52e7c1d0f3a, recriados na tabela nova.
+# ix_clientes_email substitui o índice da restrição única de email para as buscas.
+INDICES = {
+    'ix_clientes_nome_trgm': 'USING gin (lower(f_unaccent(nome)) gin_trgm_ops)',
+    'ix_clientes_agencia_id': '(agencia, id)',
+    'ix_clientes_tipo_conta_id': '(tipo_conta, id)',
+    'ix_clientes_bandeira_id': "(coalesce(bandeira_cartao_credito, ''), id)",
+}
+INDICE_EMAIL = 'ix_clientes_email'
+
+# Cópia dos gatilhos de clientes_resumo (e7a3c9f15b28) e clientes_alteracoes
+# (a91d4e6c3b70). As funções não mudam; só os gatilhos pertencem à tabela.
+GATILHOS = {
+    'clientes_resumo_insert': "AFTER INSERT ON clientes REFERENCING NEW TABLE AS novas "
+        "FOR EACH STATEMENT EXECUTE FUNCTION clientes_resumo_aplicar()",
+    'clientes_resumo_update': "AFTER UPDATE ON clientes REFERENCING OLD TABLE AS antigas "
+        "NEW TABLE AS novas FOR EACH STATEMENT EXECUTE FUNCTION clientes_resumo_aplicar()",
+    'clientes_resumo_delete': "AFTER DELETE ON clientes REFERENCING OLD TABLE AS antigas "
+        "FOR EACH STATEMENT EXECUTE FUNCTION clientes_resumo_aplicar()",
+    'clientes_alteracoes_insert': "AFTER INSERT ON clientes REFERENCING NEW TABLE AS novas "
+        "FOR EACH STATEMENT EXECUTE FUNCTION clientes_alteracoes_registrar()",
+    'clientes_alteracoes_update': "AFTER UPDATE ON clientes REFERENCING NEW TABLE AS novas "
+        "FOR EACH STATEMENT EXECUTE FUNCTION clientes_alteracoes_registrar()",
+    'clientes_alteracoes_delete': "AFTER DELETE ON clientes REFERENCING OLD TABLE AS antigas "
+        "FOR EACH STATEMENT EXECUTE FUNCTION clientes_alteracoes_registrar()",
+}
+
+# Restrições únicas em tabela particionada precisam incluir a chave de
+# partição: o email passa a ser único pela tabela clientes_emails, mantida por
+# gatilhos. A violação continua sendo um unique_violation com "email" no nome.
+EMAILS_POSTGRESQL = [
+    """
+    CREATE TABLE clientes_emails (
+        email varchar(100) NOT NULL,
+        cliente_id integer NOT NULL,
+        CONSTRAINT clientes_emails_pkey PRIMARY KEY (email)
+    )
+    """,
+    """
+    CREATE OR REPLACE FUNCTION clientes_emails_manter() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            DELETE FROM clientes_emails WHERE email = OLD.email AND cliente_id = OLD.id;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            INSERT INTO clientes_emails (email, cliente_id) VALUES (NEW.email, NEW.id);
+        END IF;
+        RETURN NULL;
+    END
+    $$
+    """,
+    "CREATE TRIGGER clientes_emails_insert AFTER INSERT ON clientes_particionada "
+    "FOR EACH ROW EXECUTE FUNCTION clientes_emails_manter()",
+    "CREATE TRIGGER clientes_emails_update AFTER UPDATE OF email ON clientes_particionada "
+    "FOR EACH ROW WHEN (OLD.email IS DISTINCT FROM NEW.email) EXECUTE FUNCTION clientes_emails_manter()",
+    "CREATE TRIGGER clientes_emails_delete AFTER DELETE ON clientes_particionada "
+    "FOR EACH ROW EXECUTE FUNCTION clientes_emails_manter()",
+]
+GATILHOS_EMAILS = ('clientes_emails_insert', 'clientes_emails_update', 'clientes_emails_delete')
+
+# Durante a cópia, toda escrita na tabela antiga é repetida na nova. A linha
+# é removida pela chave (id, cpf) antiga, o que também cobre troca de CPF.
+ESPELHAR_POSTGRESQL = [
+    f"""
+    CREATE OR REPLACE FUNCTION clientes_espelhar() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            DELETE FROM clientes_particionada WHERE id = OLD.id AND cpf = OLD.cpf;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            INSERT INTO clientes_particionada ({LISTA_COLUNAS})
+            VALUES ({', '.join(f'NEW.{coluna}' for coluna in COLUNAS)});
+        END IF;
+        RETURN NULL;
+    END
+    $$
+    """,
+    "CREATE TRIGGER clientes_espelhar AFTER INSERT OR UPDATE OR DELETE ON clientes "
+    "FOR EACH ROW EXECUTE FUNCTION clientes_espelhar()",
+]
+
+
+def _criar_gatilhos():
+    for nome, definicao in GATILHOS.items():
+        op.execute(f'CREATE TRIGGER {nome} {definicao}')
+
+
+def _remover_gatilhos(nomes):
+    for nome in nomes:
+        op.execute(f'DROP TRIGGER IF EXISTS {nome} ON clientes')
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        # SQLite (testes e desenvolvimento) continua com a tabela única
+        return
+
+    # 1. Tabela nova vazia, com partições, índices e unicidade de email. O
+    #    espelhamento entra na mesma transação: ao fim dela, toda escrita em
+    #    clientes já chega também à tabela nova.
+    op.execute(f'CREATE TABLE clientes_particionada ({DEFINICAO_COLUNAS},'
+               ' CONSTRAINT clientes_particionada_pkey PRIMARY KEY (id, cpf),'
+               ' CONSTRAINT clientes_particionada_cpf_key UNIQUE (cpf)'
+               ') PARTITION BY HASH (cpf)')
+    for resto in range(PARTICOES):
+        op.execute(f'CREATE TABLE clientes_p{resto} PARTITION OF clientes_particionada '
+                   f'FOR VALUES WITH (MODULUS {PARTICOES}, REMAINDER {resto})')
+    for nome, definicao in {**INDICES, INDICE_EMAIL: '(email)'}.items():
+        # Sem CONCURRENTLY: a tabela ainda está vazia e ninguém a usa
+        op.execute(f'CREATE INDEX {nome}_novo ON clientes_particionada {definicao}')
+    for comando in EMAILS_POSTGRESQL + ESPELHAR_POSTGRESQL:
+        op.execute(comando)
+
+    # 2. Cópia em lotes, um commit por lote. FOR SHARE espera escritas em
+    #    andamento e lê a versão mais recente de cada linha; o que o
+    #    espelhamento já gravou é ignorado pelo ON CONFLICT.
+    conexao = op.get_bind()
+    with op.get_context().autocommit_block():
+        inicio, fim = conexao.execute(sa.text('SELECT min(id), max(id) FROM clientes')).one()
+        if inicio is not None:
+            for de in range(inicio - 1, fim, TAMANHO_LOTE):
+                conexao.execute(sa.text(
+                    f'INSERT INTO clientes_particionada ({LISTA_COLUNAS}) '
+                    f'SELECT {LISTA_COLUNAS} FROM clientes WHERE id > :de AND id <= :ate FOR SHARE '
+                    'ON CONFLICT DO NOTHING'
+                ), {'de': de, 'ate': de + TAMANHO_LOTE})
+        conexao.execute(sa.text('ANALYZE clientes_particionada'))
+
+    # 3. Troca: o único trecho que bloqueia a tabela, sem cópia de dados
+    op.execute('LOCK TABLE clientes IN ACCESS EXCLUSIVE MODE')
+    _remover_gatilhos(['clientes_espelhar', *GATILHOS])
+    op.execute('DROP FUNCTION clientes_espelhar()')
+    op.execute('ALTER TABLE clientes RENAME TO clientes_plana')
+    op.execute('ALTER TABLE clientes_particionada RENAME TO clientes')
+    op.execute('ALTER SEQUENCE clientes_id_seq OWNED BY clientes.id')
+    op.execute('DROP TABLE clientes_plana')
+    op.execute('ALTER TABLE clientes RENAME CONSTRAINT clientes_particionada_pkey TO clientes_pkey')
+    op.execute('ALTER TABLE clientes RENAME CONSTRAINT clientes_particionada_cpf_key TO clientes_cpf_key')
+    for nome in [*INDICES, INDICE_EMAIL]:
+        op.execute(f'ALTER INDEX {nome}_novo RENAME TO {nome}')
+    _criar_gatilhos()
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    # Volta para a tabela única com as escritas bloqueadas durante a cópia
+    op.execute('LOCK TABLE clientes IN ACCESS EXCLUSIVE MODE')
+    _remover_gatilhos([*GATILHOS, *GATILHOS_EMAILS])
+    op.execute(f'CREATE TABLE clientes_plana ({DEFINICAO_COLUNAS},'
+               ' CONSTRAINT clientes_plana_pkey PRIMARY KEY (id),'
+               ' CONSTRAINT clientes_plana_cpf_key UNIQUE (cpf),'
+               ' CONSTRAINT clientes_plana_email_key UNIQUE (email))')
+    op.execute(f'INSERT INTO clientes_plana ({LISTA_COLUNAS}) SELECT {LISTA_COLUNAS} FROM clientes')
+    op.execute('ALTER TABLE clientes RENAME TO clientes_particionada')
+    op.execute('ALTER TABLE clientes_plana RENAME TO clientes')
+    op.execute('ALTER SEQUENCE clientes_id_seq OWNED BY clientes.id')
+    op.execute('DROP TABLE clientes_particionada')
+    op.execute('DROP TABLE clientes_emails')
+    op.execute('DROP FUNCTION clientes_emails_manter()')
+    for restricao in ('pkey', 'cpf_key', 'email_key'):
+        op.execute(f'ALTER TABLE clientes RENAME CONSTRAINT clientes_plana_{restricao} TO clientes_{restricao}')
+    for nome, definicao in INDICES.items():
+        op.execute(f'CREATE INDEX {nome} ON clientes {definicao}')
+    _criar_gatilhos()
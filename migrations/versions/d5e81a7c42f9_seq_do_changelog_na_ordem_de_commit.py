@@ -0,0 +1,169 @@
+"""seq do changelog dado na leitura, sem contador travado pelas escritas
+
+Revision ID: d5e81a7c42f9
+Revises: c6f08b2d94e1
+Create Date: 2026-10-17 23:18:52.904316
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5e81a7c42f9'
+down_revision = 'c6f08b2d94e1'
+branch_labels = None
+depends_on = None
+
+GATILHOS_TABELA = ('clientes_alteracoes_insert', 'clientes_alteracoes_update', 'clientes_alteracoes_delete')
+
+# Cópia dos gatilhos de app/service/alteracoes.py no momento desta revisão. No
+# SQLite eles não mudam: só são recriados junto com a tabela.
+REGISTRAR_SQLITE = """
+    INSERT INTO tabela_versoes (tabela, versao) VALUES ('clientes_alteracoes', 1)
+    ON CONFLICT (tabela) DO UPDATE SET versao = versao + 1;
+    INSERT INTO clientes_alteracoes (seq, cliente_id, operacao)
+    SELECT versao, {linha}.id, '{operacao}' FROM tabela_versoes WHERE tabela = 'clientes_alteracoes';
+"""
+GATILHOS_SQLITE = [
+    f"CREATE TRIGGER clientes_alteracoes_{operacao} AFTER {operacao.upper()} ON clientes "
+    f"BEGIN {REGISTRAR_SQLITE.format(linha=linha, operacao=operacao)} END"
+    for operacao, linha in (("insert", "NEW"), ("update", "NEW"), ("delete", "OLD"))
+]
+
+ESTRUTURA_POSTGRESQL = [
+    "ALTER TABLE clientes_alteracoes ADD COLUMN xid xid8 NOT NULL DEFAULT pg_current_xact_id()",
+    "CREATE INDEX ix_clientes_alteracoes_pendentes ON clientes_alteracoes (id) WHERE seq IS NULL",
+]
+REGISTRAR_POSTGRESQL = """
+    CREATE OR REPLACE FUNCTION clientes_alteracoes_registrar() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            INSERT INTO clientes_alteracoes (cliente_id, operacao)
+            SELECT id, 'delete' FROM antigas ORDER BY id;
+        ELSE
+            INSERT INTO clientes_alteracoes (cliente_id, operacao)
+            SELECT id, lower(TG_OP) FROM novas ORDER BY id;
+        END IF;
+        RETURN NULL;
+    END
+    $$
+"""
+# Função da revisão a91d4e6c3b70, restaurada no downgrade
+REGISTRAR_POSTGRESQL_ANTERIOR = """
+    CREATE OR REPLACE FUNCTION clientes_alteracoes_registrar() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    DECLARE
+        quantidade bigint;
+        ultimo bigint;
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            SELECT count(*) INTO quantidade FROM antigas;
+        ELSE
+            SELECT count(*) INTO quantidade FROM novas;
+        END IF;
+        IF quantidade = 0 THEN
+            RETURN NULL;
+        END IF;
+
+        INSERT INTO tabela_versoes AS t (tabela, versao) VALUES ('clientes_alteracoes', quantidade)
+        ON CONFLICT (tabela) DO UPDATE SET versao = t.versao + EXCLUDED.versao
+        RETURNING versao INTO ultimo;
+
+        IF TG_OP = 'DELETE' THEN
+            INSERT INTO clientes_alteracoes (seq, cliente_id, operacao)
+            SELECT ultimo - quantidade + row_number() OVER (ORDER BY id), id, 'delete' FROM antigas;
+        ELSE
+            INSERT INTO clientes_alteracoes (seq, cliente_id, operacao)
+            SELECT ultimo - quantidade + row_number() OVER (ORDER BY id), id, lower(TG_OP) FROM novas;
+        END IF;
+        RETURN NULL;
+    END
+    $$
+"""
+
+
+def _recriar_tabela_sqlite(colunas, restricoes, copia, indice):
+    # O SQLite não troca a chave primária de uma tabela: ela é recriada, e os
+    # gatilhos que gravam nela saem antes e voltam depois
+    for gatilho in GATILHOS_TABELA:
+        op.execute(f'DROP TRIGGER IF EXISTS {gatilho}')
+    op.create_table('_clientes_alteracoes_nova', *colunas,
+        sa.Column('cliente_id', sa.Integer(), nullable=False),
+        sa.Column('operacao', sa.String(length=6), nullable=False),
+        sa.Column('criado_em', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        *restricoes
+    )
+    op.execute(
+        f'INSERT INTO _clientes_alteracoes_nova ({copia[0]}, cliente_id, operacao, criado_em) '
+        f'SELECT {copia[1]}, cliente_id, operacao, criado_em FROM clientes_alteracoes'
+    )
+    op.drop_table('clientes_alteracoes')
+    op.rename_table('_clientes_alteracoes_nova', 'clientes_alteracoes')
+    op.create_index(indice[0], 'clientes_alteracoes', indice[1], unique=False)
+    for comando in GATILHOS_SQLITE:
+        op.execute(comando)
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        _recriar_tabela_sqlite(
+            (sa.Column('id', sa.Integer(), nullable=False), sa.Column('seq', sa.BigInteger(), nullable=True)),
+            (sa.PrimaryKeyConstraint('id'), sa.UniqueConstraint('seq')),
+            ('id, seq', 'seq, seq'), ('ix_clientes_alteracoes_cliente', ['cliente_id', 'id']),
+        )
+        return
+
+    # As entradas existentes mantêm o seq e recebem id igual a ele
+    op.drop_constraint('clientes_alteracoes_pkey', 'clientes_alteracoes', type_='primary')
+    op.alter_column('clientes_alteracoes', 'seq', existing_type=sa.BigInteger(), nullable=True)
+    op.add_column('clientes_alteracoes', sa.Column('id', sa.BigInteger(), nullable=True))
+    op.execute('UPDATE clientes_alteracoes SET id = seq')
+    op.execute('CREATE SEQUENCE clientes_alteracoes_id_seq OWNED BY clientes_alteracoes.id')
+    op.execute("SELECT setval('clientes_alteracoes_id_seq', coalesce(max(id), 0) + 1, false) FROM clientes_alteracoes")
+    op.alter_column(
+        'clientes_alteracoes', 'id', existing_type=sa.BigInteger(), nullable=False,
+        server_default=sa.text("nextval('clientes_alteracoes_id_seq'::regclass)"),
+    )
+    op.create_primary_key('clientes_alteracoes_pkey', 'clientes_alteracoes', ['id'])
+    op.create_unique_constraint('clientes_alteracoes_seq_key', 'clientes_alteracoes', ['seq'])
+    op.drop_index('ix_clientes_alteracoes_cliente_seq', table_name='clientes_alteracoes')
+    op.create_index('ix_clientes_alteracoes_cliente', 'clientes_alteracoes', ['cliente_id', 'id'], unique=False)
+    for comando in ESTRUTURA_POSTGRESQL:
+        op.execute(comando)
+    # Os gatilhos continuam os mesmos: só a função que eles chamam muda
+    op.execute(REGISTRAR_POSTGRESQL)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        _recriar_tabela_sqlite(
+            (sa.Column('seq', sa.BigInteger(), autoincrement=False, nullable=False),),
+            (sa.PrimaryKeyConstraint('seq'),),
+            ('seq', 'seq'), ('ix_clientes_alteracoes_cliente_seq', ['cliente_id', 'seq']),
+        )
+        return
+
+    op.execute(REGISTRAR_POSTGRESQL_ANTERIOR)
+    # Entradas ainda sem seq recebem os próximos, em ordem de id, e o contador acompanha
+    op.execute("""
+        UPDATE clientes_alteracoes AS a SET seq = c.ultimo + p.n
+        FROM (SELECT id, row_number() OVER (ORDER BY id) AS n FROM clientes_alteracoes WHERE seq IS NULL) AS p,
+             (SELECT coalesce(max(versao), 0) AS ultimo FROM tabela_versoes WHERE tabela = 'clientes_alteracoes') AS c
+        WHERE a.id = p.id
+    """)
+    op.execute("""
+        INSERT INTO tabela_versoes AS t (tabela, versao)
+        SELECT 'clientes_alteracoes', max(seq) FROM clientes_alteracoes HAVING max(seq) IS NOT NULL
+        ON CONFLICT (tabela) DO UPDATE SET versao = greatest(t.versao, EXCLUDED.versao)
+    """)
+    op.drop_index('ix_clientes_alteracoes_pendentes', table_name='clientes_alteracoes')
+    op.drop_column('clientes_alteracoes', 'xid')
+    op.drop_index('ix_clientes_alteracoes_cliente', table_name='clientes_alteracoes')
+    op.create_index('ix_clientes_alteracoes_cliente_seq', 'clientes_alteracoes', ['cliente_id', 'seq'], unique=False)
+    op.drop_constraint('clientes_alteracoes_seq_key', 'clientes_alteracoes', type_='unique')
+    op.drop_constraint('clientes_alteracoes_pkey', 'clientes_alteracoes', type_='primary')
+    op.drop_column('clientes_alteracoes', 'id')
+    op.alter_column('clientes_alteracoes', 'seq', existing_type=sa.BigInteger(), nullable=False)
+    op.create_primary_key('clientes_alteracoes_pkey', 'clientes_alteracoes', ['seq'])
@@ -0,0 +1,107 @@
+"""Tabela clientes_resumo mantida por gatilhos (GET /clientes/stats)
+
+Revision ID: e7a3c9f15b28
+Revises: b52e7c1d0f3a
+Create Date: 2026-10-17 18:05:37.264810
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7a3c9f15b28'
+down_revision = 'b52e7c1d0f3a'
+branch_labels = None
+depends_on = None
+
+# Cópia dos gatilhos de app/service/estatisticas.py no momento desta revisão
+GRUPO_SQLITE = (
+    "agencia = {linha}.agencia AND tipo_conta = {linha}.tipo_conta "
+    "AND bandeira = coalesce({linha}.bandeira_cartao_credito, '')"
+)
+INCREMENTAR_SQLITE = """
+    INSERT INTO clientes_resumo (agencia, tipo_conta, bandeira, total)
+    VALUES (NEW.agencia, NEW.tipo_conta, coalesce(NEW.bandeira_cartao_credito, ''), 1)
+    ON CONFLICT (agencia, tipo_conta, bandeira) DO UPDATE SET total = total + 1;
+"""
+DECREMENTAR_SQLITE = f"""
+    UPDATE clientes_resumo SET total = total - 1 WHERE {GRUPO_SQLITE.format(linha="OLD")};
+    DELETE FROM clientes_resumo WHERE {GRUPO_SQLITE.format(linha="OLD")} AND total <= 0;
+"""
+GATILHOS_SQLITE = [
+    f"CREATE TRIGGER clientes_resumo_insert AFTER INSERT ON clientes BEGIN {INCREMENTAR_SQLITE} END",
+    f"CREATE TRIGGER clientes_resumo_delete AFTER DELETE ON clientes BEGIN {DECREMENTAR_SQLITE} END",
+    f"""
+    CREATE TRIGGER clientes_resumo_update AFTER UPDATE OF agencia, tipo_conta, bandeira_cartao_credito ON clientes
+    WHEN OLD.agencia IS NOT NEW.agencia OR OLD.tipo_conta IS NOT NEW.tipo_conta
+        OR OLD.bandeira_cartao_credito IS NOT NEW.bandeira_cartao_credito
+    BEGIN {DECREMENTAR_SQLITE} {INCREMENTAR_SQLITE} END
+    """,
+]
+
+DELTA_POSTGRESQL = """
+        INSERT INTO clientes_resumo AS r (agencia, tipo_conta, bandeira, total)
+        SELECT agencia, tipo_conta, coalesce(bandeira_cartao_credito, ''), sum(n)
+        FROM ({fonte}) AS delta
+        GROUP BY 1, 2, 3 HAVING sum(n) <> 0 ORDER BY 1, 2, 3
+        ON CONFLICT (agencia, tipo_conta, bandeira) DO UPDATE SET total = r.total + EXCLUDED.total;"""
+NOVAS = "SELECT agencia, tipo_conta, bandeira_cartao_credito, 1 AS n FROM novas"
+ANTIGAS = "SELECT agencia, tipo_conta, bandeira_cartao_credito, -1 AS n FROM antigas"
+GATILHOS_POSTGRESQL = [
+    f"""
+    CREATE OR REPLACE FUNCTION clientes_resumo_aplicar() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN{DELTA_POSTGRESQL.format(fonte=NOVAS)}
+        ELSIF TG_OP = 'DELETE' THEN{DELTA_POSTGRESQL.format(fonte=ANTIGAS)}
+        ELSE{DELTA_POSTGRESQL.format(fonte=f"{ANTIGAS} UNION ALL {NOVAS}")}
+        END IF;
+        IF TG_OP <> 'INSERT' THEN
+            DELETE FROM clientes_resumo WHERE total <= 0;
+        END IF;
+        RETURN NULL;
+    END
+    $$
+    """,
+    "CREATE TRIGGER clientes_resumo_insert AFTER INSERT ON clientes REFERENCING NEW TABLE AS novas "
+    "FOR EACH STATEMENT EXECUTE FUNCTION clientes_resumo_aplicar()",
+    "CREATE TRIGGER clientes_resumo_update AFTER UPDATE ON clientes REFERENCING OLD TABLE AS antigas "
+    "NEW TABLE AS novas FOR EACH STATEMENT EXECUTE FUNCTION clientes_resumo_aplicar()",
+    "CREATE TRIGGER clientes_resumo_delete AFTER DELETE ON clientes REFERENCING OLD TABLE AS antigas "
+    "FOR EACH STATEMENT EXECUTE FUNCTION clientes_resumo_aplicar()",
+]
+
+
+def upgrade():
+    op.create_table('clientes_resumo',
+    sa.Column('agencia', sa.String(length=10), nullable=False),
+    sa.Column('tipo_conta', sa.String(length=19), nullable=False),
+    sa.Column('bandeira', sa.String(length=20), nullable=False),
+    sa.Column('total', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('agencia', 'tipo_conta', 'bandeira')
+    )
+
+    postgresql = op.get_bind().dialect.name == 'postgresql'
+    if postgresql:
+        # Gatilhos e carga inicial na mesma transação, com escritas bloqueadas:
+        # nenhuma linha fica fora do resumo ou é contada duas vezes
+        op.execute('LOCK TABLE clientes IN SHARE ROW EXCLUSIVE MODE')
+    for comando in GATILHOS_POSTGRESQL if postgresql else GATILHOS_SQLITE:
+        op.execute(comando)
+    op.execute("""
+        INSERT INTO clientes_resumo (agencia, tipo_conta, bandeira, total)
+        SELECT agencia, tipo_conta, coalesce(bandeira_cartao_credito, ''), count(*)
+        FROM clientes GROUP BY agencia, tipo_conta, coalesce(bandeira_cartao_credito, '')
+    """)
+
+
+def downgrade():
+    for gatilho in ('clientes_resumo_insert', 'clientes_resumo_update', 'clientes_resumo_delete'):
+        if op.get_bind().dialect.name == 'postgresql':
+            op.execute(f'DROP TRIGGER IF EXISTS {gatilho} ON clientes')
+        else:
+            op.execute(f'DROP TRIGGER IF EXISTS {gatilho}')
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('DROP FUNCTION IF EXISTS clientes_resumo_aplicar()')
+    op.drop_table('clientes_resumo')
@@ -1,3 +1,5 @@
+from os import getenv
+
 from app import create_app
 
 app = create_app()
@@ -7,4 +9,5 @@ if __name__ == "__main__":
     FLASK_RUN_PORT = getenv("FLASK_RUN_PORT")
     FLASK_RUN_HOST = getenv("FLASK_RUN_HOST")
 
-    app.run(port=FLASK_RUN_PORT, host=FLASK_RUN_HOST, debug=True)
\ No newline at end of file
+    # Servidor de desenvolvimento; em produção use wsgi.py (gunicorn ou waitress)
+    app.run(port=FLASK_RUN_PORT, host=FLASK_RUN_HOST, debug=getenv("FLASK_DEBUG", "1") == "1")
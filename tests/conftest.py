@@ -0,0 +1,73 @@
+import os
+
+import pytest
+
+from app import TestConfig, create_app, db
+from app.db_models import ClienteDB
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _novo_cliente(n, **campos):
+    return {
+        "cpf": f"9{n:03d}", "nome": f"Cliente {n}", "email": f"cliente{n}@test.com", "telefone": "111111",
+        "agencia": "0001", "conta": str(n), "tipo_conta": "C", "cartao_debito": str(n), **campos,
+    }
+
+
+@pytest.fixture
+def novo_cliente():
+    """Payload de cadastro válido e único para cada `n`; `campos` sobrescreve valores."""
+    return _novo_cliente
+
+
+@pytest.fixture
+def criar_app(tmp_path):
+    """Fábrica de apps de teste.
+
+    Por padrão o banco é um SQLite em arquivo no tmp_path, com as tabelas
+    criadas e `clientes` (payloads) gravados direto nele. O resto dos
+    argumentos sobrescreve a TestConfig.
+    """
+    def criar(uri=None, clientes=(), criar_tabelas=True, **config):
+        class AppTestConfig(TestConfig):
+            SQLALCHEMY_DATABASE_URI = uri or f"sqlite:///{tmp_path / 'clientes.db'}"
+
+        for chave, valor in config.items():
+            setattr(AppTestConfig, chave, valor)
+        app = create_app(AppTestConfig)
+        if criar_tabelas:
+            with app.app_context():
+                db.create_all()
+                db.session.add_all([ClienteDB(**dados) for dados in clientes])
+                db.session.commit()
+        return app
+
+    return criar
+
+
+@pytest.fixture
+def config_app():
+    """Argumentos de `criar_app` para o fixture `app`; cada módulo sobrescreve o que precisa."""
+    return {}
+
+
+@pytest.fixture
+def app(criar_app, config_app):
+    # O pytest-flask monta o fixture `client` (app.test_client()) a partir deste
+    return criar_app(**config_app)
+
+
+@pytest.fixture
+def na_raiz(monkeypatch):
+    # O Flask-Migrate procura a pasta migrations/ no diretório atual
+    monkeypatch.chdir(RAIZ)
+
+
+@pytest.fixture
+def url_postgresql():
+    # Banco PostgreSQL descartável, para os testes que só fazem sentido nele
+    url = os.getenv("TEST_POSTGRESQL_URL")
+    if not url:
+        pytest.skip("TEST_POSTGRESQL_URL não definida")
+    return url
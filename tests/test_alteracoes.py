@@ -0,0 +1,175 @@
+import threading
+import time
+import uuid
+
+import pytest
+from sqlalchemy import text
+
+from app import db
+
+
+@pytest.fixture
+def config_app():
+    return {"CHANGES_POLL_INTERVAL": 0.05, "CHANGES_MAX_WAIT_SECONDS": 2}
+
+
+def test_feed_registra_escritas_em_ordem(client, novo_cliente):
+    inicio = client.get("/clientes/changes").get_json()
+    assert inicio["next_since"] == 0 and inicio["data"] == []
+
+    for n in (1, 2, 3):
+        assert client.post("/clientes/", json=novo_cliente(n)).status_code == 201
+    assert client.patch("/clientes/1", json={"nome": "Renomeado"}).status_code == 200
+    assert client.delete("/clientes/2").status_code == 200
+
+    pagina = client.get("/clientes/changes?since=0&limit=3").get_json()
+    assert [(e["seq"], e["id"], e["op"]) for e in pagina["data"]] == [(1, 1, "insert"), (2, 2, "insert"), (3, 3, "insert")]
+    assert pagina["has_more"] is True
+    assert pagina["data"][0]["cliente"]["nome"] == "Renomeado"  # estado atual, não o da época
+    assert pagina["data"][1]["cliente"] is None  # removido depois
+
+    resto = client.get(f"/clientes/changes?since={pagina['next_since']}").get_json()
+    assert [(e["id"], e["op"]) for e in resto["data"]] == [(1, "update"), (2, "delete")]
+    assert resto["next_since"] == 5 and resto["has_more"] is False
+
+    vazio = client.get("/clientes/changes?since=5").get_json()
+    assert vazio["data"] == [] and vazio["next_since"] == 5
+
+def test_feed_inclui_escritas_fora_da_api(app):
+    with app.app_context():
+        db.session.execute(text(
+            "INSERT INTO clientes (cpf, nome, email, telefone, agencia, conta, tipo_conta, cartao_debito, versao) "
+            "VALUES ('8009', 'Direto', 'direto@test.com', '1', '0001', '9', 'C', '9', 1)"
+        ))
+        db.session.commit()
+
+    dados = app.test_client().get("/clientes/changes?since=0").get_json()["data"]
+    assert [(e["op"], e["cliente"]["nome"]) for e in dados] == [("insert", "Direto")]
+
+def test_long_poll_retorna_quando_ha_alteracao(app, client, novo_cliente):
+
+    def cadastrar_depois():
+        time.sleep(0.3)
+        app.test_client().post("/clientes/", json=novo_cliente(1))
+
+    escritor = threading.Thread(target=cadastrar_depois)
+    escritor.start()
+    inicio = time.monotonic()
+    response = client.get("/clientes/changes?since=0&wait=2")
+    escritor.join()
+
+    assert response.status_code == 200
+    assert [e["op"] for e in response.get_json()["data"]] == ["insert"]
+    assert time.monotonic() - inicio < 1.5
+
+    inicio = time.monotonic()
+    vazio = client.get("/clientes/changes?since=1&wait=1").get_json()
+    assert vazio["data"] == [] and time.monotonic() - inicio >= 1
+
+def test_compactacao_e_posicao_expirada(app, client, novo_cliente):
+    for n in (1, 2):
+        client.post("/clientes/", json=novo_cliente(n))
+    client.patch("/clientes/1", json={"nome": "Outro"})
+    client.patch("/clientes/1", json={"nome": "Mais um"})
+
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=["clientes", "compactar-alteracoes"])
+    assert result.exit_code == 0, result.output
+    assert "2 substituídas, 0 podadas" in result.output
+
+    # Quem estava em qualquer ponto continua chegando ao estado final
+    dados = client.get("/clientes/changes?since=1").get_json()["data"]
+    assert [(e["seq"], e["id"], e["op"]) for e in dados] == [(2, 2, "insert"), (4, 1, "update")]
+
+    with app.app_context():
+        # criado_em tem resolução de segundos: envelhece as entradas em vez de esperar
+        db.session.execute(text("UPDATE clientes_alteracoes SET criado_em = '2000-01-01 00:00:00'"))
+        db.session.commit()
+    result = runner.invoke(args=["clientes", "compactar-alteracoes", "--reter-dias", "1"])
+    assert "0 substituídas, 2 podadas" in result.output
+
+    response = client.get("/clientes/changes?since=1")
+    assert response.status_code == 410
+    assert client.get("/clientes/changes?since=4").get_json()["data"] == []
+
+    client.delete("/clientes/2")
+    dados = client.get("/clientes/changes?since=4").get_json()["data"]
+    assert [(e["seq"], e["op"]) for e in dados] == [(5, "delete")]
+
+def test_long_poll_limitado_por_processo(app, client):
+    comecou = time.monotonic()
+    respostas = {}
+
+    def esperar():
+        respostas["primeira"] = app.test_client().get("/clientes/changes?since=0&wait=1")
+
+    # A única vaga do processo fica com a primeira requisição; a segunda responde na hora
+    esperando = threading.Thread(target=esperar)
+    esperando.start()
+    time.sleep(0.2)
+    inicio = time.monotonic()
+    response = client.get("/clientes/changes?since=0&wait=1")
+    assert time.monotonic() - inicio < 0.5
+    assert response.get_json()["data"] == []
+    assert response.headers["Retry-After"] == "1"
+    esperando.join()
+    assert time.monotonic() - comecou >= 1
+    assert "Retry-After" not in respostas["primeira"].headers
+
+    # Vaga liberada: a próxima espera de novo
+    inicio = time.monotonic()
+    client.get("/clientes/changes?since=0&wait=1")
+    assert time.monotonic() - inicio >= 1
+
+@pytest.mark.parametrize("consulta", ["since=-1", "since=abc", "limit=0", "limit=5000", "wait=10"])
+def test_parametros_invalidos(client, consulta):
+    response = client.get(f"/clientes/changes?{consulta}")
+    assert response.status_code == 400
+    assert response.get_json()["message"] == "Parâmetros inválidos"
+
+
+def test_feed_postgresql_sem_trava_global(criar_app, url_postgresql, na_raiz):
+    # Só no PostgreSQL o seq é dado na leitura, pela marca d'água
+    app = criar_app(url_postgresql, criar_tabelas=False)
+    result = app.test_cli_runner().invoke(args=["db", "upgrade"])
+    assert result.exit_code == 0, result.output
+    cliente = app.test_client()
+    inicio = cliente.get("/clientes/changes").get_json()["next_since"]
+
+    sufixo = uuid.uuid4().hex[:8]
+    inserir = text(
+        "INSERT INTO clientes (cpf, nome, email, telefone, agencia, conta, tipo_conta, cartao_debito) "
+        "VALUES (:cpf, :nome, :email, '1', :agencia, '1', 'C', '1') RETURNING id"
+    )
+    with app.app_context():
+        lenta = db.engine.connect()
+        rapida = db.engine.connect()
+        try:
+            # A primeira escrita fica aberta; a segunda começa depois e faz commit sem esperar por ela
+            # (agências diferentes: a linha de clientes_resumo do grupo também fica travada)
+            lenta.execute(text("SELECT pg_current_xact_id()"))
+            primeiro = lenta.execute(inserir, {
+                "cpf": f"a{sufixo}", "nome": "Lento", "email": f"a{sufixo}@test.com", "agencia": "9001"
+            }).scalar()
+            rapida.execute(text("SET lock_timeout = '1s'"))
+            segundo = rapida.execute(inserir, {
+                "cpf": f"b{sufixo}", "nome": "Rápido", "email": f"b{sufixo}@test.com", "agencia": "9002"
+            }).scalar()
+            rapida.commit()
+
+            # O commit mais novo fica acima da marca d'água enquanto a transação mais velha não termina
+            pendente = cliente.get(f"/clientes/changes?since={inicio}").get_json()
+            assert pendente["data"] == [] and pendente["next_since"] == inicio
+
+            lenta.commit()
+            dados = cliente.get(f"/clientes/changes?since={inicio}").get_json()["data"]
+            assert [(e["id"], e["op"]) for e in dados] == [(primeiro, "insert"), (segundo, "insert")]
+            assert [e["seq"] for e in dados] == [inicio + 1, inicio + 2]
+            assert cliente.get("/clientes/changes").get_json()["next_since"] == inicio + 2
+        finally:
+            lenta.rollback()
+            rapida.rollback()
+            lenta.execute(text("DELETE FROM clientes WHERE cpf IN (:a, :b)"), {"a": f"a{sufixo}", "b": f"b{sufixo}"})
+            lenta.commit()
+            lenta.close()
+            rapida.close()
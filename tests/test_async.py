@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("quart")
+pytest.importorskip("aiosqlite")
+
+from sqlalchemy import create_engine, text
+
+from app import TestConfig, db
+from app.async_app import create_async_app, url_async
+from app.db_models import ClienteDB
+
+
+@pytest.fixture
+def async_app(tmp_path):
+    uri = f"sqlite:///{tmp_path / 'async.db'}"
+    engine = create_engine(uri)
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(ClienteDB.__table__.insert(), [
+            {"cpf": "111", "nome": "Joao da Silva", "email": "joao@test.com", "telefone": "111111",
+             "agencia": "0001", "conta": "1", "tipo_conta": "C", "cartao_debito": "1"},
+            {"cpf": "222", "nome": "Maria Silva", "email": "maria@test.com", "telefone": "222222",
+             "agencia": "0001", "conta": "2", "tipo_conta": "C", "cartao_debito": "2"},
+        ])
+    engine.dispose()
+
+    class AsyncTestConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = uri
+
+    app = create_async_app(AsyncTestConfig)
+    yield app
+    asyncio.run(app.extensions["async_engine"].dispose())
+
+
+def _executar(app, cenario):
+    async def rodar():
+        return await cenario(app.test_client())
+    return asyncio.run(rodar())
+
+
+def test_url_async():
+    assert str(url_async("postgresql://u:s@localhost/banco")).startswith("postgresql+asyncpg://")
+    assert str(url_async("sqlite:///x.db")) == "sqlite+aiosqlite:///x.db"
+
+def test_async_crud(async_app):
+    async def cenario(client):
+        response = await client.get("/clientes/?nome=silva")
+        assert response.status_code == 200
+        assert len((await response.get_json())["data"]) == 2
+
+        response = await client.post("/clientes/", json={
+            "cpf": "333", "nome": "Ana Async", "email": "ana@test.com", "telefone": "3333",
+            "agencia": "0001", "conta": "3", "tipo_conta": "C", "cartao_debito": "3"
+        })
+        assert response.status_code == 201
+        novo_id = (await response.get_json())["data"]["id"]
+
+        response = await client.post("/clientes/", json={"cpf": "111", "nome": "Dup", "email": "dup@test.com"})
+        assert response.status_code == 409
+
+        response = await client.put(f"/clientes/{novo_id}", json={"cpf": "333", "nome": "Ana Editada", "email": "ana@test.com"})
+        assert (await response.get_json())["data"]["nome"] == "Ana Editada"
+
+        response = await client.get(f"/clientes/{novo_id}")
+        etag = response.headers["ETag"]
+        assert (await client.get(f"/clientes/{novo_id}", headers={"If-None-Match": etag})).status_code == 304
+        # ETag recebida comprimida pelo app WSGI (sufixo da codificação) vale igual
+        comprimida = etag[:-1] + '-gzip"'
+        assert (await client.get(f"/clientes/{novo_id}", headers={"If-None-Match": comprimida})).status_code == 304
+
+        assert (await client.delete(f"/clientes/{novo_id}")).status_code == 200
+        assert (await client.get(f"/clientes/{novo_id}")).status_code == 404
+    _executar(async_app, cenario)
+
+def test_async_requisicoes_concorrentes(async_app):
+    async def cenario(client):
+        respostas = await asyncio.gather(*[client.get(f"/clientes/{1 + i % 2}") for i in range(20)])
+        assert {r.status_code for r in respostas} == {200}
+    _executar(async_app, cenario)
+
+def test_async_if_match_e_escrita_concorrente(async_app, monkeypatch):
+    from app.controller import cliente_async_controller
+
+    async def cenario(client):
+        etag = (await client.get("/clientes/1")).headers["ETag"]
+        dados = {"cpf": "111", "nome": "Editor A", "email": "joao@test.com"}
+        response = await client.put("/clientes/1", json=dados, headers={"If-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+        response = await client.put("/clientes/1", json={**dados, "nome": "Editor B"}, headers={"If-Match": etag})
+        assert response.status_code == 412
+        assert (await client.delete("/clientes/1", headers={"If-Match": etag})).status_code == 412
+
+        # Outra requisição grava o cliente entre a leitura e o UPDATE/DELETE
+        def gravacao_concorrente(session):
+            with session.no_autoflush:
+                session.execute(text("UPDATE clientes SET versao = versao + 1 WHERE id = 1"))
+
+        monkeypatch.setattr(cliente_async_controller, "incrementar_versao", gravacao_concorrente)
+        assert (await client.put("/clientes/1", json={**dados, "nome": "Perdido"})).status_code == 412
+        assert (await client.delete("/clientes/1")).status_code == 412
+
+        monkeypatch.undo()
+        assert (await (await client.get("/clientes/1")).get_json())["data"]["nome"] == "Editor A"
+    _executar(async_app, cenario)
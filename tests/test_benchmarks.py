@@ -0,0 +1,33 @@
+import json
+
+from benchmarks import carga
+
+
+def test_percentil_nearest_rank():
+    valores = list(range(1, 101))
+    assert carga.percentil(valores, 50) == 50
+    assert carga.percentil(valores, 99) == 99
+    assert carga.percentil([7], 95) == 7
+
+def test_carga_em_processo_gera_json(tmp_path):
+    saida = tmp_path / "resultado.json"
+
+    codigo = carga.main([
+        "--database-url", f"sqlite:///{tmp_path / 'bench.db'}",
+        "--clientes", "200", "--requisicoes", "120", "--aquecimento", "0",
+        "--concorrencia", "2", "--saida", str(saida),
+    ])
+
+    assert codigo == 0
+    resultado = json.loads(saida.read_text())
+    assert resultado["total"]["requisicoes"] == 120
+    assert resultado["total"]["erros"] == 0
+    assert set(resultado["operacoes"]) <= set(carga.OPERACOES)
+    assert {"p50_ms", "p95_ms", "p99_ms", "vazao_rps"} <= set(resultado["operacoes"]["get"])
+    assert all(codigo in {"200", "201", "404"} for codigo in resultado["total"]["status"])
+
+def test_comparar_aponta_regressao():
+    base = {"operacoes": {"get": {"p95_ms": 10.0, "vazao_rps": 100.0}}}
+    atual = {"operacoes": {"get": {"p95_ms": 15.0, "vazao_rps": 95.0}}}
+
+    assert carga.comparar(atual, base, tolerancia=0.2) == ["get: p95 10.0 -> 15.0 ms"]
@@ -0,0 +1,111 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from app.service import cache as cache_module
+from app.service.cache import LRUCache, RedisCache, criar_cache
+
+
+class FakeRedis:
+    def __init__(self):
+        self.dados = {}
+
+    def get(self, chave):
+        return self.dados.get(chave)
+
+    def set(self, chave, valor, ex=None):
+        self.dados[chave] = valor.encode()
+
+    def delete(self, *chaves):
+        for chave in chaves:
+            self.dados.pop(chave, None)
+
+    def incr(self, chave):
+        self.dados[chave] = str(int(self.dados.get(chave, b"0")) + 1).encode()
+
+    def expire(self, chave, segundos):
+        pass
+
+    def eval(self, script, numkeys, chave_geracao, chave, geracao, valor, ttl):
+        # Mesma semântica de SCRIPT_PREENCHER
+        if self.dados.get(chave_geracao, b"0").decode() != geracao:
+            return 0
+        self.set(chave, valor, ex=ttl)
+        return 1
+
+    def scan_iter(self, match):
+        prefixo = match.rstrip("*")
+        return [chave for chave in self.dados if chave.startswith(prefixo)]
+
+
+def test_lru_descarta_menos_usado():
+    cache = LRUCache(maxsize=2, ttl=60)
+    cache.set(1, "a")
+    cache.set(2, "b")
+    cache.get(1)
+    cache.set(3, "c")
+    assert cache.get(2) is None
+    assert cache.get(1) == "a"
+    assert cache.get(3) == "c"
+    assert cache.stats()["size"] == 2
+
+def test_lru_expira_por_ttl(monkeypatch):
+    agora = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: agora[0])
+    cache = LRUCache(maxsize=10, ttl=5)
+    cache.set(1, "a")
+    agora[0] += 4
+    assert cache.get(1) == "a"
+    agora[0] += 2
+    assert cache.get(1) is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+def test_redis_cache_com_fake():
+    cache = RedisCache(FakeRedis(), ttl=30)
+    assert cache.get(1) is None
+    cache.set(1, {"id": 1, "nome": "Ana"})
+    assert cache.get(1) == {"id": 1, "nome": "Ana"}
+    cache.delete(1)
+    assert cache.get(1) is None
+    assert cache.stats()["misses"] == 2
+
+@pytest.mark.parametrize("cache", [LRUCache(maxsize=10, ttl=60), RedisCache(FakeRedis(), ttl=60)], ids=["memory", "redis"])
+def test_preenchimento_nao_repoe_linha_invalidada(cache):
+    # Leitura lenta: pega a geração, lê a linha antiga, e só grava depois da escrita
+    geracao = cache.geracao(1)
+    cache.delete(1)
+    assert cache.preencher(1, {"nome": "Antigo"}, geracao) is False
+    assert cache.get(1) is None
+
+    geracao = cache.geracao(1)
+    assert cache.preencher(1, {"nome": "Novo"}, geracao) is True
+    assert cache.get(1) == {"nome": "Novo"}
+
+def test_lru_invalidacoes_descartadas_bloqueiam_leituras_antigas():
+    cache = LRUCache(maxsize=2, ttl=60)
+    geracao = cache.geracao(1)
+    cache.delete(1)
+    cache.delete(2, 3)  # o registro da chave 1 sai do limite
+    assert cache.preencher(1, "antigo", geracao) is False
+    assert cache.preencher(4, "outro", geracao) is False
+    assert cache.preencher(4, "outro", cache.geracao(4)) is True
+
+@pytest.mark.parametrize("workers, backend", [(None, "memory"), ("1", "memory"), ("4", "none")])
+def test_backend_padrao_depende_do_numero_de_workers(workers, backend):
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    ambiente = {k: v for k, v in os.environ.items() if k not in ("CACHE_BACKEND", "WEB_CONCURRENCY")}
+    if workers is not None:
+        ambiente["WEB_CONCURRENCY"] = workers
+    saida = subprocess.run(
+        [sys.executable, "-c", "import app; print(app.Config.CACHE_BACKEND)"],
+        cwd=raiz, env={**ambiente, "PYTHONPATH": raiz}, check=True, capture_output=True, text=True
+    ).stdout
+    assert saida.strip().splitlines()[-1] == backend
+
+def test_criar_cache_backend_invalido():
+    assert criar_cache({"CACHE_BACKEND": "none"}).get(1) is None
+    with pytest.raises(ValueError):
+        criar_cache({"CACHE_BACKEND": "memcached"})
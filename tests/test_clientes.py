@@ -1,9 +1,12 @@
 import pytest
 import os
+import json
+import io
 import tempfile
 from app import create_app, db
 from app.db_models import ClienteDB
 from app import TestConfig
+from app.service.cache import get_cache
 
 @pytest.fixture(scope='module')
 def test_app():
@@ -73,6 +76,7 @@ def init_database(test_app):
 
         db.session.remove()
         db.drop_all()
+        get_cache().clear()
 
 def test_listar_todos_clientes(test_client, init_database): # GET - Listar todos
     response = test_client.get("/clientes/")
@@ -277,4 +281,458 @@ def test_deletar_cliente_nao_encontrado(test_client, init_database):  # DELETE -
     assert response.status_code == 404
     json_data = response.get_json()
     assert json_data["success"] == False
-    assert "Cliente não encontrado" in json_data["message"]
\ No newline at end of file
+    assert "Cliente não encontrado" in json_data["message"]
+
+def test_listar_clientes_paginado(test_client, init_database): # GET - Paginação por cursor
+    response = test_client.get("/clientes/?limit=2")
+    assert response.status_code == 200
+    json_data = response.get_json()
+    assert [c["id"] for c in json_data["data"]] == [1, 2]
+    assert json_data["next_cursor"] is not None
+
+    response = test_client.get(f"/clientes/?limit=2&after={json_data['next_cursor']}")
+    json_data = response.get_json()
+    assert [c["id"] for c in json_data["data"]] == [3]
+    assert json_data["next_cursor"] is None
+
+def test_listar_clientes_todos_opt_in(test_client, init_database): # GET - Listagem completa explícita
+    response = test_client.get("/clientes/?limit=1&all=true")
+    assert response.status_code == 200
+    json_data = response.get_json()
+    assert len(json_data["data"]) == 3
+    assert json_data["next_cursor"] is None
+
+def test_listar_clientes_parametros_invalidos(test_client, init_database): # GET - limit/after inválidos
+    assert test_client.get("/clientes/?limit=0").status_code == 400
+    assert test_client.get("/clientes/?limit=abc").status_code == 400
+    response = test_client.get("/clientes/?after=naoehcursor")
+    assert response.status_code == 400
+    assert response.get_json()["message"] == "Parâmetros inválidos"
+
+def _adicionar_clientes_variados():
+    db.session.add_all([
+        ClienteDB(cpf="444", nome="Ana Souza", email="ana@test.com", telefone="444444", agencia="0002",
+                  conta="4", tipo_conta="P", cartao_debito="4", bandeira_cartao_credito="visa"),
+        ClienteDB(cpf="555", nome="Bruno Lima", email="bruno@test.com", telefone="555555", agencia="0003",
+                  conta="5", tipo_conta="C", cartao_debito="5", bandeira_cartao_credito="master"),
+    ])
+    db.session.commit()
+
+def test_listar_clientes_com_filtros(test_client, init_database): # GET - Filtros por agencia/tipo_conta/bandeira
+    _adicionar_clientes_variados()
+
+    response = test_client.get("/clientes/?agencia=0001&tipo_conta=C")
+    assert [c["id"] for c in response.get_json()["data"]] == [1, 2, 3]
+
+    response = test_client.get("/clientes/?agencia=0002&agencia=0003")
+    assert [c["id"] for c in response.get_json()["data"]] == [4, 5]
+
+    response = test_client.get("/clientes/?bandeira_cartao_credito=visa")
+    assert [c["id"] for c in response.get_json()["data"]] == [4]
+
+def test_listar_clientes_ordenado_com_cursor(test_client, init_database): # GET - sort com paginação por cursor
+    _adicionar_clientes_variados()
+
+    ids, cursor = [], ""
+    while cursor is not None:
+        json_data = test_client.get(f"/clientes/?sort=-agencia,id&limit=2&after={cursor}").get_json()
+        ids += [c["id"] for c in json_data["data"]]
+        cursor = json_data["next_cursor"]
+    assert ids == [5, 4, 1, 2, 3]
+
+    ids, cursor = [], ""
+    while cursor is not None:
+        json_data = test_client.get(f"/clientes/?sort=bandeira_cartao_credito&limit=2&after={cursor}").get_json()
+        ids += [c["id"] for c in json_data["data"]]
+        cursor = json_data["next_cursor"]
+    assert ids == [1, 2, 3, 5, 4]
+
+def test_listar_clientes_contagem(test_client, init_database): # GET - count exato e estimado
+    _adicionar_clientes_variados()
+
+    json_data = test_client.get("/clientes/?tipo_conta=C&limit=1&count=exact").get_json()
+    assert len(json_data["data"]) == 1
+    assert (json_data["count"], json_data["count_type"]) == (4, "exact")
+
+    # Fora do PostgreSQL (ou abaixo do limiar) a estimativa vira contagem exata
+    json_data = test_client.get("/clientes/?count=estimated").get_json()
+    assert (json_data["count"], json_data["count_type"]) == (5, "exact")
+    assert "count" not in test_client.get("/clientes/").get_json()
+
+@pytest.mark.parametrize("query", [
+    "sort=cpf", "sort=agencia,agencia", "sort=-", "count=todos", "nome=joao&sort=agencia",
+])
+def test_listar_clientes_ordenacao_invalida(test_client, init_database, query): # GET - sort/count inválidos
+    response = test_client.get(f"/clientes/?{query}")
+    assert response.status_code == 400
+    assert response.get_json()["message"] == "Parâmetros inválidos"
+
+def test_exportar_clientes_ndjson(test_client, init_database): # GET - Exportação NDJSON em streaming
+    response = test_client.get("/clientes/export")
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    linhas = [json.loads(l) for l in response.get_data(as_text=True).splitlines()]
+    assert [c["cpf"] for c in linhas] == ["111", "222", "333"]
+
+def test_exportar_clientes_json(test_client, init_database): # GET - Exportação como array JSON
+    response = test_client.get("/clientes/export?format=json")
+    assert response.status_code == 200
+    assert len(response.get_json()) == 3
+    assert test_client.get("/clientes/export?format=xml").status_code == 400
+
+def test_buscar_cliente_por_nome_sem_acentos(test_client, init_database): # GET - Busca ignora acentos e caixa
+    test_client.post("/clientes/", json={
+        "cpf": "555", "nome": "Júlia Araújo", "email": "julia@test.com", "telefone": "555555",
+        "agencia": "0001", "conta": "5", "tipo_conta": "C", "cartao_debito": "5"
+    })
+    for termo in ["julia araujo", "ARAÚJO", "Júlia"]:
+        response = test_client.get(f"/clientes/?nome={termo}")
+        assert response.status_code == 200
+        assert [c["nome"] for c in response.get_json()["data"]] == ["Júlia Araújo"]
+
+def test_buscar_cliente_por_nome_relevancia_e_limite(test_client, init_database): # GET - Ordenação por relevância
+    test_client.post("/clientes/", json={
+        "cpf": "555", "nome": "Silva Souza", "email": "silva@test.com", "telefone": "555555",
+        "agencia": "0001", "conta": "5", "tipo_conta": "C", "cartao_debito": "5"
+    })
+    response = test_client.get("/clientes/?nome=silva")
+    assert [c["nome"] for c in response.get_json()["data"]] == ["Silva Souza", "Joao da Silva", "Maria Silva"]
+
+    response = test_client.get("/clientes/?nome=silva&limit=1")
+    assert [c["nome"] for c in response.get_json()["data"]] == ["Silva Souza"]
+
+def test_buscar_cliente_por_nome_curinga_literal(test_client, init_database): # GET - % e _ não são curingas
+    response = test_client.get("/clientes/?nome=%25")
+    assert response.status_code == 404
+
+def test_criar_clientes_em_lote_sucesso(test_client, init_database, novo_cliente): # POST /bulk - Todos criados
+    response = test_client.post("/clientes/bulk", json={"clientes": [novo_cliente(n) for n in range(5)]})
+    assert response.status_code == 201
+    json_data = response.get_json()
+    assert json_data["data"]["resumo"]["created"] == 5
+    assert [r["id"] for r in json_data["data"]["resultados"]] == [4, 5, 6, 7, 8]
+    assert len(test_client.get("/clientes/?limit=100").get_json()["data"]) == 8
+
+def test_criar_clientes_em_lote_tudo_ou_nada(test_client, init_database, novo_cliente): # POST /bulk - Conflito cancela o lote
+    itens = [novo_cliente(1), novo_cliente(2, cpf="111"), novo_cliente(3, email="")]
+    response = test_client.post("/clientes/bulk", json={"clientes": itens})
+    assert response.status_code == 409
+    status = [r["status"] for r in response.get_json()["data"]["resultados"]]
+    assert status == ["skipped", "conflict", "invalid"]
+    assert len(test_client.get("/clientes/?limit=100").get_json()["data"]) == 3
+
+def test_criar_clientes_em_lote_melhor_esforco(test_client, init_database, novo_cliente): # POST /bulk - Cria apenas os válidos
+    itens = [novo_cliente(1), novo_cliente(2, email="maria@test.com"), novo_cliente(3, cpf="9001"), novo_cliente(4, telefone=None)]
+    response = test_client.post("/clientes/bulk", json={"clientes": itens, "modo": "best_effort"})
+    assert response.status_code == 207
+    status = [r["status"] for r in response.get_json()["data"]["resultados"]]
+    assert status == ["created", "conflict", "conflict", "invalid"]
+    assert len(test_client.get("/clientes/?limit=100").get_json()["data"]) == 4
+
+CSV_IMPORTACAO = (
+    "cpf,nome,email,telefone,agencia,conta,tipo_conta,cartao_debito,cartao_credito\n"
+    "701,Ana Import,ana.import@test.com,7001,0007,1,C,1,\n"
+    "702,Bruno Import,bruno.import@test.com,7002,0007,2,C,2,5555\n"
+    "111,CPF Repetido,repetido@test.com,7003,0007,3,C,3,\n"
+    "704,Email Invalido,nao-e-email,7004,0007,4,C,4,\n"
+)
+
+def test_importar_clientes_csv_upload(test_client, init_database): # POST /import - Upload CSV
+    response = test_client.post(
+        "/clientes/import",
+        data={"arquivo": (io.BytesIO(CSV_IMPORTACAO.encode()), "clientes.csv")},
+        content_type="multipart/form-data"
+    )
+    assert response.status_code == 200
+    data = response.get_json()["data"]
+    assert (data["lidas"], data["importadas"], data["conflitos"], data["invalidas"]) == (5 - 1, 2, 1, 1)
+    assert [r["linha"] for r in data["rejeicoes"]] == [4, 5]
+    assert test_client.get("/clientes/?nome=Bruno Import").get_json()["data"][0]["cartao_credito"] == "5555"
+
+def test_importacao_copy_distingue_vazio_de_nulo(): # COPY do PostgreSQL: "" é texto, só \N é NULL
+    import csv
+    from app.service.importacao import COLUNAS, buffer_copy
+
+    dados = {coluna: f'v "{coluna}"' for coluna in COLUNAS}
+    dados.update(telefone="", cartao_credito=None)
+    linha = buffer_copy([(0, dados)]).getvalue()
+    campos = dict(zip(COLUNAS, linha.rstrip("\n").split(",")))
+    assert campos["telefone"] == '""'
+    assert campos["cartao_credito"] == "\\N"
+    assert next(csv.reader([linha]))[COLUNAS.index("nome")] == 'v "nome"'
+
+def test_importar_clientes_ndjson_cli(test_app, init_database, tmp_path, novo_cliente): # flask clientes importar
+    arquivo = tmp_path / "clientes.ndjson"
+    arquivo.write_text(
+        json.dumps(novo_cliente(1)) + "\n" + "{quebrado\n" + json.dumps(novo_cliente(2)) + "\n"
+    )
+    rejeitados = tmp_path / "rejeitados.csv"
+    result = test_app.test_cli_runner().invoke(
+        args=["clientes", "importar", str(arquivo), "--lote", "1", "--rejeitados", str(rejeitados)]
+    )
+    assert result.exit_code == 0, result.output
+    assert "2 importadas" in result.output
+    assert rejeitados.read_text().splitlines()[1].startswith("2,invalid,JSON inválido")
+    with test_app.app_context():
+        assert db.session.query(ClienteDB).count() == 5
+
+def test_buscar_cliente_por_id_usa_cache(test_client, init_database): # GET /<id> - Cache read-through
+    stats_antes = test_client.get("/clientes/cache/stats").get_json()["data"]
+    assert test_client.get("/clientes/2").get_json()["data"]["nome"] == "Maria Silva"
+    assert test_client.get("/clientes/2").get_json()["data"]["nome"] == "Maria Silva"
+    stats = test_client.get("/clientes/cache/stats").get_json()["data"]
+    assert stats["misses"] - stats_antes["misses"] == 1
+    assert stats["hits"] - stats_antes["hits"] == 1
+
+def test_cache_atualizado_apos_escrita(test_client, init_database): # PUT/DELETE - Invalidação do cache
+    test_client.get("/clientes/1")
+    test_client.put("/clientes/1", json={"cpf": "111", "nome": "Joao Atualizado", "email": "joao@test.com"})
+    assert test_client.get("/clientes/1").get_json()["data"]["nome"] == "Joao Atualizado"
+
+    test_client.delete("/clientes/1")
+    assert test_client.get("/clientes/1").status_code == 404
+
+def test_listar_clientes_etag_nao_modificado(test_client, init_database): # GET - If-None-Match na coleção
+    response = test_client.get("/clientes/?limit=2")
+    etag = response.headers["ETag"]
+    assert test_client.get("/clientes/?limit=2", headers={"If-None-Match": etag}).status_code == 304
+    assert test_client.get("/clientes/?limit=1", headers={"If-None-Match": etag}).status_code == 200
+
+    test_client.delete("/clientes/3")
+    response = test_client.get("/clientes/?limit=2", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+def test_buscar_cliente_por_id_etag(test_client, init_database): # GET /<id> - If-None-Match no recurso
+    etag = test_client.get("/clientes/1").headers["ETag"]
+    response = test_client.get("/clientes/1", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.data == b""
+
+    test_client.put("/clientes/1", json={"cpf": "111", "nome": "Joao Novo", "email": "joao@test.com"})
+    assert test_client.get("/clientes/1", headers={"If-None-Match": etag}).status_code == 200
+
+def test_listar_clientes_com_fields(test_client, init_database): # GET - Projeção de colunas
+    response = test_client.get("/clientes/?fields=nome,email&limit=2")
+    assert response.status_code == 200
+    json_data = response.get_json()
+    assert json_data["data"][0] == {"nome": "Joao da Silva", "email": "joao@test.com"}
+    assert json_data["next_cursor"] is not None
+
+    response = test_client.get("/clientes/?fields=id,cpf&nome=roberto")
+    assert response.get_json()["data"] == [{"id": 3, "cpf": "333"}]
+
+def test_fields_invalido(test_client, init_database): # GET - Campo fora de ClienteSchema
+    for url in ["/clientes/?fields=nome,senha", "/clientes/1?fields=senha", "/clientes/export?fields=,"]:
+        response = test_client.get(url)
+        assert response.status_code == 400
+        assert "fields" in response.get_json()["error"]
+
+def test_buscar_cliente_por_id_com_fields(test_client, init_database): # GET /<id> - Projeção de colunas
+    response = test_client.get("/clientes/2?fields=id,nome")
+    assert response.get_json()["data"] == {"id": 2, "nome": "Maria Silva"}
+    completo = test_client.get("/clientes/2")
+    assert completo.get_json()["data"]["cpf"] == "222"
+
+    # A ETag é a do cliente, não a da projeção: serve de If-Match para a escrita
+    etag = response.headers["ETag"]
+    assert etag == completo.headers["ETag"]
+    response = test_client.patch("/clientes/2", json={"nome": "Maria Editada"}, headers={"If-Match": etag})
+    assert response.status_code == 200
+
+def test_exportar_clientes_com_fields(test_client, init_database): # GET /export - Projeção de colunas
+    linhas = test_client.get("/clientes/export?fields=cpf").get_data(as_text=True).splitlines()
+    assert [json.loads(l) for l in linhas] == [{"cpf": "111"}, {"cpf": "222"}, {"cpf": "333"}]
+
+def test_upsert_cliente_por_cpf(test_client, init_database, novo_cliente): # PUT /by-cpf - Cria e depois atualiza
+    novo = novo_cliente(1)
+    response = test_client.put(f"/clientes/by-cpf/{novo['cpf']}", json=novo)
+    assert response.status_code == 200
+    criado = response.get_json()["data"]
+    assert criado["id"] == 4
+
+    novo.update(nome="Cliente Renomeado", agencia="0010")
+    del novo["cpf"]
+    response = test_client.put("/clientes/by-cpf/9001", json=novo)
+    assert response.status_code == 200
+    assert response.get_json()["data"] == {**criado, "nome": "Cliente Renomeado", "agencia": "0010", "versao": 2}
+    assert test_client.get("/clientes/4").get_json()["data"]["nome"] == "Cliente Renomeado"
+
+def test_upsert_cliente_email_em_uso(test_client, init_database, novo_cliente): # PUT /by-cpf - Violação de unicidade vira 409
+    response = test_client.put("/clientes/by-cpf/111", json=novo_cliente(1, cpf="111", email="maria@test.com"))
+    assert response.status_code == 409
+    assert response.get_json()["message"] == "Email já cadastrado"
+    assert test_client.get("/clientes/1").get_json()["data"]["email"] == "joao@test.com"
+
+def test_upsert_cliente_dados_invalidos(test_client, init_database, novo_cliente): # PUT /by-cpf - Validação
+    assert test_client.put("/clientes/by-cpf/111", json=novo_cliente(1, cpf="222")).status_code == 400
+    assert test_client.put("/clientes/by-cpf/111", json={"nome": "Sem Email"}).status_code == 400
+    assert test_client.put("/clientes/by-cpf/111", json=novo_cliente(1, telefone=None, cpf="111")).status_code == 400
+
+def test_adicionar_cliente_corrida_vira_409(test_client, init_database, monkeypatch, novo_cliente): # POST - IntegrityError no commit
+    # Simula outra requisição gravando o mesmo CPF entre a verificação e o commit
+    from flask_sqlalchemy.query import Query
+    monkeypatch.setattr(Query, "first", lambda self: None)
+    response = test_client.post("/clientes/", json=novo_cliente(1, cpf="111"))
+    assert response.status_code == 409
+    assert response.get_json()["message"] == "CPF já cadastrado"
+
+def test_atualizar_clientes_em_lote_por_ids(test_client, init_database): # PATCH /bulk - Um UPDATE por bloco
+    test_client.get("/clientes/1")
+    response = test_client.patch("/clientes/bulk", json={"ids": [1, 2], "dados": {"agencia": "0042"}})
+    assert response.status_code == 200
+    assert response.get_json()["data"]["resultados"] == [{"id": 1, "status": "updated"}, {"id": 2, "status": "updated"}]
+    assert test_client.get("/clientes/1").get_json()["data"]["agencia"] == "0042"
+    assert test_client.get("/clientes/3").get_json()["data"]["agencia"] == "0001"
+
+def test_atualizar_clientes_em_lote_por_filtro(test_client, init_database, novo_cliente): # PATCH /bulk - Migração de agência
+    test_client.post("/clientes/", json=novo_cliente(1, agencia="0009"))
+    response = test_client.patch("/clientes/bulk", json={"filtro": {"agencia": "0001"}, "dados": {"agencia": "0002"}})
+    assert response.status_code == 200
+    assert response.get_json()["data"]["resumo"] == {"updated": 3}
+    assert test_client.get("/clientes/4").get_json()["data"]["agencia"] == "0009"
+
+def test_atualizar_clientes_em_lote_tudo_ou_nada(test_client, init_database): # PATCH /bulk - Id inexistente cancela
+    response = test_client.patch("/clientes/bulk", json={"ids": [1, 99], "dados": {"telefone": "999"}})
+    assert response.status_code == 404
+    status = [r["status"] for r in response.get_json()["data"]["resultados"]]
+    assert status == ["skipped", "not_found"]
+    assert test_client.get("/clientes/1").get_json()["data"]["telefone"] == "111111"
+
+def test_atualizar_clientes_em_lote_conflito(test_client, init_database): # PATCH /bulk - Unicidade por bloco
+    response = test_client.patch("/clientes/bulk", json={"ids": [1], "dados": {"email": "maria@test.com"}})
+    assert response.status_code == 409
+    assert response.get_json()["data"]["resultados"][0]["error"] == "Email já cadastrado"
+
+    response = test_client.patch("/clientes/bulk", json={"ids": [1, 2], "dados": {"cpf": "999"}, "modo": "best_effort"})
+    assert response.status_code == 409
+    assert [r["status"] for r in response.get_json()["data"]["resultados"]] == ["conflict", "conflict"]
+
+def test_atualizar_clientes_em_lote_invalido(test_client, init_database): # PATCH /bulk - Validação
+    assert test_client.patch("/clientes/bulk", json={"ids": [1], "dados": {"email": "x"}}).status_code == 400
+    assert test_client.patch("/clientes/bulk", json={"ids": [1], "dados": {"telefone": None}}).status_code == 400
+    assert test_client.patch("/clientes/bulk", json={"filtro": {"nome": "Joao"}, "dados": {"agencia": "1"}}).status_code == 400
+    assert test_client.patch("/clientes/bulk", json={"ids": [1], "filtro": {"agencia": "1"}, "dados": {"agencia": "1"}}).status_code == 400
+
+def test_deletar_clientes_em_lote(test_client, init_database): # DELETE /bulk - Resultado por id
+    test_client.get("/clientes/1")
+    response = test_client.delete("/clientes/bulk", json={"ids": [1, 99, 2], "modo": "best_effort"})
+    assert response.status_code == 207
+    assert [r["status"] for r in response.get_json()["data"]["resultados"]] == ["deleted", "not_found", "deleted"]
+    assert test_client.get("/clientes/1").status_code == 404
+    assert len(test_client.get("/clientes/?limit=100").get_json()["data"]) == 1
+
+def test_deletar_clientes_em_lote_por_filtro(test_client, init_database): # DELETE /bulk - Filtro por agência
+    response = test_client.delete("/clientes/bulk", json={"filtro": {"agencia": "0001"}})
+    assert response.status_code == 200
+    assert response.get_json()["data"]["resumo"] == {"deleted": 3}
+    assert test_client.delete("/clientes/bulk", json={"filtro": {"agencia": "0001"}}).status_code == 404
+
+def test_lote_por_filtro_limitado(test_client, init_database, monkeypatch): # PATCH/DELETE /bulk - Teto também no filtro
+    monkeypatch.setitem(test_client.application.config, "CLIENTES_BULK_MAX_ITEMS", 2)
+    response = test_client.delete("/clientes/bulk", json={"filtro": {"agencia": "0001"}})
+    assert response.status_code == 413
+    assert "mais de 2 clientes" in response.get_json()["error"]
+    response = test_client.patch("/clientes/bulk", json={"filtro": {"agencia": "0001"}, "dados": {"agencia": "0002"}})
+    assert response.status_code == 413
+    assert len(test_client.get("/clientes/?agencia=0001").get_json()["data"]) == 3
+
+    # Dentro do teto, a seleção por filtro devolve só as contagens
+    monkeypatch.setitem(test_client.application.config, "CLIENTES_BULK_MAX_ITEMS", 3)
+    response = test_client.delete("/clientes/bulk", json={"filtro": {"agencia": "0001"}})
+    assert response.status_code == 200
+    assert response.get_json()["data"] == {"resumo": {"deleted": 3}}
+
+def test_deletar_clientes_em_lote_erro_no_banco(test_client, init_database, monkeypatch): # DELETE /bulk - Rollback
+    from sqlalchemy.exc import OperationalError
+    from app.controller import cliente_controller
+
+    def falhar(session):
+        raise OperationalError("UPDATE tabela_versoes", {}, Exception("banco indisponível"))
+
+    monkeypatch.setattr(cliente_controller, "incrementar_versao", falhar)
+    response = test_client.delete("/clientes/bulk", json={"ids": [1, 2]})
+    assert response.status_code == 500
+    assert response.get_json()["message"] == "Erro ao remover clientes"
+    monkeypatch.undo()
+    assert test_client.get("/clientes/1").status_code == 200
+    assert test_client.delete("/clientes/bulk", json={"ids": [1]}).status_code == 200
+
+def test_atualizar_cliente_parcial(test_client, init_database): # PATCH /<id> - Só os campos enviados
+    response = test_client.patch("/clientes/1", json={"telefone": "999999", "email": "joao@test.com"})
+    assert response.status_code == 200
+    data = response.get_json()["data"]
+    assert (data["telefone"], data["nome"], data["versao"]) == ("999999", "Joao da Silva", 2)
+    assert response.headers["ETag"] == test_client.get("/clientes/1").headers["ETag"]
+
+    response = test_client.patch("/clientes/1", json={"telefone": "999999"})
+    assert response.get_json()["message"] == "Nenhum campo alterado"
+    assert response.get_json()["data"]["versao"] == 2
+
+def test_atualizar_cliente_parcial_invalido(test_client, init_database): # PATCH /<id> - Validação e unicidade
+    assert test_client.patch("/clientes/1", json={"email": "invalido"}).status_code == 400
+    assert test_client.patch("/clientes/1", json={"id": 5}).status_code == 400
+    assert test_client.patch("/clientes/1", json={"nome": None}).status_code == 400
+    assert test_client.patch("/clientes/99", json={"nome": "X"}).status_code == 404
+    response = test_client.patch("/clientes/1", json={"cpf": "222"})
+    assert response.status_code == 409
+    assert response.get_json()["message"] == "CPF já cadastrado"
+
+def test_atualizar_cliente_if_match(test_client, init_database): # PATCH/PUT/DELETE - If-Match desatualizado vira 412
+    etag = test_client.get("/clientes/1").headers["ETag"]
+    assert test_client.patch("/clientes/1", json={"nome": "Editor A"}, headers={"If-Match": etag}).status_code == 200
+
+    response = test_client.patch("/clientes/1", json={"nome": "Editor B"}, headers={"If-Match": etag})
+    assert response.status_code == 412
+    assert response.headers["ETag"] == test_client.get("/clientes/1").headers["ETag"]
+    assert test_client.delete("/clientes/1", headers={"If-Match": etag}).status_code == 412
+    assert test_client.get("/clientes/1").get_json()["data"]["nome"] == "Editor A"
+
+def test_atualizar_cliente_parcial_escrita_concorrente(test_client, init_database, monkeypatch): # PATCH - version_id_col
+    # Simula outra requisição gravando o cliente entre a leitura e o UPDATE
+    from app.controller import cliente_controller
+    from sqlalchemy import text
+
+    def gravacao_concorrente(session):
+        with session.no_autoflush:
+            session.execute(text("UPDATE clientes SET versao = versao + 1 WHERE id = 1"))
+
+    monkeypatch.setattr(cliente_controller, "incrementar_versao", gravacao_concorrente)
+    response = test_client.patch("/clientes/1", json={"nome": "Perdido"})
+    assert response.status_code == 412
+    assert test_client.get("/clientes/1").get_json()["data"]["nome"] == "Joao da Silva"
+
+def test_estatisticas_clientes(test_client, init_database): # GET /stats - Resumo mantido a cada escrita
+    _adicionar_clientes_variados()
+    test_client.patch("/clientes/1", json={"agencia": "0002"})
+    test_client.patch("/clientes/bulk", json={"ids": [2], "dados": {"tipo_conta": "P"}})
+    test_client.delete("/clientes/5")
+
+    response = test_client.get("/clientes/stats?group_by=agencia,tipo_conta")
+    assert response.status_code == 200
+    assert response.get_json()["data"] == {
+        "total": 4,
+        "agencia": {"0001": 2, "0002": 2},
+        "tipo_conta": {"C": 2, "P": 2},
+        "bandeira_cartao_credito": {"": 3, "visa": 1},
+        "grupos": [
+            {"agencia": "0001", "tipo_conta": "C", "total": 1},
+            {"agencia": "0001", "tipo_conta": "P", "total": 1},
+            {"agencia": "0002", "tipo_conta": "C", "total": 1},
+            {"agencia": "0002", "tipo_conta": "P", "total": 1},
+        ],
+    }
+    etag = response.headers["ETag"]
+    assert test_client.get("/clientes/stats?group_by=agencia,tipo_conta", headers={"If-None-Match": etag}).status_code == 304
+    assert test_client.get("/clientes/stats?group_by=cpf").status_code == 400
+
+def test_reconstruir_estatisticas_cli(test_app, test_client, init_database): # CLI - Backfill do resumo
+    with test_app.app_context():
+        db.session.execute(db.text("DELETE FROM clientes_resumo"))
+        db.session.commit()
+    assert test_client.get("/clientes/stats").get_json()["data"]["total"] == 0
+
+    result = test_app.test_cli_runner().invoke(args=["clientes", "reconstruir-estatisticas"])
+    assert result.exit_code == 0, result.output
+    assert "1 grupos" in result.output
+    assert test_client.get("/clientes/stats").get_json()["data"]["agencia"] == {"0001": 3}
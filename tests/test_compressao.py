@@ -0,0 +1,83 @@
+import gzip
+import json
+import zlib
+
+import pytest
+
+from app.service.compressao import escolher_codificacao
+
+
+@pytest.fixture
+def config_app(novo_cliente):
+    return {
+        "clientes": [novo_cliente(i) for i in range(1, 21)],
+        "CACHE_BACKEND": "none",
+        "COMPRESSION_MIN_SIZE": 200,
+    }
+
+
+def test_escolher_codificacao():
+    preferencia = ["zstd", "br", "gzip"]
+    assert escolher_codificacao("gzip, br", preferencia) == "br"
+    assert escolher_codificacao("gzip;q=1.0, br;q=0.5", preferencia) == "gzip"
+    assert escolher_codificacao("*", preferencia) == "zstd"
+    assert escolher_codificacao("*, zstd;q=0, br;q=0", preferencia) == "gzip"
+    assert escolher_codificacao("identity", preferencia) is None
+    assert escolher_codificacao(None, preferencia) is None
+
+def test_listagem_comprimida_com_gzip(client):
+    normal = client.get("/clientes/")
+    response = client.get("/clientes/", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert int(response.headers["Content-Length"]) < len(normal.data)
+    assert json.loads(gzip.decompress(response.data)) == normal.get_json()
+    assert response.headers["ETag"] == normal.headers["ETag"][:-1] + '-gzip"'
+    assert "Content-Encoding" not in normal.headers
+    assert "Accept-Encoding" in normal.headers["Vary"]
+
+def test_resposta_pequena_nao_comprimida(app):
+    response = app.test_client().get("/clientes/1?fields=id,nome", headers={"Accept-Encoding": "gzip"})
+
+    assert "Content-Encoding" not in response.headers
+    assert response.get_json()["data"]["nome"] == "Cliente 1"
+
+def test_etag_comprimida_vale_para_304_e_if_match(client):
+    etag = client.get("/clientes/", headers={"Accept-Encoding": "gzip"}).headers["ETag"]
+
+    response = client.get("/clientes/", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+    etag_cliente = client.get("/clientes/1").headers["ETag"][:-1] + '-gzip"'
+    assert client.patch("/clientes/1", json={"nome": "Outro"}, headers={"If-Match": etag_cliente}).status_code == 200
+
+def test_exportacao_comprimida_em_streaming(app):
+    response = app.test_client().get(
+        "/clientes/export", headers={"Accept-Encoding": "gzip"}, buffered=False
+    )
+
+    assert response.is_streamed
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in response.headers
+    linhas = gzip.decompress(b"".join(response.response)).decode().splitlines()
+    assert len(linhas) == 20
+    assert json.loads(linhas[0])["nome"] == "Cliente 1"
+
+def test_exportacao_comprimida_entrega_cada_lote(app):
+    app.config["CLIENTES_EXPORT_CHUNK_SIZE"] = 5
+    response = app.test_client().get(
+        "/clientes/export", headers={"Accept-Encoding": "gzip"}, buffered=False
+    )
+
+    # O primeiro pedaço já descomprime no lote inteiro, sem esperar o fim do stream
+    descompressor = zlib.decompressobj(31)
+    linhas = descompressor.decompress(next(iter(response.response))).decode().splitlines()
+    response.close()
+    assert [json.loads(linha)["nome"] for linha in linhas] == [f"Cliente {i}" for i in range(1, 6)]
+
+def test_compressao_desligada(criar_app):
+    app = criar_app(COMPRESSION_ENABLED=False)
+    response = app.test_client().get("/clientes/", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
@@ -0,0 +1,67 @@
+import logging
+
+import pytest
+
+from app.service.diagnostico import ocultar_parametros
+
+
+@pytest.fixture
+def config_app(novo_cliente):
+    return {
+        "clientes": [novo_cliente(
+            1, cpf="12345678900", nome="Joao da Silva", email="joao@test.com", cartao_debito="4111111111111111"
+        )],
+        "CACHE_BACKEND": "none",
+    }
+
+
+def test_ocultar_parametros():
+    assert ocultar_parametros({"cpf_1": "123", "nome": "Joao", "cartao_credito": "4111"}) == {
+        "cpf_1": "***", "nome": "Joao", "cartao_credito": "***"
+    }
+    assert ocultar_parametros(("123", "Joao")) == ["***", "***"]
+
+def test_consulta_lenta_registrada_sem_dados_sensiveis(criar_app, config_app, caplog):
+    app = criar_app(**config_app, SLOW_QUERY_MS=0.000001)
+
+    with caplog.at_level(logging.WARNING, logger="app.diagnostico"):
+        response = app.test_client().put('/clientes/by-cpf/12345678900', json={
+            "nome": "Joao da Silva", "email": "joao@test.com", "telefone": "111111",
+            "agencia": "0001", "conta": "1", "tipo_conta": "C", "cartao_debito": "4111111111111111",
+        })
+
+    assert response.status_code == 200
+    mensagens = [r.getMessage() for r in caplog.records if r.getMessage().startswith("Consulta lenta")]
+    assert mensagens
+    assert any("clientes.upsert_cliente_por_cpf" in m for m in mensagens)
+    assert not any("12345678900" in m or "4111111111111111" in m for m in mensagens)
+
+def test_requisicao_lenta_registrada(criar_app, config_app, caplog):
+    app = criar_app(**config_app, SLOW_REQUEST_MS=0.000001)
+
+    with caplog.at_level(logging.WARNING, logger="app.diagnostico"):
+        app.test_client().get('/clientes/by-cpf/12345678900')
+        app.test_client().get('/clientes/1')
+
+    mensagens = [r.getMessage() for r in caplog.records]
+    assert any("'rota': '/clientes/<int:id>'" in m and "'consultas': 1" in m for m in mensagens)
+    assert not any("12345678900" in m for m in mensagens)
+
+@pytest.mark.parametrize("config, headers", [
+    ({"PROFILE_HEADER": "X-Profile"}, {"X-Profile": "1"}),
+    ({"PROFILE_SAMPLE_RATE": 1.0}, {}),
+])
+def test_perfil_da_requisicao(criar_app, config_app, tmp_path, caplog, config, headers):
+    app = criar_app(**config_app, PROFILE_DIR=str(tmp_path), **config)
+
+    with caplog.at_level(logging.INFO, logger="app.diagnostico"):
+        response = app.test_client().get('/clientes/1', headers=headers)
+
+    perfil_id = response.headers["X-Profile-Id"]
+    assert (tmp_path / f"{perfil_id}.prof").exists()
+    assert any(r.getMessage().startswith(f"Perfil {perfil_id}") for r in caplog.records)
+
+def test_perfil_nao_dispara_sem_header(criar_app, config_app):
+    app = criar_app(**config_app, PROFILE_HEADER="X-Profile")
+
+    assert "X-Profile-Id" not in app.test_client().get('/clientes/1').headers
@@ -0,0 +1,73 @@
+import json
+import os
+import subprocess
+import sys
+
+from app import TestConfig, create_app
+from app.service.documentacao import EXTENSAO
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _modulos_apos_create_app(**ambiente):
+    codigo = (
+        "import json, sys; import app; app.create_app(app.TestConfig); "
+        "print(json.dumps(sorted(m for m in ('alembic', 'flask_migrate', 'flasgger', 'cProfile') if m in sys.modules)))"
+    )
+    saida = subprocess.run(
+        [sys.executable, "-c", codigo], cwd=RAIZ, env={**os.environ, "PYTHONPATH": RAIZ, **ambiente},
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(saida.strip().splitlines()[-1])
+
+
+def test_inicializacao_nao_importa_subsistemas_raros():
+    assert _modulos_apos_create_app() == ["flasgger"]
+    assert _modulos_apos_create_app(SWAGGER_ENABLED="0") == []
+
+def test_spec_montada_no_primeiro_acesso():
+    app = create_app(TestConfig)
+    documentacao = app.extensions[EXTENSAO]
+    assert "definitions" not in documentacao.template
+
+    cliente = app.test_client()
+    spec = cliente.get("/apispec_1.json").get_json()
+    assert set(spec["definitions"]) == {"Cliente", "ClienteCreate", "ClienteUpdate"}
+    assert "cpf" in spec["definitions"]["ClienteCreate"]["properties"]
+    assert documentacao.apispecs["apispec_1"] is documentacao.get_apispecs()
+    assert cliente.get("/apidocs/").status_code == 200
+
+def test_spec_pre_gerada(tmp_path):
+    caminho = tmp_path / "openapi.json"
+    result = create_app(TestConfig).test_cli_runner().invoke(args=["clientes", "gerar-openapi", "--saida", str(caminho)])
+    assert result.exit_code == 0, result.output
+    spec = json.loads(caminho.read_text(encoding="utf-8"))
+    assert "ClienteUpdate" in spec["definitions"]
+
+    # O arquivo é servido como está, sem olhar as rotas
+    spec["info"]["version"] = "pre-gerada"
+    caminho.write_text(json.dumps(spec), encoding="utf-8")
+
+    class ComSpec(TestConfig):
+        OPENAPI_SPEC_FILE = str(caminho)
+
+    assert create_app(ComSpec).test_client().get("/apispec_1.json").get_json()["info"]["version"] == "pre-gerada"
+
+def test_documentacao_desligada():
+    class SemDocumentacao(TestConfig):
+        SWAGGER_ENABLED = False
+
+    app = create_app(SemDocumentacao)
+    assert app.test_client().get("/apispec_1.json").status_code == 404
+    result = app.test_cli_runner().invoke(args=["clientes", "gerar-openapi"])
+    assert result.exit_code != 0
+    assert "SWAGGER_ENABLED=0" in result.output
+
+def test_comandos_db_carregados_sob_demanda(monkeypatch):
+    monkeypatch.chdir(RAIZ)
+    runner = create_app(TestConfig).test_cli_runner()
+
+    ajuda = runner.invoke(args=["db", "--help"])
+    assert ajuda.exit_code == 0, ajuda.output
+    assert "upgrade" in ajuda.output
+    assert runner.invoke(args=["db", "heads"]).exit_code == 0
@@ -0,0 +1,60 @@
+import pytest
+
+from app.service.metricas import Registro
+
+
+@pytest.fixture
+def config_app(novo_cliente):
+    return {"clientes": [novo_cliente(1)]}
+
+
+def _amostras(texto):
+    return dict(
+        linha.rsplit(" ", 1) for linha in texto.splitlines() if linha and not linha.startswith("#")
+    )
+
+
+def test_histograma_no_formato_prometheus():
+    registro = Registro()
+    histograma = registro.histograma("latencia_seconds", "Latência.", ("rota",), buckets=(0.1, 1.0))
+    histograma.observe(0.05, "a")
+    histograma.observe(0.5, "a")
+    histograma.observe(3, "a")
+
+    texto = registro.exportar()
+
+    assert "# TYPE latencia_seconds histogram" in texto
+    amostras = _amostras(texto)
+    assert amostras['latencia_seconds_bucket{rota="a",le="0.1"}'] == "1"
+    assert amostras['latencia_seconds_bucket{rota="a",le="1.0"}'] == "2"
+    assert amostras['latencia_seconds_bucket{rota="a",le="+Inf"}'] == "3"
+    assert amostras['latencia_seconds_count{rota="a"}'] == "3"
+
+def test_rotulos_sao_escapados():
+    registro = Registro()
+    registro.contador("total", "Total.", ("valor",)).inc('a"b\\c')
+
+    assert 'total{valor="a\\"b\\\\c"} 1' in registro.exportar()
+
+def test_metrics_expoe_requisicoes_consultas_e_cache(client):
+    client.get('/clientes/1')
+    client.get('/clientes/1')
+
+    response = client.get('/metrics')
+
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain; version=0.0.4")
+    amostras = _amostras(response.get_data(as_text=True))
+    rotulos = 'method="GET",endpoint="clientes.buscar_cliente_por_id",status="200"'
+    assert amostras[f'clientes_http_request_duration_seconds_count{{{rotulos}}}'] == "2"
+    assert amostras['clientes_http_requests_in_flight{endpoint="clientes.buscar_cliente_por_id"}'] == "0"
+    # A segunda leitura vem do cache: só a primeira consulta o banco
+    consultas = 'clientes_http_request_db_queries_bucket{endpoint="clientes.buscar_cliente_por_id",le="1"}'
+    assert amostras[consultas] == "2"
+    assert amostras['clientes_http_request_db_queries_sum{endpoint="clientes.buscar_cliente_por_id"}'] == "1.0"
+    assert amostras['clientes_cache_hits_total'] == "1"
+    assert amostras['clientes_cache_misses_total'] == "1"
+    assert amostras['clientes_cache_hit_ratio'] == "0.5"
+
+def test_metrics_desligado(criar_app):
+    assert criar_app(METRICS_ENABLED=False).test_client().get('/metrics').status_code == 404
@@ -0,0 +1,194 @@
+import pytest
+from sqlalchemy import event, inspect, text
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.service.integridade import campo_duplicado
+
+PARTICIONAMENTO = "c6f08b2d94e1"
+ANTERIOR = "a91d4e6c3b70"
+
+
+@pytest.fixture
+def criar_app_vazio(criar_app, tmp_path):
+    # Sem db.create_all(): o schema vem das migrações
+    def criar(uri=None):
+        return criar_app(uri or f"sqlite:///{tmp_path / 'migracoes.db'}", criar_tabelas=False)
+
+    return criar
+
+
+def _migrar(app, *args):
+    result = app.test_cli_runner().invoke(args=["db", *args])
+    assert result.exit_code == 0, result.output
+
+
+def _revisao(app):
+    with app.app_context():
+        return db.session.execute(text("SELECT version_num FROM alembic_version")).scalar()
+
+
+def _inserir(app, cpf, email):
+    with app.app_context():
+        db.session.execute(text(
+            "INSERT INTO clientes (cpf, nome, email, telefone, agencia, conta, tipo_conta, cartao_debito) "
+            "VALUES (:cpf, 'Migrado', :email, '1', '0001', '1', 'C', '1')"
+        ), {"cpf": cpf, "email": email})
+        db.session.commit()
+
+
+def test_particionamento_sem_postgresql_nao_altera_a_tabela(criar_app_vazio, na_raiz):
+    app = criar_app_vazio()
+    _migrar(app, "upgrade", ANTERIOR)
+    _inserir(app, "111", "joao@test.com")
+
+    _migrar(app, "upgrade", PARTICIONAMENTO)
+    assert _revisao(app) == PARTICIONAMENTO
+    with app.app_context():
+        assert "clientes_emails" not in inspect(db.engine).get_table_names()
+        assert db.session.execute(text("SELECT cpf, email FROM clientes")).all() == [("111", "joao@test.com")]
+        # Fora do PostgreSQL o email segue único pela restrição da própria tabela
+        with pytest.raises(IntegrityError) as erro:
+            db.session.execute(text(
+                "INSERT INTO clientes (cpf, nome, email, telefone, agencia, conta, tipo_conta, cartao_debito) "
+                "VALUES ('222', 'Outro', 'joao@test.com', '1', '0001', '2', 'C', '2')"
+            ))
+        assert campo_duplicado(erro.value) == "email"
+        db.session.rollback()
+
+    _migrar(app, "downgrade", ANTERIOR)
+    assert _revisao(app) == ANTERIOR
+    with app.app_context():
+        assert db.session.execute(text("SELECT count(*) FROM clientes")).scalar() == 1
+
+
+def test_violacao_em_clientes_emails_e_conflito_de_email():
+    # Mensagem do PostgreSQL quando o gatilho grava um email repetido em clientes_emails
+    class ErroPostgreSQL(Exception):
+        pgcode = "23505"
+
+    orig = ErroPostgreSQL(
+        'duplicate key value violates unique constraint "clientes_emails_pkey"\n'
+        'DETAIL:  Key (email)=(joao@test.com) already exists.\n'
+        'CONTEXT:  SQL statement "INSERT INTO clientes_emails (email, cliente_id) VALUES (NEW.email, NEW.id)"'
+    )
+    assert campo_duplicado(IntegrityError("INSERT INTO clientes ...", {}, orig)) == "email"
+
+    orig = ErroPostgreSQL(
+        'duplicate key value violates unique constraint "clientes_p3_cpf_key"\n'
+        'DETAIL:  Key (cpf)=(111) already exists.'
+    )
+    assert campo_duplicado(IntegrityError("INSERT INTO clientes ...", {}, orig)) == "cpf"
+
+
+def _contar(app, sql, **parametros):
+    with app.app_context():
+        return db.session.execute(text(sql), parametros).scalar()
+
+
+def test_particionamento_postgresql(criar_app_vazio, url_postgresql, na_raiz):
+    # A migração de particionamento só faz algo no PostgreSQL
+    app = criar_app_vazio(url_postgresql)
+    # Parte de um schema vazio: exercita também todos os downgrades
+    _migrar(app, "downgrade", "base")
+    _migrar(app, "upgrade", ANTERIOR)
+    with app.app_context():
+        # 25 mil linhas: três lotes da cópia online (TAMANHO_LOTE = 10000)
+        db.session.execute(text(
+            "INSERT INTO clientes (cpf, nome, email, telefone, agencia, conta, tipo_conta, cartao_debito) "
+            "SELECT 'c' || n, 'Cliente ' || n, 'e' || n || '@test.com', '1', '0001', n, 'C', n "
+            "FROM generate_series(1, 25000) AS n"
+        ))
+        db.session.commit()
+        engine = db.engine
+
+    # Escritas de outras conexões durante a cópia, logo depois do primeiro lote
+    # (ids 1 a 10000 já copiados): o gatilho de espelhamento as repete na tabela nova
+    def escrever_durante_a_copia(conexao, cursor, comando, *args):
+        if not comando.startswith("INSERT INTO clientes_particionada") or escritas:
+            return
+        escritas.append(1)
+        with engine.begin() as outra:
+            for sql in (
+                "UPDATE clientes SET nome = 'Copiado e alterado', email = 'novo5@test.com' WHERE id = 5",
+                "UPDATE clientes SET cpf = 'x9' WHERE id = 9",
+                "UPDATE clientes SET nome = 'Alterado antes da cópia' WHERE id = 20000",
+                "DELETE FROM clientes WHERE id IN (7, 15000)",
+                "INSERT INTO clientes (cpf, nome, email, telefone, agencia, conta, tipo_conta, cartao_debito) "
+                "VALUES ('novo', 'Durante a cópia', 'durante@test.com', '1', '0002', '1', 'C', '1')",
+            ):
+                outra.execute(text(sql))
+
+    escritas = []
+    event.listen(engine, "after_cursor_execute", escrever_durante_a_copia)
+    try:
+        _migrar(app, "upgrade", PARTICIONAMENTO)
+    finally:
+        event.remove(engine, "after_cursor_execute", escrever_durante_a_copia)
+    assert escritas == [1]
+
+    assert _contar(app, "SELECT count(*) FROM pg_inherits WHERE inhparent = 'clientes'::regclass") == 8
+    assert _contar(app, "SELECT count(*) FROM clientes") == 25000 - 2 + 1
+    assert _contar(app, "SELECT nome FROM clientes WHERE id = 5") == "Copiado e alterado"
+    assert _contar(app, "SELECT cpf FROM clientes WHERE id = 9") == "x9"
+    assert _contar(app, "SELECT nome FROM clientes WHERE id = 20000") == "Alterado antes da cópia"
+    assert _contar(app, "SELECT count(*) FROM clientes WHERE id IN (7, 15000)") == 0
+    assert _contar(app, "SELECT count(*) FROM clientes WHERE email = 'durante@test.com'") == 1
+    # A unicidade de email acompanha a tabela, inclusive as escritas espelhadas
+    assert _contar(app, "SELECT count(*) FROM clientes_emails") == 25000 - 1
+    assert _contar(app, "SELECT count(*) FROM clientes_emails WHERE email IN ('e5@test.com', 'e7@test.com')") == 0
+    assert _contar(app, "SELECT pg_get_serial_sequence('clientes', 'id')") == "public.clientes_id_seq"
+
+    # Depois da troca: os gatilhos de resumo e de alterações valem na tabela nova
+    cliente = app.test_client()
+    alteracoes = _contar(app, "SELECT max(seq) FROM clientes_alteracoes")
+    novo = {
+        "nome": "Outro", "email": "e1@test.com", "telefone": "1", "agencia": "0001",
+        "conta": "2", "tipo_conta": "C", "cartao_debito": "2",
+    }
+    response = cliente.put("/clientes/by-cpf/outro", json={**novo, "email": "outro@test.com"})
+    assert response.status_code == 200
+    assert response.get_json()["data"]["id"] > 25000
+    assert _contar(app, "SELECT sum(total) FROM clientes_resumo") == _contar(app, "SELECT count(*) FROM clientes")
+    assert _contar(app, "SELECT operacao FROM clientes_alteracoes WHERE seq > :seq", seq=alteracoes) == "insert"
+
+    # Email repetido com CPF novo: quem barra é clientes_emails, e a API responde 409 de email
+    response = cliente.put("/clientes/by-cpf/repetido", json=novo)
+    assert response.status_code == 409
+    assert response.get_json()["message"] == "Email já cadastrado"
+    # Trocar o email libera o antigo
+    assert cliente.patch("/clientes/1", json={"email": "trocado@test.com"}).status_code == 200
+    assert cliente.put("/clientes/by-cpf/repetido", json=novo).status_code == 200
+
+    total = _contar(app, "SELECT count(*) FROM clientes")
+    _migrar(app, "downgrade", ANTERIOR)
+    with app.app_context():
+        assert "clientes_emails" not in inspect(db.engine).get_table_names()
+    assert _contar(app, "SELECT count(*) FROM clientes") == total
+    assert _contar(app, "SELECT count(*) FROM pg_inherits WHERE inhparent = 'clientes'::regclass") == 0
+    with pytest.raises(IntegrityError):
+        with app.app_context():
+            _inserir(app, "dup", "trocado@test.com")
+
+    _migrar(app, "upgrade")
+    assert _contar(app, "SELECT count(*) FROM clientes") == total
+    assert _contar(app, "SELECT count(*) FROM clientes_emails") == total
+
+
+def _indices(app):
+    with app.app_context():
+        return set(db.session.execute(text(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'clientes' AND name LIKE 'ix_%'"
+        )).scalars())
+
+
+def test_modelo_tem_os_indices_das_migracoes(criar_app, criar_app_vazio, na_raiz):
+    migrado = criar_app_vazio()
+    _migrar(migrado, "upgrade")
+    # Sem diferença entre modelo e banco: o próximo `flask db migrate` não remove índices
+    _migrar(migrado, "check")
+
+    criado = criar_app()
+    assert _indices(criado) == _indices(migrado) == {
+        "ix_clientes_nome", "ix_clientes_agencia_id", "ix_clientes_tipo_conta_id", "ix_clientes_bandeira_id"
+    }
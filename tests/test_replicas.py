@@ -0,0 +1,121 @@
+import pytest
+from sqlalchemy import create_engine
+
+from app import db
+from app.db_models import ClienteDB
+from app.service.replicas import EXTENSAO, RoteadorReplicas
+
+
+def _criar_banco(uri, nome):
+    # Cada banco recebe o mesmo cliente com um nome diferente, para sabermos de onde veio a leitura
+    engine = create_engine(uri)
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(ClienteDB.__table__.insert(), {
+            "cpf": "111", "nome": nome, "email": "joao@test.com", "telefone": "111111",
+            "agencia": "0001", "conta": "1", "tipo_conta": "C", "cartao_debito": "1",
+        })
+    engine.dispose()
+
+
+@pytest.fixture
+def criar_app_com_replicas(criar_app, tmp_path):
+    def criar(replicas, **config):
+        primario = f"sqlite:///{tmp_path / 'primario.db'}"
+        _criar_banco(primario, "Primario")
+        for nome, uri in replicas.items():
+            _criar_banco(uri, nome)
+        padrao = {"SQLALCHEMY_REPLICA_URIS": list(replicas.values()), "CACHE_BACKEND": "none"}
+        return criar_app(primario, criar_tabelas=False, **{**padrao, **config})
+
+    return criar
+
+
+def _nome_lido(client, **kwargs):
+    response = client.get('/clientes/1', **kwargs)
+    assert response.status_code == 200
+    return response.get_json()["data"]["nome"]
+
+
+def test_leituras_alternam_entre_replicas(criar_app_com_replicas, tmp_path):
+    app = criar_app_com_replicas({
+        "Replica A": f"sqlite:///{tmp_path / 'a.db'}",
+        "Replica B": f"sqlite:///{tmp_path / 'b.db'}",
+    })
+    client = app.test_client()
+
+    nomes = [_nome_lido(client) for _ in range(4)]
+
+    assert nomes == ["Replica A", "Replica B", "Replica A", "Replica B"]
+
+def test_escritas_vao_para_o_primario(criar_app_com_replicas, tmp_path):
+    app = criar_app_com_replicas({"Replica": f"sqlite:///{tmp_path / 'r.db'}"})
+    client = app.test_client()
+
+    response = client.put('/clientes/1', json={
+        "cpf": "111", "nome": "Primario Atualizado", "email": "joao@test.com",
+        "telefone": "111111", "agencia": "0001", "conta": "1", "tipo_conta": "C",
+    })
+
+    assert response.status_code == 200
+    with app.app_context():
+        assert db.session.get(ClienteDB, 1).nome == "Primario Atualizado"
+    assert _nome_lido(client) == "Replica"
+
+def test_janela_read_your_own_writes(criar_app_com_replicas, tmp_path):
+    app = criar_app_com_replicas(
+        {"Replica": f"sqlite:///{tmp_path / 'r.db'}"}, READ_YOUR_WRITES_SECONDS=5
+    )
+    client = app.test_client()
+    outro_client = app.test_client()
+
+    response = client.put('/clientes/1', json={
+        "cpf": "111", "nome": "Primario Atualizado", "email": "joao@test.com",
+        "telefone": "111111", "agencia": "0001", "conta": "1", "tipo_conta": "C",
+    })
+
+    assert response.status_code == 200
+    assert "ryow_ate=" in response.headers["Set-Cookie"]
+    assert _nome_lido(client) == "Primario Atualizado"
+    assert _nome_lido(outro_client) == "Replica"
+
+def test_replica_com_falha_sai_do_rodizio(criar_app_com_replicas, tmp_path):
+    # A primeira réplica aponta para um diretório inexistente: conectar falha
+    app = criar_app_com_replicas({
+        "Replica": f"sqlite:///{tmp_path / 'r.db'}",
+    }, SQLALCHEMY_REPLICA_URIS=[
+        f"sqlite:///{tmp_path / 'inexistente' / 'x.db'}",
+        f"sqlite:///{tmp_path / 'r.db'}",
+    ])
+    client = app.test_client()
+
+    assert client.get('/clientes/1').status_code == 500
+    assert app.extensions[EXTENSAO].stats() == {"replica_0": "evicted", "replica_1": "healthy"}
+    assert [_nome_lido(client) for _ in range(3)] == ["Replica"] * 3
+
+def test_preenchimento_do_cache_le_do_primario(criar_app_com_replicas, tmp_path):
+    # A linha guardada no cache vale pelo TTL inteiro: ela não pode vir de uma réplica atrasada
+    app = criar_app_com_replicas({"Replica": f"sqlite:///{tmp_path / 'r.db'}"}, CACHE_BACKEND="memory")
+    client = app.test_client()
+
+    assert _nome_lido(client) == "Primario"
+    assert _nome_lido(client) == "Primario"
+    assert client.get('/clientes/?limit=1').get_json()["data"][0]["nome"] == "Replica"
+
+def test_sem_replicas_saudaveis_le_do_primario(criar_app_com_replicas, tmp_path):
+    app = criar_app_com_replicas({"Replica": f"sqlite:///{tmp_path / 'r.db'}"})
+    roteador = app.extensions[EXTENSAO]
+    roteador.marcar_indisponivel("replica_0")
+
+    assert _nome_lido(app.test_client()) == "Primario"
+
+def test_roteador_volta_a_usar_replica_apos_cooldown():
+    roteador = RoteadorReplicas(["replica_0", "replica_1"], cooldown=0)
+    roteador.marcar_indisponivel("replica_0")
+
+    assert roteador.escolher() == "replica_0"
+
+@pytest.mark.parametrize("replicas", [[], None])
+def test_sem_replicas_configuradas_nao_ativa_roteamento(criar_app, replicas):
+    app = criar_app(criar_tabelas=False, SQLALCHEMY_REPLICA_URIS=replicas)
+    assert EXTENSAO not in app.extensions
@@ -0,0 +1,27 @@
+from app import TestConfig, create_app
+from app.db_models import ClienteDB
+from app.model.cliente_model import Cliente as ClienteSchema
+from app.service.serializacao import CAMPOS_CLIENTE, OrjsonProvider, cliente_para_dict, linha_para_dict
+
+
+def _cliente():
+    return ClienteDB(
+        id=7, cpf="777", nome="José Ávila", email="jose@test.com", telefone="7777",
+        agencia="0001", conta="7", tipo_conta="C", cartao_debito="7"
+    )
+
+def test_caminho_rapido_igual_ao_pydantic():
+    cliente = _cliente()
+    esperado = ClienteSchema.model_validate(cliente).model_dump()
+    assert cliente_para_dict(cliente) == esperado
+
+    linha = tuple(getattr(cliente, campo) for campo in CAMPOS_CLIENTE)
+    assert linha_para_dict(linha, exclude_none=True) == ClienteSchema.model_validate(cliente).model_dump(exclude_none=True)
+
+def test_orjson_provider_instalado():
+    app = create_app(TestConfig)
+    assert isinstance(app.json, OrjsonProvider)
+    with app.test_request_context():
+        response = app.json.response({"nome": "José"})
+    assert response.get_json() == {"nome": "José"}
+    assert "José".encode() in response.data
@@ -0,0 +1,169 @@
+import io
+import json
+import threading
+
+import pytest
+from sqlalchemy import text
+
+from app import db
+from app.service import unicidade as unicidade_module
+from app.service.unicidade import FiltroBloom, FiltroEscalavel, get_unicidade
+
+
+@pytest.fixture
+def config_app(novo_cliente):
+    return {"clientes": [novo_cliente(1)], "UNIQUENESS_FILTER_CAPACITY": 100}
+
+
+def test_filtro_bloom_sem_falsos_negativos():
+    filtro = FiltroBloom(1000, 0.01)
+    for i in range(1000):
+        filtro.adicionar(f"cpf-{i}")
+
+    assert all(f"cpf-{i}" in filtro for i in range(1000))
+    falsos_positivos = sum(f"outro-{i}" in filtro for i in range(10000))
+    assert falsos_positivos < 300
+    assert filtro.memoria_bytes == (filtro.bits + 7) // 8
+    assert 0.005 < filtro.taxa_fp_estimada < 0.02
+
+def _montar(app):
+    with app.app_context():
+        indice = get_unicidade()
+    indice.garantir_construido(app)
+    indice.aguardar()
+    return indice
+
+
+def test_cadastro_novo_dispensa_consulta(app, novo_cliente):
+    _montar(app)
+    cliente = app.test_client()
+
+    assert cliente.post("/clientes/", json=novo_cliente(2)).status_code == 201
+    response = cliente.post("/clientes/", json={**novo_cliente(3), "cpf": novo_cliente(2)["cpf"]})
+    assert response.status_code == 409
+    assert response.get_json()["message"] == "CPF já cadastrado"
+
+    stats = cliente.get("/clientes/unicidade/stats").get_json()["data"]
+    assert stats["pronto"] is True
+    assert stats["verificacoes"] == 2
+    assert stats["consultas_evitadas"] == 1
+    assert stats["filtros"]["cpf"]["itens"] == 2
+    assert stats["memoria_bytes"] > 0
+    assert 0 <= stats["filtros"]["email"]["taxa_fp_estimada"] < 0.01
+
+def test_restricao_unica_continua_valendo(app, novo_cliente):
+    # Gravação de outro processo: o filtro deste não sabe do CPF e pula a consulta
+    with app.app_context():
+        db.session.execute(text(
+            "INSERT INTO clientes (cpf, nome, email, telefone, agencia, conta, tipo_conta, cartao_debito, versao) "
+            "VALUES ('9005', 'Outro', 'outro@test.com', '1', '0001', '5', 'C', '5', 1)"
+        ))
+        db.session.commit()
+
+    response = app.test_client().post("/clientes/", json=novo_cliente(5))
+    assert response.status_code == 409
+    assert response.get_json()["message"] == "CPF já cadastrado"
+
+def test_filtro_escalavel_cresce_por_camadas():
+    filtro = FiltroEscalavel(100, 0.01)
+    for i in range(700):
+        filtro.adicionar(f"cpf-{i}")
+
+    assert [camada.capacidade for camada in filtro.camadas] == [100, 200, 400]
+    assert all(f"cpf-{i}" in filtro for i in range(700))
+    assert filtro.taxa_fp_estimada < 0.01
+
+def test_inicializacao_nao_le_a_tabela(app, novo_cliente):
+    with app.app_context():
+        assert get_unicidade().pronto is False
+
+    assert app.test_client().post("/clientes/", json=novo_cliente(2)).status_code == 201
+    indice = _montar(app)
+    assert "9001" in indice.filtros["cpf"] and "9002" in indice.filtros["cpf"]
+
+def test_importacao_entra_no_filtro(app, novo_cliente):
+    indice = _montar(app)
+    arquivo = "\n".join(json.dumps(novo_cliente(n)) for n in (2, 3))
+    response = app.test_client().post(
+        "/clientes/import",
+        data={"arquivo": (io.BytesIO(arquivo.encode()), "clientes.ndjson")},
+        content_type="multipart/form-data"
+    )
+    assert response.get_json()["data"]["importadas"] == 2
+    assert "9002" in indice.filtros["cpf"] and "cliente3@test.com" in indice.filtros["email"]
+
+def test_filtro_cresce_ao_passar_da_capacidade(app, client, novo_cliente):
+    with app.app_context():
+        indice = get_unicidade()
+    indice.capacidade_minima = 2
+    _montar(app)
+    assert indice.filtros["cpf"].capacidade == 2
+
+    for n in (2, 3, 4):
+        assert client.post("/clientes/", json=novo_cliente(n)).status_code == 201
+
+    # Nada de remontagem: o filtro segue pronto, com uma camada a mais
+    stats = client.get("/clientes/unicidade/stats").get_json()["data"]
+    assert stats["pronto"] is True
+    assert stats["filtros"]["cpf"]["camadas"] == 2
+    assert stats["filtros"]["cpf"]["itens"] == 4
+    assert client.post("/clientes/", json=novo_cliente(3)).status_code == 409
+
+def test_montagem_em_segundo_plano_e_espera_apos_falha(app, monkeypatch, novo_cliente):
+    with app.app_context():
+        indice = get_unicidade()
+
+    # Enquanto a thread monta o filtro, os cadastros seguem consultando o banco
+    comecou, liberar, leituras = threading.Event(), threading.Event(), []
+    construir = indice.construir
+
+    def construir_devagar(session):
+        leituras.append(1)
+        comecou.set()
+        liberar.wait(5)
+        construir(session)
+
+    monkeypatch.setattr(indice, "construir", construir_devagar)
+    cliente = app.test_client()
+    assert cliente.post("/clientes/", json=novo_cliente(2)).status_code == 201
+    comecou.wait(5)
+    assert cliente.post("/clientes/", json=novo_cliente(3)).status_code == 201
+    assert cliente.post("/clientes/", json=novo_cliente(2)).status_code == 409
+    assert indice.stats()["construindo"] is True
+    assert indice.consultas_evitadas == 0
+    liberar.set()
+    indice.aguardar()
+    assert leituras == [1]
+    assert "9003" in indice.filtros["cpf"]  # gravado durante a montagem
+
+    # Falha: a próxima tentativa só depois da espera, que dobra a cada falha
+    def montar():
+        indice.garantir_construido(app)
+        indice.aguardar()
+
+    agora = [1000.0]
+    monkeypatch.setattr(unicidade_module.time, "monotonic", lambda: agora[0])
+    indice.filtros = None
+    with app.app_context():
+        db.session.execute(text("ALTER TABLE clientes RENAME TO clientes_fora"))
+        db.session.commit()
+    montar()
+    montar()
+    assert indice.falhas == 1
+    agora[0] += unicidade_module.ESPERA_INICIAL
+    montar()
+    assert indice.falhas == 2
+    agora[0] += unicidade_module.ESPERA_INICIAL
+    montar()
+    assert indice.falhas == 2
+    assert len(leituras) == 3
+
+def test_filtro_desligado(criar_app, novo_cliente):
+    app = criar_app(UNIQUENESS_FILTER_ENABLED=False)
+    cliente = app.test_client()
+
+    assert cliente.post("/clientes/", json=novo_cliente(1)).status_code == 201
+    assert cliente.post("/clientes/", json=novo_cliente(1)).status_code == 409
+    stats = cliente.get("/clientes/unicidade/stats").get_json()["data"]
+    assert stats["pronto"] is False
+    assert stats["consultas_evitadas"] == 0
@@ -0,0 +1,17 @@
+from os import getenv
+
+from app import create_app
+
+# Ponto de entrada de produção: `gunicorn -c gunicorn.conf.py wsgi:app` ou `python wsgi.py` (waitress)
+app = create_app()
+
+if __name__ == "__main__":
+    from waitress import serve
+
+    serve(
+        app,
+        host=getenv("HOST", "0.0.0.0"),
+        port=int(getenv("PORT", 5000)),
+        threads=int(getenv("WAITRESS_THREADS", 8)),
+        connection_limit=int(getenv("WAITRESS_CONNECTION_LIMIT", 1000)),
+    )